@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     ClassRoom, Subject, StaffProfile, StudentProfile, ParentProfile, 
-    AttendanceRecord, Exam, ExamResult
+    AttendanceRecord, AttendanceMonthlySummary, Exam, ExamResult, ExamStudentSummary, ImportJob
 )
 
 # Register your models here.
@@ -46,6 +46,13 @@ class AttendanceRecordAdmin(admin.ModelAdmin):
     list_filter = ('date', 'status', 'student__classroom')
     search_fields = ('student__user__first_name', 'student__admission_number')
 
+@admin.register(AttendanceMonthlySummary)
+class AttendanceMonthlySummaryAdmin(admin.ModelAdmin):
+    list_display = ('student', 'classroom', 'month', 'present', 'absent', 'leave')
+    list_filter = ('month', 'classroom')
+    search_fields = ('student__admission_number', 'student__user__first_name')
+    readonly_fields = ('student', 'classroom', 'month', 'present', 'absent', 'leave')
+
 @admin.register(Exam)
 class ExamAdmin(admin.ModelAdmin):
     list_display = ('name', 'classroom', 'date', 'academic_year')
@@ -56,3 +63,16 @@ class ExamResultAdmin(admin.ModelAdmin):
     list_display = ('exam', 'student', 'subject', 'marks_obtained', 'grade')
     list_filter = ('exam', 'subject')
     search_fields = ('student__user__first_name',)
+
+@admin.register(ExamStudentSummary)
+class ExamStudentSummaryAdmin(admin.ModelAdmin):
+    list_display = ('exam', 'student', 'total', 'max_total', 'percentage', 'rank')
+    list_filter = ('exam',)
+    search_fields = ('student__admission_number', 'student__user__first_name')
+    readonly_fields = ('exam', 'student', 'total', 'max_total', 'percentage', 'rank')
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'processed_rows', 'created_count', 'created_by', 'created_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('errors', 'failure_reason', 'started_at', 'finished_at')
@@ -0,0 +1,204 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework import serializers, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from accounts.models import User
+from accounts.permissions import RolePermission
+from core.api import ConditionalGetMixin, CursorPage, FilterParamsMixin
+
+from .models import AttendanceMonthlySummary, AttendanceRecord, Exam, ExamResult, StudentProfile
+from .serializers import (
+    AttendanceMonthlySummarySerializer,
+    AttendancePeriodSerializer,
+    AttendanceRecordSerializer,
+    ExamResultSerializer,
+    ExamSerializer,
+    RollCallSerializer,
+    StudentProfileSerializer,
+)
+from .services import (
+    attendance_by_student,
+    attendance_period,
+    attendance_roll,
+    low_attendance,
+    save_roll_call,
+    search_students,
+    send_absence_alerts,
+)
+
+
+class AcademicsViewSet(ConditionalGetMixin, FilterParamsMixin, viewsets.ModelViewSet):
+    """Base for the academics endpoints: admin/staff only, cursor-paginated,
+    filtered through ``filter_params``.
+    """
+
+    permission_classes = [IsAuthenticated, RolePermission]
+    allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
+    pagination_class = CursorPage
+
+
+class StudentProfileViewSet(AcademicsViewSet):
+    queryset = StudentProfile.objects.select_related("user", "classroom__academic_year")
+    serializer_class = StudentProfileSerializer
+    filter_params = {
+        "classroom": "classroom_id",
+        "institution": "classroom__institution_id",
+        "admission_number": "admission_number__istartswith",
+    }
+
+    def filter_queryset(self, queryset):
+        """Also accepts ``?q=``, searched like the student list."""
+        return search_students(super().filter_queryset(queryset), q=self.request.query_params.get("q", ""))
+
+
+class AttendanceRecordViewSet(AcademicsViewSet):
+    queryset = AttendanceRecord.objects.select_related("student")
+    serializer_class = AttendanceRecordSerializer
+    filter_params = {
+        "student": "student_id",
+        "classroom": "student__classroom_id",
+        "date": "date",
+        "date_from": "date__gte",
+        "date_to": "date__lte",
+        "status": "status",
+    }
+
+    def perform_create(self, serializer):
+        serializer.save(marked_by=getattr(self.request.user, "staff_profile", None))
+
+    @action(detail=False, methods=["get", "post"], url_path="roll-call")
+    def roll_call(self, request):
+        """GET ``?classroom=&date=``: the class roll with each student's status
+        (``null`` if unmarked). POST ``{classroom, date, records: [{student, status}]}``
+        to write the roll in one upsert.
+        """
+        data = request.data if request.method == "POST" else request.query_params
+        serializer = RollCallSerializer(data=data, partial=request.method == "GET")
+        serializer.is_valid(raise_exception=True)
+        classroom, date = serializer.validated_data["classroom"], serializer.validated_data["date"]
+
+        if request.method == "POST":
+            statuses = {entry["student"]: entry["status"] for entry in serializer.validated_data["records"]}
+            try:
+                with transaction.atomic():
+                    written, newly_absent = save_roll_call(
+                        classroom, date, statuses,
+                        marked_by=getattr(request.user, "staff_profile", None),
+                    )
+                    send_absence_alerts(newly_absent, date)
+            except ValidationError as e:
+                raise serializers.ValidationError({"records": e.messages})
+
+        roll = attendance_roll(classroom, date).values("pk", "admission_number", "status")
+        return Response({
+            "classroom": classroom.pk,
+            "date": date,
+            "records": [
+                {"student": row["pk"], "admission_number": row["admission_number"], "status": row["status"]}
+                for row in roll
+            ],
+        })
+
+
+class AttendanceSummaryViewSet(AcademicsViewSet):
+    """Read-only monthly attendance rollups, kept current by attendance writes.
+
+    Each row's ``days`` is the month as one character per day (P, A, L or
+    "-"), so a student's history over a term or several years is a few rows.
+    """
+
+    queryset = AttendanceMonthlySummary.objects.select_related("student")
+    serializer_class = AttendanceMonthlySummarySerializer
+    http_method_names = ["get", "head", "options"]
+    filter_params = {
+        "student": "student_id",
+        "classroom": "classroom_id",
+        "institution": "classroom__institution_id",
+    }
+
+    def period_params(self) -> dict:
+        serializer = AttendancePeriodSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.period_params()
+        if "month_from" in params:
+            queryset = queryset.filter(month__gte=params["month_from"])
+        if "month_to" in params:
+            queryset = queryset.filter(month__lte=params["month_to"])
+        return queryset
+
+    @action(detail=False, methods=["get"])
+    def totals(self, request):
+        """Per-student totals over ``?month_from=YYYY-MM&month_to=YYYY-MM``
+        (default: the active academic year), optionally for one ``classroom`` or
+        ``institution``; ``below=75`` keeps only students under 75%.
+        """
+        params = self.period_params()
+        start, end = attendance_period()
+        start, end = params.get("month_from", start), params.get("month_to", end)
+        filters = {}
+        if "classroom" in params:
+            filters["classroom_id"] = params["classroom"]
+        if "institution" in params:
+            filters["classroom__institution_id"] = params["institution"]
+        if "below" in params:
+            rows = low_attendance(params["below"], start, end, **filters)
+        else:
+            rows = attendance_by_student(start, end, **filters)
+        return Response({
+            "month_from": start.strftime("%Y-%m"),
+            "month_to": end.strftime("%Y-%m"),
+            "students": [
+                {
+                    "student": row["student_id"],
+                    "admission_number": row["student__admission_number"],
+                    "present": row["present_days"],
+                    "absent": row["absent_days"],
+                    "leave": row["leave_days"],
+                    "total": row["total_days"],
+                    "percentage": round(row["percentage"], 1),
+                }
+                for row in rows
+            ],
+        })
+
+
+class ExamViewSet(AcademicsViewSet):
+    queryset = Exam.objects.select_related("classroom__academic_year").prefetch_related("classroom__subjects")
+    serializer_class = ExamSerializer
+    filter_params = {
+        "classroom": "classroom_id",
+        "academic_year": "academic_year_id",
+    }
+
+
+class ExamResultViewSet(AcademicsViewSet):
+    """Marks per exam/student/subject. Writes keep the exam's rank summaries current."""
+
+    queryset = ExamResult.objects.select_related("subject")
+    serializer_class = ExamResultSerializer
+    filter_params = {
+        "exam": "exam_id",
+        "student": "student_id",
+        "subject": "subject_id",
+    }
+
+    # ExamStudentSummary rows are refreshed by the ExamResult signals.
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
@@ -1,10 +1,12 @@
 from rest_framework.routers import DefaultRouter
 
-router = DefaultRouter()
+from .api import AttendanceRecordViewSet, AttendanceSummaryViewSet, ExamResultViewSet, ExamViewSet, StudentProfileViewSet
 
-# ViewSets for academics (students, attendance, exams) will be registered here.
+router = DefaultRouter()
+router.register("students", StudentProfileViewSet, basename="student")
+router.register("attendance", AttendanceRecordViewSet, basename="attendance")
+router.register("attendance-summaries", AttendanceSummaryViewSet, basename="attendance-summary")
+router.register("exams", ExamViewSet, basename="exam")
+router.register("exam-results", ExamResultViewSet, basename="exam-result")
 
 urlpatterns = router.urls
-
-
-
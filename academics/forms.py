@@ -1,6 +1,7 @@
 from django import forms
 from accounts.models import User
-from .models import ClassRoom, StudentProfile, StaffProfile, Subject, Exam, ExamResult
+from core.models import AcademicYear, Institution
+from .models import AttendanceRecord, ClassRoom, StudentProfile, StaffProfile, Subject, Exam, ExamResult
 
 class ClassRoomForm(forms.ModelForm):
     class Meta:
@@ -251,3 +252,38 @@ class BulkExamResultForm(forms.Form):
              # Actually, let's allow empty to mean "not entered".
              pass
         return cleaned_data
+
+
+class RollCallEntryForm(forms.Form):
+    """One student's row in the class roll-call formset."""
+    student_id = forms.IntegerField(widget=forms.HiddenInput())
+    status = forms.ChoiceField(
+        choices=AttendanceRecord.Status.choices,
+        widget=forms.RadioSelect,
+        initial=AttendanceRecord.Status.PRESENT,
+    )
+
+
+class StudentSearchForm(forms.Form):
+    """Filters for the student list; every field is optional."""
+
+    q = forms.CharField(required=False, max_length=100)
+    institution = forms.ModelChoiceField(queryset=Institution.objects.all(), required=False)
+    academic_year = forms.ModelChoiceField(queryset=AcademicYear.objects.all(), required=False)
+    classroom = forms.ModelChoiceField(
+        queryset=ClassRoom.objects.select_related('academic_year').order_by('standard', 'division'),
+        required=False,
+    )
+
+    def filter_fields(self):
+        """Select boxes in the shape ``components/search_filter.html`` expects."""
+        fields = []
+        for name in ('institution', 'academic_year', 'classroom'):
+            bound = self[name]
+            fields.append({
+                'name': name,
+                'label': bound.label,
+                'selected': str(bound.value() or ''),
+                'options': [{'value': str(value), 'label': label} for value, label in bound.field.choices if value],
+            })
+        return fields
@@ -0,0 +1,347 @@
+"""Spreadsheet import pipelines for students and staff.
+
+Workbooks are opened in openpyxl's read-only streaming mode and rows are
+validated in memory against lookups prefetched up front, then inserted with
+``bulk_create`` in chunks, so the cost of an import is a handful of queries
+per chunk rather than several per row.
+"""
+import datetime
+
+import openpyxl
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+from accounts.models import User
+
+from core.models import Institution
+
+from .models import ClassRoom, ImportJob, StaffProfile, StudentProfile
+
+DEFAULT_STUDENT_PASSWORD = "password123"  # Default password, should force change later
+DEFAULT_STAFF_PASSWORD = "defaultpassword123"
+IMPORT_CHUNK_SIZE = 500
+
+# Columns: First Name, Last Name, Email, DOB, Admin No, WhatsApp, Class Code, Father Name, Mother Name, Address, Blood Group
+STUDENT_COLUMNS = 11
+# Columns: First Name, Last Name, Email, Mobile, Place, Department, Designation, Qualification
+STAFF_COLUMNS = 8
+
+
+def iter_sheet_rows(excel_file, width, min_row=2):
+    """Stream ``(row_number, values)`` from the active sheet, padded to ``width``."""
+    wb = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        for index, row in enumerate(wb.active.iter_rows(min_row=min_row, values_only=True), start=min_row):
+            row = list(row[:width]) + [None] * (width - len(row))
+            yield index, row
+    finally:
+        wb.close()
+
+
+def count_sheet_rows(excel_file, min_row=2) -> int | None:
+    """Data rows in the active sheet according to its stored dimensions, if any."""
+    wb = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        max_row = wb.active.max_row
+    finally:
+        wb.close()
+    return None if max_row is None else max(max_row - min_row + 1, 0)
+
+
+def _clean(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _validation_message(error: ValidationError) -> str:
+    if hasattr(error, "message_dict"):
+        return "; ".join(f"{field}: {' '.join(msgs)}" for field, msgs in error.message_dict.items())
+    return " ".join(error.messages)
+
+
+def classroom_lookup() -> dict[tuple[str, str | None], int]:
+    """Map class codes to classroom ids with one query.
+
+    Keys are ``(standard, division)`` for "Standard-Division" codes such as
+    "10-A" and ``(standard, None)`` for a bare standard, all lower-cased.
+    As with the old per-row ``.first()`` lookups, the lowest id wins.
+    """
+    lookup: dict[tuple[str, str | None], int] = {}
+    for pk, standard, division in ClassRoom.objects.order_by("pk").values_list("pk", "standard", "division"):
+        standard = standard.strip().lower()
+        lookup.setdefault((standard, division.strip().lower()), pk)
+        lookup.setdefault((standard, None), pk)
+    return lookup
+
+
+def _resolve_classroom(lookup, class_code) -> int | None:
+    class_code = str(class_code)
+    if "-" in class_code:
+        std, div = class_code.split("-", 1)
+        return lookup.get((std.strip().lower(), div.strip().lower()))
+    return lookup.get((class_code.strip().lower(), None))
+
+
+def _parse_date(value) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    if value in (None, ""):
+        raise ValidationError("Date of birth is required.")
+    return models.DateField().to_python(str(value).strip())
+
+
+def _insert_profiles(profile_model, pending: list[tuple[int, User, models.Model]], errors: list[str]) -> int:
+    """Insert a validated chunk of users and profiles; on a database error, isolate the bad rows."""
+    if not pending:
+        return 0
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create([user for _, user, _ in pending])
+            for _, user, profile in pending:
+                profile.user = user
+            profile_model.objects.bulk_create([profile for _, _, profile in pending])
+        return len(pending)
+    except IntegrityError:
+        pass
+
+    created = 0
+    for index, user, profile in pending:
+        user.pk = profile.pk = None
+        try:
+            with transaction.atomic():
+                user.save()
+                profile.user = user
+                profile.save()
+            created += 1
+        except IntegrityError as e:
+            errors.append(f"Row {index}: Error processing - {e}")
+    return created
+
+
+def _existing_usernames_and_emails() -> tuple[set[str], set[str]]:
+    usernames, emails = set(), set()
+    for username, email in User.objects.values_list("username", "email"):
+        usernames.add(username)
+        emails.add(email)
+    return usernames, emails
+
+
+def import_students(excel_file, chunk_size: int = IMPORT_CHUNK_SIZE, progress=None) -> tuple[int, list[str]]:
+    """Create student users and profiles from an uploaded workbook.
+
+    Returns ``(created_count, errors)`` where ``errors`` holds one message per
+    rejected row. Rows missing a mandatory column are skipped silently.
+    ``progress(processed_rows, created_count, errors)`` is called after every
+    chunk of ``chunk_size`` rows.
+    """
+    classrooms = classroom_lookup()
+    admission_numbers = set(StudentProfile.objects.values_list("admission_number", flat=True))
+    usernames, emails = _existing_usernames_and_emails()
+    password_hash = make_password(DEFAULT_STUDENT_PASSWORD)
+
+    created_count = processed = 0
+    errors: list[str] = []
+    pending: list[tuple[int, User, StudentProfile]] = []
+
+    for index, row in iter_sheet_rows(excel_file, STUDENT_COLUMNS):
+        if processed and processed % chunk_size == 0:
+            created_count += _insert_profiles(StudentProfile, pending, errors)
+            pending = []
+            if progress:
+                progress(processed, created_count, errors)
+        processed += 1
+
+        first_name, last_name, email, dob, admission_number, whatsapp_number, class_code, father_name, mother_name, address, blood_group = row
+
+        if not all([first_name, email, admission_number, class_code]):
+            continue  # Validating mandatory fields only
+
+        email, admission_number = _clean(email), _clean(admission_number)
+        if admission_number in admission_numbers:
+            errors.append(f"Row {index}: Student with admission number {admission_number} already exists.")
+            continue
+        if email in emails or email in usernames:
+            errors.append(f"Row {index}: User with email {email} already exists.")
+            continue
+
+        classroom_id = _resolve_classroom(classrooms, class_code)
+        if not classroom_id:
+            errors.append(f"Row {index}: Class '{class_code}' not found.")
+            continue
+
+        user = User(
+            username=email,
+            email=email,
+            password=password_hash,
+            first_name=_clean(first_name),
+            last_name=_clean(last_name),
+            role=User.Roles.STUDENT,
+        )
+        profile = StudentProfile(
+            admission_number=admission_number,
+            whatsapp_number=_clean(whatsapp_number),
+            classroom_id=classroom_id,
+            father_name=_clean(father_name),
+            mother_name=_clean(mother_name),
+            address=_clean(address),
+            blood_group=_clean(blood_group),
+        )
+        try:
+            profile.date_of_birth = _parse_date(dob)
+            user.clean_fields()
+            profile.clean_fields(exclude=["user", "classroom"])  # classroom came from the lookup
+        except ValidationError as e:
+            errors.append(f"Row {index}: Error processing - {_validation_message(e)}")
+            continue
+
+        admission_numbers.add(admission_number)
+        usernames.add(email)
+        emails.add(email)
+        pending.append((index, user, profile))
+
+    created_count += _insert_profiles(StudentProfile, pending, errors)
+    if progress:
+        progress(processed, created_count, errors)
+    return created_count, errors
+
+
+def import_staff(excel_file, chunk_size: int = IMPORT_CHUNK_SIZE, progress=None) -> tuple[int, list[str]]:
+    """Create staff users and profiles from an uploaded workbook.
+
+    Same contract as ``import_students``. Staff are assigned to the first
+    institution (MVP: a single institution is assumed).
+    """
+    institution = Institution.objects.first()
+    usernames, emails = _existing_usernames_and_emails()
+    password_hash = make_password(DEFAULT_STAFF_PASSWORD)
+
+    created_count = processed = 0
+    errors: list[str] = []
+    pending: list[tuple[int, User, StaffProfile]] = []
+
+    for index, row in iter_sheet_rows(excel_file, STAFF_COLUMNS):
+        if processed and processed % chunk_size == 0:
+            created_count += _insert_profiles(StaffProfile, pending, errors)
+            pending = []
+            if progress:
+                progress(processed, created_count, errors)
+        processed += 1
+
+        first_name, last_name, email, mobile, place, department, designation, qualification = row
+
+        if not all([first_name, email, mobile, place]):
+            continue  # Skip if compulsory fields are missing
+
+        email = _clean(email)
+        if email in emails or email in usernames:
+            errors.append(f"Row {index}: User with email {email} already exists.")
+            continue
+
+        user = User(
+            username=email,  # Use email as username
+            email=email,
+            password=password_hash,
+            first_name=_clean(first_name),
+            last_name=_clean(last_name),
+            role=User.Roles.STAFF,
+        )
+        profile = StaffProfile(
+            institution=institution,
+            mobile_number=_clean(mobile),
+            place=_clean(place),
+            department=_clean(department),
+            designation=_clean(designation),
+            qualification=_clean(qualification),
+        )
+        try:
+            user.clean_fields()
+            profile.clean_fields(exclude=["user", "institution"])
+        except ValidationError as e:
+            errors.append(f"Row {index}: Error - {_validation_message(e)}")
+            continue
+
+        usernames.add(email)
+        emails.add(email)
+        pending.append((index, user, profile))
+
+    created_count += _insert_profiles(StaffProfile, pending, errors)
+    if progress:
+        progress(processed, created_count, errors)
+    return created_count, errors
+
+
+IMPORTERS = {
+    ImportJob.Kind.STUDENTS: import_students,
+    ImportJob.Kind.STAFF: import_staff,
+}
+
+
+def fail_stale_jobs() -> int:
+    """Fail jobs left RUNNING longer than IMPORT_JOB_TIMEOUT by a dead worker.
+
+    They are not re-queued: the rows imported before the worker died are
+    already saved, so running the file again would report them as duplicates.
+    """
+    now = timezone.now()
+    return ImportJob.objects.filter(
+        status=ImportJob.Status.RUNNING,
+        started_at__lt=now - datetime.timedelta(seconds=settings.IMPORT_JOB_TIMEOUT),
+    ).update(
+        status=ImportJob.Status.FAILED,
+        failure_reason="The import worker stopped before finishing; rows processed so far were saved.",
+        finished_at=now,
+    )
+
+
+def claim_next_job() -> ImportJob | None:
+    """Move the oldest pending job to RUNNING and return it.
+
+    The claim is a conditional UPDATE, so several workers can poll the same
+    table without picking up the same job. Jobs abandoned by a crashed worker
+    are failed first (see ``fail_stale_jobs``).
+    """
+    fail_stale_jobs()
+    while True:
+        job = ImportJob.objects.filter(status=ImportJob.Status.PENDING).order_by("created_at", "pk").first()
+        if job is None:
+            return None
+        claimed = ImportJob.objects.filter(pk=job.pk, status=ImportJob.Status.PENDING).update(
+            status=ImportJob.Status.RUNNING,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_import_job(job: ImportJob) -> ImportJob:
+    """Run a claimed job to completion, saving progress after every chunk."""
+
+    def progress(processed, created_count, errors):
+        ImportJob.objects.filter(pk=job.pk).update(
+            processed_rows=processed,
+            created_count=created_count,
+            errors=errors,
+        )
+
+    try:
+        with job.file.open("rb") as excel_file:
+            job.total_rows = count_sheet_rows(excel_file)
+            job.save(update_fields=["total_rows"])
+            excel_file.seek(0)
+            IMPORTERS[job.kind](excel_file, progress=progress)
+    except Exception as e:
+        job.refresh_from_db()
+        job.status = ImportJob.Status.FAILED
+        job.failure_reason = f"Error processing file: {e}"
+    else:
+        job.refresh_from_db()
+        job.status = ImportJob.Status.COMPLETED
+        job.total_rows = job.processed_rows
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "failure_reason", "total_rows", "finished_at"])
+    return job
@@ -0,0 +1,38 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from academics.models import AttendanceMonthlySummary, AttendanceRecord
+from academics.services import refresh_attendance_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the AttendanceMonthlySummary rollups from AttendanceRecord."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Only rebuild months from this one onwards (YYYY-MM).",
+        )
+
+    def handle(self, *args, since=None, **options):
+        records = AttendanceRecord.objects.all()
+        summaries = AttendanceMonthlySummary.objects.all()
+        if since:
+            try:
+                start = datetime.datetime.strptime(since, "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--since must look like 2025-06.")
+            records = records.filter(date__gte=start)
+            summaries = summaries.filter(month__gte=start)
+
+        with transaction.atomic():
+            summaries.delete()
+            months = records.dates("date", "month")
+            total = 0
+            for month in months:
+                student_ids = records.filter(date__year=month.year, date__month=month.month).values_list("student_id", flat=True).order_by().distinct()
+                total += refresh_attendance_summaries((student_id, month) for student_id in student_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} attendance summary rows."))
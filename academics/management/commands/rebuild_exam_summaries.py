@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from academics.models import Exam
+from academics.services import refresh_exam_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed ExamStudentSummary rows from ExamResult."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--exam",
+            type=int,
+            action="append",
+            dest="exam_ids",
+            help="Only rebuild the given exam id (may be repeated).",
+        )
+
+    def handle(self, *args, exam_ids=None, **options):
+        exams = Exam.objects.order_by("pk")
+        if exam_ids:
+            exams = exams.filter(pk__in=exam_ids)
+
+        total = 0
+        for exam_id in exams.values_list("pk", flat=True).iterator():
+            with transaction.atomic():
+                total += refresh_exam_summaries(exam_id)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} exam summary rows."))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from academics.importers import claim_next_job, run_import_job
+
+
+class Command(BaseCommand):
+    help = "Run queued spreadsheet imports (ImportJob) in the background."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process all pending jobs and exit instead of polling.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep between polls when the queue is empty.",
+        )
+
+    def handle(self, *args, once=False, interval=5.0, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if once:
+                    return
+                time.sleep(interval)
+                continue
+
+            self.stdout.write(f"Running {job}...")
+            job = run_import_job(job)
+            style = self.style.SUCCESS if job.status == job.Status.COMPLETED else self.style.ERROR
+            self.stdout.write(style(
+                f"{job}: {job.created_count} created, {len(job.errors)} row errors. {job.failure_reason}".strip()
+            ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 01:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0006_subject_max_marks_subject_pass_marks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamStudentSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('max_total', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('percentage', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('rank', models.PositiveIntegerField()),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_summaries', to='academics.exam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_summaries', to='academics.studentprofile')),
+            ],
+            options={
+                'verbose_name': 'Exam Student Summary',
+                'verbose_name_plural': 'Exam Student Summaries',
+                'ordering': ['exam', 'rank'],
+                'indexes': [models.Index(fields=['exam', 'rank'], name='academics_e_exam_id_30c386_idx')],
+                'unique_together': {('exam', 'student')},
+            },
+        ),
+    ]
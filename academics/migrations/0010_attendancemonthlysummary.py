@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-18 01:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0009_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month.')),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('leave', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='academics.classroom')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='academics.studentprofile')),
+            ],
+            options={
+                'verbose_name': 'Attendance Monthly Summary',
+                'verbose_name_plural': 'Attendance Monthly Summaries',
+                'ordering': ['month'],
+                'indexes': [models.Index(fields=['classroom', 'month'], name='academics_a_classro_d5c095_idx')],
+                'unique_together': {('student', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0010_attendancemonthlysummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancemonthlysummary',
+            name='days',
+            field=models.PositiveBigIntegerField(default=0, help_text='Daily statuses, two bits per day.'),
+        ),
+    ]
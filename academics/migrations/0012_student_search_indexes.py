@@ -0,0 +1,46 @@
+# Generated by Django 5.0 on 2026-10-18 01:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Trigram GIN indexes on the upper-cased columns serve Django's case-insensitive
+# LIKE lookups (``istartswith``/``icontains``) on PostgreSQL. SQLite has no
+# pg_trgm, so these are skipped there.
+TRIGRAM_INDEXES = [
+    ("academics_student_admission_trgm", "academics_studentprofile", "admission_number"),
+    ("accounts_user_first_name_trgm", "accounts_user", "first_name"),
+    ("accounts_user_last_name_trgm", "accounts_user", "last_name"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _table, _column in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0011_attendancemonthlysummary_days'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['classroom', 'admission_number'], name='academics_s_classro_fa9ba7_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,3 +1,6 @@
+import calendar
+import datetime
+
 from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -104,6 +107,11 @@ class StudentProfile(models.Model):
             ('AB+', 'AB+'), ('AB-', 'AB-'), ('O+', 'O+'), ('O-', 'O-')
         ]
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # The student list filters by class and pages by admission number.
+        indexes = [models.Index(fields=["classroom", "admission_number"])]
 
     def __str__(self) -> str:
         return f"{self.admission_number} - {self.user.get_full_name() or self.user.username}"
@@ -150,6 +158,7 @@ class AttendanceRecord(models.Model):
         blank=True,
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("student", "date")
@@ -159,6 +168,88 @@ class AttendanceRecord(models.Model):
         return f"{self.student} - {self.date} - {self.get_status_display()}"
 
 
+class AttendanceMonthlySummary(models.Model):
+    """Present/absent/leave counts per student per calendar month.
+
+    Maintained by ``academics.services.refresh_attendance_summaries`` whenever
+    attendance is written, so percentage reports read one row per student per
+    month instead of scanning ``AttendanceRecord``. ``classroom`` is the
+    student's class when the month was last refreshed.
+
+    ``days`` packs the month's statuses two bits per day (day 1 in the lowest
+    bits; 0 = not marked, then the codes in ``DAY_CODES``), so day-by-day
+    history over a term or several years is a handful of rows, not hundreds.
+    """
+
+    DAY_CODES = {
+        AttendanceRecord.Status.PRESENT: 1,
+        AttendanceRecord.Status.ABSENT: 2,
+        AttendanceRecord.Status.LEAVE: 3,
+    }
+    DAY_STATUSES = {code: status for status, code in DAY_CODES.items()}
+
+    student = models.ForeignKey(
+        StudentProfile,
+        on_delete=models.CASCADE,
+        related_name="attendance_summaries",
+    )
+    classroom = models.ForeignKey(
+        ClassRoom,
+        on_delete=models.CASCADE,
+        related_name="attendance_summaries",
+    )
+    month = models.DateField(help_text=_("First day of the month."))
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    leave = models.PositiveIntegerField(default=0)
+    days = models.PositiveBigIntegerField(default=0, help_text=_("Daily statuses, two bits per day."))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("student", "month")
+        ordering = ["month"]
+        indexes = [models.Index(fields=["classroom", "month"])]
+        verbose_name = _("Attendance Monthly Summary")
+        verbose_name_plural = _("Attendance Monthly Summaries")
+
+    def __str__(self) -> str:
+        return f"{self.student} - {self.month:%b %Y}: {self.percentage:.1f}%"
+
+    @property
+    def total(self) -> int:
+        return self.present + self.absent + self.leave
+
+    @property
+    def percentage(self) -> float:
+        return self.present * 100 / self.total if self.total else 0.0
+
+    def add_day(self, day: int, status: str) -> None:
+        """Count one day's status and set it in ``days``."""
+        field = {"P": "present", "A": "absent", "L": "leave"}[status]
+        setattr(self, field, getattr(self, field) + 1)
+        shift = (day - 1) * 2
+        self.days = self.days & ~(0b11 << shift) | self.DAY_CODES[status] << shift
+
+    def day_status(self, day: int) -> str | None:
+        return self.DAY_STATUSES.get(self.days >> (day - 1) * 2 & 0b11)
+
+    def day_statuses(self) -> dict[datetime.date, str]:
+        """``{date: status}`` for the marked days of the month."""
+        statuses = {}
+        days, day = self.days, 1
+        while days:
+            if days & 0b11:
+                statuses[self.month.replace(day=day)] = self.DAY_STATUSES[days & 0b11]
+            days, day = days >> 2, day + 1
+        return statuses
+
+    @property
+    def day_codes(self) -> str:
+        """The month as one character per day: P, A, L, or "-" if not marked."""
+        length = calendar.monthrange(self.month.year, self.month.month)[1]
+        return "".join(self.day_status(day) or "-" for day in range(1, length + 1))
+
+
 class Exam(models.Model):
     """Represents an exam for a class."""
 
@@ -174,6 +265,7 @@ class Exam(models.Model):
         related_name="exams",
     )
     date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return f"{self.name} - {self.classroom}"
@@ -200,9 +292,97 @@ class ExamResult(models.Model):
     marks_obtained = models.DecimalField(max_digits=5, decimal_places=2)
     max_marks = models.DecimalField(max_digits=5, decimal_places=2)
     grade = models.CharField(max_length=10, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("exam", "student", "subject")
 
     def __str__(self) -> str:
         return f"{self.exam} - {self.student} - {self.subject}"
+
+
+class ExamStudentSummary(models.Model):
+    """Precomputed per-student totals and class rank for an exam.
+
+    Maintained by ``academics.services.refresh_exam_summaries``: the mark
+    entry page calls it after its bulk upsert, and ``academics.signals``
+    after any other ``ExamResult`` write or a student changing class. Result
+    pages read one row per student instead of re-aggregating ``ExamResult``.
+    """
+
+    exam = models.ForeignKey(
+        Exam,
+        on_delete=models.CASCADE,
+        related_name="student_summaries",
+    )
+    student = models.ForeignKey(
+        StudentProfile,
+        on_delete=models.CASCADE,
+        related_name="exam_summaries",
+    )
+    total = models.DecimalField(max_digits=8, decimal_places=2)
+    max_total = models.DecimalField(max_digits=8, decimal_places=2)
+    percentage = models.DecimalField(max_digits=5, decimal_places=2)
+    rank = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ("exam", "student")
+        ordering = ["exam", "rank"]
+        indexes = [models.Index(fields=["exam", "rank"])]
+        verbose_name = _("Exam Student Summary")
+        verbose_name_plural = _("Exam Student Summaries")
+
+    def __str__(self) -> str:
+        return f"{self.exam} - {self.student} (#{self.rank})"
+
+
+class ImportJob(models.Model):
+    """A spreadsheet import queued from the web UI and run by the import worker.
+
+    The worker is ``python manage.py run_import_jobs``; it records progress and
+    per-row errors on the job so the import page can poll for them.
+    """
+
+    class Kind(models.TextChoices):
+        STUDENTS = "STUDENTS", _("Students")
+        STAFF = "STAFF", _("Staff")
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", _("Pending")
+        RUNNING = "RUNNING", _("Running")
+        COMPLETED = "COMPLETED", _("Completed")
+        FAILED = "FAILED", _("Failed")
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    file = models.FileField(upload_to="imports/")
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="import_jobs",
+        null=True,
+        blank=True,
+    )
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    failure_reason = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} import #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.COMPLETED, self.Status.FAILED)
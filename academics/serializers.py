@@ -0,0 +1,141 @@
+from rest_framework import serializers
+
+from core.api import FieldSelectionMixin
+
+from .models import AttendanceMonthlySummary, AttendanceRecord, ClassRoom, Exam, ExamResult, StudentProfile
+
+
+class StudentProfileSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    name = serializers.CharField(source="user.get_full_name", read_only=True)
+    classroom_name = serializers.CharField(source="classroom", read_only=True)
+
+    class Meta:
+        model = StudentProfile
+        fields = [
+            "id",
+            "user",
+            "name",
+            "admission_number",
+            "whatsapp_number",
+            "date_of_birth",
+            "classroom",
+            "classroom_name",
+            "father_name",
+            "mother_name",
+            "address",
+            "blood_group",
+            "updated_at",
+        ]
+
+
+class AttendanceRecordSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    admission_number = serializers.CharField(source="student.admission_number", read_only=True)
+
+    class Meta:
+        model = AttendanceRecord
+        fields = [
+            "id",
+            "student",
+            "admission_number",
+            "date",
+            "status",
+            "marked_by",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ["marked_by"]
+
+
+class AttendanceMonthlySummarySerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    admission_number = serializers.CharField(source="student.admission_number", read_only=True)
+    percentage = serializers.FloatField(read_only=True)
+    days = serializers.CharField(source="day_codes", read_only=True)
+
+    class Meta:
+        model = AttendanceMonthlySummary
+        fields = [
+            "id",
+            "student",
+            "admission_number",
+            "classroom",
+            "month",
+            "present",
+            "absent",
+            "leave",
+            "percentage",
+            "days",
+            "updated_at",
+        ]
+
+
+class ExamSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    classroom_name = serializers.CharField(source="classroom", read_only=True)
+    subjects = serializers.PrimaryKeyRelatedField(source="classroom.subjects", many=True, read_only=True)
+
+    class Meta:
+        model = Exam
+        fields = [
+            "id",
+            "name",
+            "academic_year",
+            "classroom",
+            "classroom_name",
+            "date",
+            "subjects",
+            "updated_at",
+        ]
+
+
+class ExamResultSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    subject_code = serializers.CharField(source="subject.code", read_only=True)
+
+    class Meta:
+        model = ExamResult
+        fields = [
+            "id",
+            "exam",
+            "student",
+            "subject",
+            "subject_code",
+            "marks_obtained",
+            "max_marks",
+            "grade",
+            "updated_at",
+        ]
+        read_only_fields = ["max_marks"]
+
+    def validate(self, attrs):
+        exam = attrs.get("exam", getattr(self.instance, "exam", None))
+        student = attrs.get("student", getattr(self.instance, "student", None))
+        subject = attrs.get("subject", getattr(self.instance, "subject", None))
+        if subject.classroom_id != exam.classroom_id:
+            raise serializers.ValidationError({"subject": "Subject does not belong to the exam's class."})
+        if student.classroom_id != exam.classroom_id:
+            raise serializers.ValidationError({"student": "Student is not in the exam's class."})
+        if attrs.get("marks_obtained", 0) > subject.max_marks:
+            raise serializers.ValidationError({"marks_obtained": f"Cannot exceed {subject.max_marks}."})
+        attrs["max_marks"] = subject.max_marks
+        return attrs
+
+
+class RollCallEntrySerializer(serializers.Serializer):
+    student = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=AttendanceRecord.Status.choices)
+
+
+class RollCallSerializer(serializers.Serializer):
+    """A whole class's attendance for one day."""
+
+    classroom = serializers.PrimaryKeyRelatedField(queryset=ClassRoom.objects.all())
+    date = serializers.DateField()
+    records = RollCallEntrySerializer(many=True)
+
+
+class AttendancePeriodSerializer(serializers.Serializer):
+    """Query parameters of the attendance totals endpoint."""
+
+    month_from = serializers.DateField(input_formats=["%Y-%m"], required=False)
+    month_to = serializers.DateField(input_formats=["%Y-%m"], required=False)
+    classroom = serializers.IntegerField(required=False)
+    institution = serializers.IntegerField(required=False)
+    below = serializers.FloatField(required=False, min_value=0, max_value=100)
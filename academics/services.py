@@ -0,0 +1,416 @@
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
+from django.db.models.functions import DenseRank, Rank
+from django.utils import timezone
+
+from core.models import AcademicYear
+from core.services import NotificationService
+
+from .models import AttendanceMonthlySummary, AttendanceRecord, ClassRoom, Exam, ExamResult, ExamStudentSummary, StaffProfile, StudentProfile, Subject
+
+TWO_PLACES = Decimal("0.01")
+
+
+def _percentage(total: Decimal, max_total: Decimal) -> Decimal:
+    if not max_total:
+        return Decimal(0)
+    return total / max_total * 100
+
+
+def _exam_totals(exam_ids: Iterable[int]):
+    """Per (exam, student) totals, restricted to students still in the exam's class."""
+    return (
+        ExamResult.objects.filter(
+            exam_id__in=exam_ids,
+            student__classroom_id=models.F("exam__classroom_id"),
+        )
+        .values("exam_id", "student_id")
+        .annotate(
+            total_marks=models.Sum("marks_obtained"),
+            max_total=models.Sum("max_marks"),
+        )
+        .order_by()
+    )
+
+
+def _rank_in_database(exam_ids: list[int]) -> list[dict[str, Any]]:
+    by_total = models.F("total_marks").desc()
+    return list(
+        _exam_totals(exam_ids).annotate(
+            rank=models.Window(Rank(), partition_by=models.F("exam_id"), order_by=by_total),
+            dense_rank=models.Window(DenseRank(), partition_by=models.F("exam_id"), order_by=by_total),
+        )
+    )
+
+
+def _rank_in_python(exam_ids: list[int]) -> list[dict[str, Any]]:
+    rows = sorted(_exam_totals(exam_ids), key=lambda r: (r["exam_id"], -r["total_marks"]))
+    current_exam = previous_total = None
+    for position, row in enumerate(rows):
+        if row["exam_id"] != current_exam:
+            current_exam, start, dense = row["exam_id"], position, 0
+            previous_total = None
+        if row["total_marks"] != previous_total:
+            rank, dense = position - start + 1, dense + 1
+            previous_total = row["total_marks"]
+        row["rank"], row["dense_rank"] = rank, dense
+    return rows
+
+
+def exam_rank_tables(exams: Iterable[Exam | int]) -> dict[int, dict[int, dict[str, Any]]]:
+    """Totals, percentage and ranks for every student of the given exams.
+
+    Returns ``{exam_id: {student_id: row}}`` where each row holds
+    ``total_marks``, ``max_total``, ``percentage``, ``rank`` (competition
+    ranking, "1224") and ``dense_rank`` ("1223"). The whole computation is a
+    single grouped query regardless of class size or number of exams. On
+    PostgreSQL the ranks come from window functions; elsewhere (SQLite cannot
+    order a window by a Decimal aggregate) they are assigned in Python.
+    """
+    exam_ids = [getattr(exam, "pk", exam) for exam in exams]
+    if not exam_ids:
+        return {}
+
+    if connection.vendor == "postgresql":
+        rows = _rank_in_database(exam_ids)
+    else:
+        rows = _rank_in_python(exam_ids)
+
+    tables: dict[int, dict[int, dict[str, Any]]] = {exam_id: {} for exam_id in exam_ids}
+    for row in rows:
+        row["percentage"] = _percentage(row["total_marks"], row["max_total"])
+        tables[row["exam_id"]][row["student_id"]] = row
+    return tables
+
+
+def exam_rank_table(exam: Exam | int) -> dict[int, dict[str, Any]]:
+    """Rank table for a single exam, keyed by student id."""
+    exam_id = getattr(exam, "pk", exam)
+    return exam_rank_tables([exam_id])[exam_id]
+
+
+def results_by_student(exam: Exam | int, subject: Subject | int) -> dict[int, ExamResult]:
+    """Existing results of one exam subject keyed by student id, in one query.
+
+    (``in_bulk(field_name="student_id")`` is not usable here: ``student`` is
+    only unique together with ``exam`` and ``subject``.)
+    """
+    results = ExamResult.objects.filter(exam=exam, subject=subject)
+    return {result.student_id: result for result in results}
+
+
+def save_subject_marks(exam: Exam, subject: Subject, marks: dict[int, Decimal]) -> int:
+    """Upsert one subject's marks for many students in a single statement.
+
+    ``marks`` maps student id to marks obtained and must already be validated.
+    Rows whose stored marks are unchanged are skipped. Returns the number of
+    rows written.
+    """
+    existing = results_by_student(exam, subject)
+    changed = []
+    for student_id, value in marks.items():
+        current = existing.get(student_id)
+        if current and current.marks_obtained == value and current.max_marks == subject.max_marks:
+            continue
+        changed.append(
+            ExamResult(
+                exam=exam,
+                subject=subject,
+                student_id=student_id,
+                marks_obtained=value,
+                max_marks=subject.max_marks,  # Default to subject's max marks
+                grade="",
+            )
+        )
+    ExamResult.objects.bulk_create(
+        changed,
+        update_conflicts=True,
+        unique_fields=["exam", "student", "subject"],
+        update_fields=["marks_obtained", "max_marks", "grade", "updated_at"],
+    )
+    return len(changed)
+
+
+def refresh_exam_summaries(exam: Exam | int) -> int:
+    """Recompute the ``ExamStudentSummary`` rows of one exam.
+
+    Totals and ranks of every student in the exam can change when any mark
+    changes, so the whole exam is rewritten: one ranking query, one upsert and
+    one delete for students who no longer have results. Call it inside the
+    transaction that saved the marks. Returns the number of summary rows.
+    """
+    exam_id = getattr(exam, "pk", exam)
+    table = exam_rank_table(exam_id)
+    summaries = [
+        ExamStudentSummary(
+            exam_id=exam_id,
+            student_id=student_id,
+            total=row["total_marks"],
+            max_total=row["max_total"],
+            percentage=row["percentage"].quantize(TWO_PLACES),
+            rank=row["rank"],
+        )
+        for student_id, row in table.items()
+    ]
+    ExamStudentSummary.objects.filter(exam_id=exam_id).exclude(student_id__in=table.keys()).delete()
+    ExamStudentSummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=["exam", "student"],
+        update_fields=["total", "max_total", "percentage", "rank"],
+    )
+    return len(summaries)
+
+
+def student_exams_data(student: StudentProfile) -> list[dict[str, Any]]:
+    """Per-exam results, totals and class rank for a student's report card.
+
+    Percentage and rank come from the precomputed ``ExamStudentSummary`` rows.
+    """
+    results = (
+        ExamResult.objects.filter(student=student)
+        .select_related("exam", "subject")
+        .order_by("exam__date", "exam_id", "subject__code")
+    )
+
+    exams_data: dict[int, dict[str, Any]] = {}
+    for res in results:
+        if res.exam_id not in exams_data:
+            exams_data[res.exam_id] = {
+                "exam": res.exam,
+                "results": [],
+                "total_marks": 0,
+                "max_total": 0,
+                "percentage": 0,
+                "rank": "-",
+            }
+        data = exams_data[res.exam_id]
+        data["results"].append(res)
+        data["total_marks"] += res.marks_obtained
+        data["max_total"] += res.max_marks
+
+    summaries = ExamStudentSummary.objects.filter(student=student, exam_id__in=exams_data.keys())
+    for summary in summaries:
+        exams_data[summary.exam_id]["rank"] = summary.rank
+    for data in exams_data.values():
+        data["percentage"] = _percentage(data["total_marks"], data["max_total"])
+    return list(exams_data.values())
+
+
+def attendance_roll(classroom: ClassRoom | int, date: datetime.date) -> models.QuerySet:
+    """Students of a class annotated with their ``status`` on ``date`` (``None`` if unmarked).
+
+    One query: the existing status comes from a correlated subquery on the
+    ``(student, date)`` unique key.
+    """
+    status = AttendanceRecord.objects.filter(student=models.OuterRef("pk"), date=date).values("status")[:1]
+    return (
+        StudentProfile.objects.filter(classroom=classroom)
+        .select_related("user")
+        .annotate(status=models.Subquery(status))
+        .order_by("admission_number")
+    )
+
+
+def save_roll_call(
+    classroom: ClassRoom | int,
+    date: datetime.date,
+    statuses: dict[int, str],
+    marked_by: StaffProfile | None = None,
+) -> tuple[int, list[int]]:
+    """Write a class's attendance for one day with a single upsert.
+
+    ``statuses`` maps student id to an ``AttendanceRecord.Status`` value.
+    Every student must belong to ``classroom``. Rows whose status is
+    unchanged are skipped. Returns ``(rows_written, newly_absent_ids)``.
+    The second item lists students who are now absent and were not absent
+    before, i.e. the ones whose parents should be alerted.
+    """
+    classroom_id = getattr(classroom, "pk", classroom)
+    valid_statuses = set(AttendanceRecord.Status.values)
+    invalid = sorted(str(status) for status in statuses.values() if status not in valid_statuses)
+    if invalid:
+        raise ValidationError(f"Invalid attendance status: {', '.join(invalid)}.")
+    roll = dict(attendance_roll(classroom_id, date).values_list("pk", "status"))
+    outsiders = sorted(set(statuses) - set(roll))
+    if outsiders:
+        raise ValidationError(f"Students not in this class: {', '.join(map(str, outsiders))}.")
+
+    changed = {student_id: status for student_id, status in statuses.items() if roll[student_id] != status}
+    AttendanceRecord.objects.bulk_create(
+        [
+            AttendanceRecord(student_id=student_id, date=date, status=status, marked_by=marked_by)
+            for student_id, status in changed.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["student", "date"],
+        update_fields=["status", "marked_by", "updated_at"],
+    )
+    refresh_attendance_summaries((student_id, date) for student_id in changed)
+    newly_absent = [
+        student_id for student_id, status in changed.items() if status == AttendanceRecord.Status.ABSENT
+    ]
+    return len(changed), newly_absent
+
+
+def send_absence_alerts(student_ids: Iterable[int], date: datetime.date) -> None:
+    """Alert the parents of students who were just marked absent, as one batch.
+
+    Inside a transaction the batch is deferred until commit, so alerts never
+    go out for a roll call that was rolled back.
+    """
+    student_ids = list(student_ids)
+    if student_ids:
+        transaction.on_commit(lambda: NotificationService.send_attendance_alerts(student_ids, date))
+
+
+def month_start(date: datetime.date) -> datetime.date:
+    return date.replace(day=1)
+
+
+def next_month(month: datetime.date) -> datetime.date:
+    return (month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def refresh_attendance_summaries(student_dates: Iterable[tuple[int, datetime.date]]) -> int:
+    """Recompute the monthly rollups touched by attendance writes.
+
+    ``student_dates`` holds ``(student_id, date)`` pairs; each names one
+    student-month to rebuild. The month's records are read with one query
+    (at most ~31 rows per student, through the ``(student, date)`` index),
+    counted and packed into the day bitmap, and written with one upsert, so
+    the rollup stays exact even when writers race. Returns the number of
+    rollup rows written.
+    """
+    students_by_month: dict[datetime.date, set[int]] = defaultdict(set)
+    for student_id, date in student_dates:
+        students_by_month[month_start(date)].add(student_id)
+    if not students_by_month:
+        return 0
+
+    touched = models.Q()
+    for month, student_ids in students_by_month.items():
+        touched |= models.Q(student_id__in=student_ids, date__gte=month, date__lt=next_month(month))
+    rollups: dict[tuple[int, datetime.date], AttendanceMonthlySummary] = {}
+    records = AttendanceRecord.objects.filter(touched).values_list(
+        "student_id", "student__classroom_id", "date", "status",
+    ).order_by()
+    for student_id, classroom_id, date, status in records:
+        key = (student_id, month_start(date))
+        if key not in rollups:
+            rollups[key] = AttendanceMonthlySummary(student_id=student_id, classroom_id=classroom_id, month=key[1])
+        rollups[key].add_day(date.day, status)
+    summaries = list(rollups.values())
+    written = {(summary.student_id, summary.month) for summary in summaries}
+    for month, student_ids in students_by_month.items():
+        emptied = [student_id for student_id in student_ids if (student_id, month) not in written]
+        if emptied:
+            AttendanceMonthlySummary.objects.filter(month=month, student_id__in=emptied).delete()
+    AttendanceMonthlySummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=["student", "month"],
+        update_fields=["classroom", "present", "absent", "leave", "days", "updated_at"],
+    )
+    return len(summaries)
+
+
+def attendance_period(today: datetime.date | None = None) -> tuple[datetime.date, datetime.date]:
+    """Default reporting period: the active academic year, else the current month."""
+    today = today or timezone.localdate()
+    year = AcademicYear.objects.filter(is_active=True).order_by("-start_date").first()
+    if year:
+        return year.start_date, year.end_date
+    return month_start(today), today
+
+
+def attendance_history(student: StudentProfile | int, start: datetime.date, end: datetime.date) -> dict[datetime.date, str]:
+    """Day-by-day ``{date: status}`` between two dates, decoded from the monthly bitmaps.
+
+    Reads one row per month rather than one per school day.
+    """
+    history = {}
+    for summary in student_attendance_months(student, start, end):
+        history.update(
+            (date, status) for date, status in summary.day_statuses().items() if start <= date <= end
+        )
+    return history
+
+
+def _with_percentage(queryset: models.QuerySet) -> models.QuerySet:
+    return queryset.annotate(
+        present_days=models.Sum("present"),
+        absent_days=models.Sum("absent"),
+        leave_days=models.Sum("leave"),
+        total_days=models.Sum(models.F("present") + models.F("absent") + models.F("leave")),
+    ).annotate(
+        percentage=models.ExpressionWrapper(
+            models.F("present_days") * 100.0 / models.F("total_days"),
+            output_field=models.FloatField(),
+        ),
+    )
+
+
+def attendance_by_student(start: datetime.date, end: datetime.date, **filters) -> models.QuerySet:
+    """Per-student attendance totals and percentage between two months, from the rollups.
+
+    ``filters`` narrow the rollup rows, e.g. ``classroom=...`` or
+    ``classroom__institution=...``. Rows are dicts ordered by admission number.
+    """
+    rows = AttendanceMonthlySummary.objects.filter(
+        month__gte=month_start(start), month__lte=month_start(end), **filters,
+    )
+    return _with_percentage(
+        rows.values("student_id", "student__admission_number", "student__user__first_name", "student__user__last_name")
+    ).filter(total_days__gt=0).order_by("student__admission_number")
+
+
+def student_attendance_months(student: StudentProfile | int, start: datetime.date, end: datetime.date) -> list[AttendanceMonthlySummary]:
+    return list(
+        AttendanceMonthlySummary.objects.filter(
+            student=student, month__gte=month_start(start), month__lte=month_start(end),
+        ).order_by("month")
+    )
+
+
+LOW_ATTENDANCE_THRESHOLD = 75
+
+
+def low_attendance(threshold: float, start: datetime.date, end: datetime.date, **filters) -> models.QuerySet:
+    """Students whose attendance percentage over the period is below ``threshold``."""
+    return attendance_by_student(start, end, **filters).filter(percentage__lt=threshold).order_by("percentage")
+
+
+def search_students(
+    queryset: models.QuerySet,
+    q: str = "",
+    institution=None,
+    academic_year=None,
+    classroom=None,
+) -> models.QuerySet:
+    """Narrow a student queryset by search text and class filters.
+
+    Every word of ``q`` must prefix-match the admission number, first name or
+    last name. With ``STUDENT_SEARCH_TRIGRAM`` (PostgreSQL with the pg_trgm
+    indexes from migration 0012) names also match anywhere in the word.
+    """
+    name_lookup = "icontains" if settings.STUDENT_SEARCH_TRIGRAM else "istartswith"
+    for word in q.split():
+        queryset = queryset.filter(
+            models.Q(admission_number__istartswith=word)
+            | models.Q(**{f"user__first_name__{name_lookup}": word})
+            | models.Q(**{f"user__last_name__{name_lookup}": word})
+        )
+    if classroom:
+        queryset = queryset.filter(classroom=classroom)
+    if institution:
+        queryset = queryset.filter(classroom__institution=institution)
+    if academic_year:
+        queryset = queryset.filter(classroom__academic_year=academic_year)
+    return queryset
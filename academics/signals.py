@@ -0,0 +1,61 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import AttendanceRecord, Exam, ExamResult, StudentProfile
+from .services import refresh_attendance_summaries, refresh_exam_summaries
+
+
+def remember_previous_attendance(sender, instance, **kwargs):
+    """Note the student and date an existing record had, in case an edit moves it to another month."""
+    instance._previous_student_date = (
+        AttendanceRecord.objects.filter(pk=instance.pk).values_list("student_id", "date").first()
+        if instance.pk else None
+    )
+
+
+def refresh_attendance_rollup(sender, instance, **kwargs):
+    touched = [(instance.student_id, instance.date)]
+    previous = getattr(instance, "_previous_student_date", None)
+    if previous:
+        touched.append(previous)
+    refresh_attendance_summaries(touched)
+
+
+pre_save.connect(remember_previous_attendance, sender=AttendanceRecord, dispatch_uid="attendance-rollup-pre-save")
+post_save.connect(refresh_attendance_rollup, sender=AttendanceRecord, dispatch_uid="attendance-rollup-save")
+post_delete.connect(refresh_attendance_rollup, sender=AttendanceRecord, dispatch_uid="attendance-rollup-delete")
+
+
+def remember_previous_exam(sender, instance, **kwargs):
+    """Note the exam an existing result belonged to, in case an edit moves it to another exam."""
+    instance._previous_exam_id = (
+        ExamResult.objects.filter(pk=instance.pk).values_list("exam_id", flat=True).first() if instance.pk else None
+    )
+
+
+def refresh_exam_rollup(sender, instance, **kwargs):
+    """Keep totals and ranks current for writes outside the mark entry page (admin, shell)."""
+    for exam_id in {instance.exam_id, getattr(instance, "_previous_exam_id", None)} - {None}:
+        refresh_exam_summaries(exam_id)
+
+
+def remember_previous_classroom(sender, instance, **kwargs):
+    instance._previous_classroom_id = (
+        StudentProfile.objects.filter(pk=instance.pk).values_list("classroom_id", flat=True).first()
+        if instance.pk else None
+    )
+
+
+def rerank_after_class_change(sender, instance, created=False, **kwargs):
+    """Only current members of a class are ranked, so a move re-ranks the exams of both classes."""
+    previous = getattr(instance, "_previous_classroom_id", None)
+    if created or previous is None or previous == instance.classroom_id:
+        return
+    for exam_id in Exam.objects.filter(classroom_id__in=[previous, instance.classroom_id]).values_list("pk", flat=True):
+        refresh_exam_summaries(exam_id)
+
+
+pre_save.connect(remember_previous_exam, sender=ExamResult, dispatch_uid="exam-summary-pre-save")
+post_save.connect(refresh_exam_rollup, sender=ExamResult, dispatch_uid="exam-summary-save")
+post_delete.connect(refresh_exam_rollup, sender=ExamResult, dispatch_uid="exam-summary-delete")
+pre_save.connect(remember_previous_classroom, sender=StudentProfile, dispatch_uid="exam-summary-student-pre-save")
+post_save.connect(rerank_after_class_change, sender=StudentProfile, dispatch_uid="exam-summary-student-save")
@@ -1,3 +1,704 @@
-from django.test import TestCase
+import datetime
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from core.models import AcademicYear, Institution
+from core.testing import QueryCountMixin
+
+import openpyxl
+
+from . import importers, services
+from .models import AttendanceMonthlySummary, AttendanceRecord, ClassRoom, Exam, ExamResult, ExamStudentSummary, ImportJob, ParentProfile, StaffProfile, StudentProfile, Subject
+
+
+def make_classroom(standard="10", division="A"):
+    year, _ = AcademicYear.objects.get_or_create(
+        name="2025-26",
+        defaults={"start_date": datetime.date(2025, 6, 1), "end_date": datetime.date(2026, 3, 31), "is_active": True},
+    )
+    institution, _ = Institution.objects.get_or_create(code="AMA", defaults={"name": "Adabiyya Modern Academy"})
+    return ClassRoom.objects.create(institution=institution, academic_year=year, standard=standard, division=division)
+
+
+def make_student(classroom, n):
+    user = User.objects.create_user(
+        username=f"{classroom.pk}-student{n}", first_name=f"Student{n}", role=User.Roles.STUDENT,
+    )
+    return StudentProfile.objects.create(
+        user=user,
+        admission_number=f"ADM{classroom.pk}-{n:04d}",
+        date_of_birth=datetime.date(2010, 1, 1),
+        classroom=classroom,
+    )
+
+
+def make_exam_with_results(classroom, class_size, subjects=3, exams=1):
+    subject_objs = [
+        Subject.objects.create(classroom=classroom, name=f"Subject {i}", code=f"S{i}") for i in range(subjects)
+    ]
+    students = [make_student(classroom, n) for n in range(class_size)]
+    exam_objs = []
+    for e in range(exams):
+        exam = Exam.objects.create(
+            name=f"Term {e}", academic_year=classroom.academic_year, classroom=classroom,
+            date=datetime.date(2025, 9, 1) + datetime.timedelta(days=30 * e),
+        )
+        ExamResult.objects.bulk_create(
+            ExamResult(
+                exam=exam, student=student, subject=subject,
+                marks_obtained=Decimal((n * 7 + s) % 100), max_marks=Decimal(100),
+            )
+            for n, student in enumerate(students)
+            for s, subject in enumerate(subject_objs)
+        )
+        services.refresh_exam_summaries(exam)
+        exam_objs.append(exam)
+    return exam_objs, students
+
+
+class ExamRankTableTests(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom()
+        self.exam = Exam.objects.create(
+            name="Midterm", academic_year=self.classroom.academic_year,
+            classroom=self.classroom, date=datetime.date(2025, 10, 1),
+        )
+        self.subject = Subject.objects.create(classroom=self.classroom, name="Maths", code="MAT")
+        self.students = [make_student(self.classroom, n) for n in range(4)]
+        for student, marks in zip(self.students, [90, 75, 90, 60]):
+            ExamResult.objects.create(
+                exam=self.exam, student=student, subject=self.subject,
+                marks_obtained=marks, max_marks=100,
+            )
+
+    def assert_ranks(self, table):
+        a, b, c, d = self.students
+        self.assertEqual(table[a.pk]["rank"], 1)
+        self.assertEqual(table[c.pk]["rank"], 1)
+        self.assertEqual(table[b.pk]["rank"], 3)
+        self.assertEqual(table[b.pk]["dense_rank"], 2)
+        self.assertEqual(table[d.pk]["rank"], 4)
+        self.assertEqual(table[d.pk]["dense_rank"], 3)
+        self.assertEqual(table[b.pk]["percentage"], Decimal(75))
+
+    def test_competition_and_dense_ranks(self):
+        self.assert_ranks(services.exam_rank_table(self.exam))
+
+    def test_database_and_python_ranking_agree(self):
+        with mock.patch.object(services, "_rank_in_python", wraps=services._rank_in_python) as fallback:
+            self.assert_ranks(services.exam_rank_table(self.exam))
+        self.assertEqual(fallback.called, connection.vendor != "postgresql")
+
+    def test_students_who_left_the_class_are_not_ranked(self):
+        other = make_classroom(division="B")
+        moved = self.students[0]
+        moved.classroom = other
+        moved.save()
+        table = services.exam_rank_table(self.exam)
+        self.assertNotIn(moved.pk, table)
+        self.assertEqual(table[self.students[2].pk]["rank"], 1)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class ExamStudentSummaryTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", password="pw", role=User.Roles.ADMIN)
+        self.client.force_login(self.admin)
+        self.classroom = make_classroom()
+        self.exam = Exam.objects.create(
+            name="Midterm", academic_year=self.classroom.academic_year,
+            classroom=self.classroom, date=datetime.date(2025, 10, 1),
+        )
+        self.subject = Subject.objects.create(classroom=self.classroom, name="Maths", code="MAT", max_marks=50)
+        self.students = [make_student(self.classroom, n) for n in range(3)]
+
+    def post_marks(self, marks):
+        data = {"form-TOTAL_FORMS": len(marks), "form-INITIAL_FORMS": len(marks)}
+        for i, (student, mark) in enumerate(zip(self.students, marks)):
+            data[f"form-{i}-student_id"] = student.pk
+            data[f"form-{i}-marks_obtained"] = "" if mark is None else mark
+        url = reverse("academics:exam_result_entry", args=[self.exam.pk, self.subject.pk])
+        return self.client.post(url, data)
+
+    def test_mark_entry_updates_summaries(self):
+        self.post_marks([30, 45, None])
+        summaries = {s.student_id: s for s in ExamStudentSummary.objects.filter(exam=self.exam)}
+        self.assertEqual(set(summaries), {self.students[0].pk, self.students[1].pk})
+        self.assertEqual(summaries[self.students[1].pk].rank, 1)
+        self.assertEqual(summaries[self.students[0].pk].percentage, Decimal("60.00"))
+
+        self.post_marks([50, 45, 10])
+        summaries = {s.student_id: s for s in ExamStudentSummary.objects.filter(exam=self.exam)}
+        self.assertEqual(summaries[self.students[0].pk].rank, 1)
+        self.assertEqual(summaries[self.students[2].pk].rank, 3)
+
+    def test_class_result_lists_students_without_marks(self):
+        self.post_marks([30, 45, None])
+        response = self.client.get(reverse("academics:class_exam_result", args=[self.exam.pk]))
+        rows = [(item.student_id, item.rank) for item in response.context["student_results"]]
+        self.assertEqual(rows, [(self.students[1].pk, 1), (self.students[0].pk, 2), (self.students[2].pk, None)])
+        self.assertEqual(len(response.context["toppers"]), 2)
+        self.assertContains(response, "No marks entered")
+
+    def test_mark_entry_rejects_marks_above_maximum(self):
+        response = self.post_marks([30, 51, None])
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ExamResult.objects.exists())
+
+    def test_mark_entry_query_count_is_constant_in_class_size(self):
+        def count(marks):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.post_marks(marks).status_code, 302)
+            return len(ctx.captured_queries)
+
+        few = count([10, 20])
+        self.students += [make_student(self.classroom, n) for n in range(3, 40)]
+        many = count([n % 50 for n in range(40)])
+        self.assertEqual(few, many)
+
+    def test_entry_page_prefills_existing_marks(self):
+        self.post_marks([30, 45, None])
+        url = reverse("academics:exam_result_entry", args=[self.exam.pk, self.subject.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        initial = [form.initial["marks_obtained"] for form in response.context["formset"]]
+        self.assertEqual(initial, [Decimal(30), Decimal(45), None])
+
+    def test_admin_edit_updates_ranks(self):
+        self.post_marks([30, 45, 10])
+        result = ExamResult.objects.get(student=self.students[2])
+        self.client.force_login(User.objects.create_superuser(username="root", password="pw", email="root@example.com"))
+        response = self.client.post(reverse("admin:academics_examresult_change", args=[result.pk]), {
+            "exam": self.exam.pk, "student": self.students[2].pk, "subject": self.subject.pk,
+            "marks_obtained": "50", "max_marks": "50", "grade": "",
+        })
+        self.assertEqual(response.status_code, 302)
+        ranks = dict(ExamStudentSummary.objects.values_list("student_id", "rank"))
+        self.assertEqual(ranks[self.students[2].pk], 1)
+
+        self.client.post(reverse("admin:academics_examresult_delete", args=[result.pk]), {"post": "yes"})
+        self.assertNotIn(self.students[2].pk, dict(ExamStudentSummary.objects.values_list("student_id", "rank")))
+
+    def test_student_moving_class_is_reranked(self):
+        self.post_marks([30, 45, 10])
+        moved = self.students[1]
+        moved.classroom = make_classroom(division="B")
+        moved.save()
+        ranks = dict(ExamStudentSummary.objects.values_list("student_id", "rank"))
+        self.assertEqual(ranks, {self.students[0].pk: 1, self.students[2].pk: 2})
+
+    def test_rebuild_command(self):
+        for student, marks in zip(self.students, [10, 20, 30]):
+            ExamResult.objects.create(
+                exam=self.exam, student=student, subject=self.subject, marks_obtained=marks, max_marks=50,
+            )
+        call_command("rebuild_exam_summaries", stdout=StringIO())
+        ranks = dict(ExamStudentSummary.objects.values_list("student_id", "rank"))
+        self.assertEqual(ranks, {self.students[2].pk: 1, self.students[1].pk: 2, self.students[0].pk: 3})
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class ProgressReportQueryCountTests(TestCase):
+    """Benchmark: report cost must not grow with class size or exam count."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", password="pw", role=User.Roles.ADMIN)
+        self.client.force_login(self.admin)
+
+    def count_queries(self, class_size, exams):
+        classroom = make_classroom(division=f"{class_size}-{exams}")
+        _, students = make_exam_with_results(classroom, class_size, exams=exams)
+        url = reverse("academics:progress_report", args=[students[0].pk])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_constant_in_class_size(self):
+        small = self.count_queries(class_size=5, exams=2)
+        large = self.count_queries(class_size=60, exams=6)
+        self.assertEqual(small, large)
+
+    def test_rank_table_is_a_single_query(self):
+        classroom = make_classroom(division="X")
+        exams, _ = make_exam_with_results(classroom, class_size=40, exams=3)
+        with self.assertNumQueries(1):
+            tables = services.exam_rank_tables(exams)
+        self.assertEqual(sum(len(t) for t in tables.values()), 120)
+
+
+def make_workbook(rows):
+    wb = openpyxl.Workbook()
+    wb.active.append(["First Name", "Last Name", "Email", "DOB", "Admin No"])
+    for row in rows:
+        wb.active.append(row)
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+class StudentImportTests(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom(standard="10", division="A")
+        make_student(self.classroom, 1)
+
+    def student_row(self, n, **overrides):
+        row = {
+            "first": f"Imported{n}", "last": "Student", "email": f"imported{n}@example.com",
+            "dob": datetime.date(2011, 1, 1), "adm": f"NEW{n:05d}", "whatsapp": "9876543210",
+            "class": "10-A", "father": "", "mother": "", "address": "", "blood": "O+",
+        }
+        row.update(overrides)
+        return list(row.values())
+
+    def test_import_validates_rows_in_memory(self):
+        rows = [
+            self.student_row(1),
+            self.student_row(2, adm=f"ADM{self.classroom.pk}-0001"),
+            self.student_row(3, email="imported1@example.com"),
+            self.student_row(4, **{"class": "12-Z"}),
+            self.student_row(5, dob="not a date"),
+            self.student_row(6, email=None),
+            self.student_row(7, **{"class": "10"}, dob="2011-02-03"),
+        ]
+        created, errors = importers.import_students(make_workbook(rows))
+        self.assertEqual(created, 2)
+        self.assertEqual([e.split(":")[0] for e in errors], ["Row 3", "Row 4", "Row 5", "Row 6"])
+        student = StudentProfile.objects.get(admission_number="NEW00007")
+        self.assertEqual(student.date_of_birth, datetime.date(2011, 2, 3))
+        self.assertEqual(student.classroom, self.classroom)
+        self.assertTrue(student.user.check_password(importers.DEFAULT_STUDENT_PASSWORD))
+
+    def test_import_query_count_is_bounded_by_chunks(self):
+        def count(n, chunk_size):
+            workbook = make_workbook([self.student_row(i, adm=f"N{n}-{i}", email=f"{n}-{i}@example.com") for i in range(n)])
+            with CaptureQueriesContext(connection) as ctx:
+                created, errors = importers.import_students(workbook, chunk_size=chunk_size)
+            self.assertEqual((created, errors), (n, []))
+            return len(ctx.captured_queries)
+
+        # SQLite may split a large INSERT into a few parameter-limited batches.
+        self.assertLessEqual(count(100, chunk_size=100), count(10, chunk_size=100) + 2)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class ImportJobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.admin = User.objects.create_user(username="admin", password="pw", role=User.Roles.ADMIN)
+        self.client.force_login(self.admin)
+        make_classroom(standard="10", division="A")
+
+    def upload(self, url_name, rows):
+        upload = SimpleUploadedFile("import.xlsx", make_workbook(rows).read())
+        return self.client.post(reverse(url_name), {"excel_file": upload})
+
+    def test_student_import_is_queued_and_run_by_worker(self):
+        rows = [
+            ["Amina", "K", "amina@example.com", datetime.date(2011, 1, 1), "NEW1", "", "10-A"],
+            ["Basil", "M", "amina@example.com", datetime.date(2011, 1, 1), "NEW2", "", "10-A"],
+        ]
+        response = self.upload("academics:student_import", rows)
+        job = ImportJob.objects.get()
+        self.assertRedirects(response, reverse("academics:import_job_detail", args=[job.pk]))
+        self.assertEqual(job.status, ImportJob.Status.PENDING)
+        self.assertFalse(StudentProfile.objects.exists())
+        self.assertContains(self.client.get(response.url), "Import Progress")
+
+        call_command("run_import_jobs", once=True, stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.COMPLETED)
+        self.assertEqual((job.total_rows, job.processed_rows, job.created_count), (2, 2, 1))
+        self.assertEqual(len(job.errors), 1)
+
+        progress = self.client.get(reverse("academics:import_job_progress", args=[job.pk]), {"since": 1}).json()
+        self.assertTrue(progress["finished"])
+        self.assertEqual((progress["error_count"], progress["errors"]), (1, []))
+
+    def test_staff_import_skips_header_row(self):
+        rows = [["Jane", "Smith", "jane@example.com", "9876543210", "Calicut", "Science", "Teacher", "M.Sc"]]
+        self.upload("academics:staff_import", rows)
+        call_command("run_import_jobs", once=True, stdout=StringIO())
+        self.assertEqual(list(StaffProfile.objects.values_list("user__email", flat=True)), ["jane@example.com"])
+
+    def test_unreadable_file_fails_the_job(self):
+        upload = SimpleUploadedFile("import.xlsx", b"not a workbook")
+        self.client.post(reverse("academics:student_import"), {"excel_file": upload})
+        call_command("run_import_jobs", once=True, stdout=StringIO())
+        job = ImportJob.objects.get()
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertTrue(job.failure_reason)
+
+    def test_job_is_claimed_only_once(self):
+        self.upload("academics:student_import", [])
+        self.assertIsNotNone(importers.claim_next_job())
+        self.assertIsNone(importers.claim_next_job())
+
+    @override_settings(IMPORT_JOB_TIMEOUT=60)
+    def test_job_abandoned_by_crashed_worker_is_failed(self):
+        self.upload("academics:student_import", [])
+        importers.claim_next_job()  # The worker dies mid-import.
+        ImportJob.objects.update(started_at=timezone.now() - datetime.timedelta(minutes=5))
+
+        call_command("run_import_jobs", once=True, stdout=StringIO())
+        job = ImportJob.objects.get()
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertIn("stopped before finishing", job.failure_reason)
+        self.assertIsNotNone(job.finished_at)
+
+
+class AcademicsAPITests(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom()
+        (self.exam,), self.students = make_exam_with_results(self.classroom, class_size=5, subjects=2)
+        self.admin = User.objects.create_user(username="admin", password="pw", role=User.Roles.ADMIN)
+        self.client.force_login(self.admin)
+
+    def test_students_are_cursor_paginated_in_constant_queries(self):
+        url = reverse("student-list")
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(url, {"page_size": 2})
+        self.assertEqual(len(response.json()["results"]), 2)
+        second = self.client.get(response.json()["next"]).json()
+        self.assertEqual(len(second["results"]), 2)
+        self.assertFalse({s["id"] for s in second["results"]} & {s["id"] for s in response.json()["results"]})
+
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(url, {"page_size": 5})
+        self.assertEqual(len(large), len(small))
+
+    def test_malformed_filter_is_a_bad_request(self):
+        response = self.client.get(reverse("student-list"), {"classroom": "abc"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("classroom", response.json())
+        response = self.client.get(reverse("attendance-list"), {"date_from": "not-a-date"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_field_selection(self):
+        response = self.client.get(reverse("exam-result-list"), {"fields": "id,marks_obtained"})
+        self.assertEqual(set(response.json()["results"][0]), {"id", "marks_obtained"})
+
+    def test_etag_returns_not_modified_until_data_changes(self):
+        url = reverse("exam-result-list") + f"?exam={self.exam.pk}"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        result = ExamResult.objects.filter(exam=self.exam).first()
+        response = self.client.patch(
+            reverse("exam-result-detail", args=[result.pk]), {"marks_obtained": "99.00"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_writing_a_result_refreshes_the_rank_summary(self):
+        result = ExamResult.objects.filter(exam=self.exam).order_by("marks_obtained").first()
+        self.client.patch(
+            reverse("exam-result-detail", args=[result.pk]), {"marks_obtained": "100.00"},
+            content_type="application/json",
+        )
+        summary = ExamStudentSummary.objects.get(exam=self.exam, student_id=result.student_id)
+        self.assertEqual(summary.rank, 1)
+
+    def test_marks_above_maximum_are_rejected(self):
+        result = ExamResult.objects.filter(exam=self.exam).first()
+        response = self.client.patch(
+            reverse("exam-result-detail", args=[result.pk]), {"marks_obtained": "150"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_students_cannot_use_the_api(self):
+        self.client.force_login(self.students[0].user)
+        self.assertEqual(self.client.get(reverse("attendance-list")).status_code, 403)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class RollCallTests(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom()
+        self.students = [make_student(self.classroom, n) for n in range(4)]
+        self.date = datetime.date(2025, 11, 3)
+        self.admin = User.objects.create_user(username="admin", password="pw", role=User.Roles.ADMIN)
+        self.client.force_login(self.admin)
+
+    def test_roll_is_prefilled_with_one_query(self):
+        AttendanceRecord.objects.create(student=self.students[1], date=self.date, status=AttendanceRecord.Status.LEAVE)
+        with self.assertNumQueries(1):
+            roll = {s.pk: s.status for s in services.attendance_roll(self.classroom, self.date)}
+        self.assertEqual(roll[self.students[1].pk], AttendanceRecord.Status.LEAVE)
+        self.assertIsNone(roll[self.students[0].pk])
+
+    def test_save_roll_call_upserts_and_reports_new_absentees(self):
+        AttendanceRecord.objects.create(student=self.students[0], date=self.date, status=AttendanceRecord.Status.ABSENT)
+        statuses = {s.pk: AttendanceRecord.Status.PRESENT for s in self.students}
+        statuses[self.students[0].pk] = AttendanceRecord.Status.ABSENT
+        statuses[self.students[2].pk] = AttendanceRecord.Status.ABSENT
+
+        with CaptureQueriesContext(connection) as ctx:
+            written, newly_absent = services.save_roll_call(self.classroom, self.date, statuses)
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "academics_attendancerecord"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(written, 3)  # students[0] was already absent
+        self.assertEqual(newly_absent, [self.students[2].pk])
+
+        statuses[self.students[2].pk] = AttendanceRecord.Status.PRESENT
+        services.save_roll_call(self.classroom, self.date, statuses)
+        self.assertEqual(AttendanceRecord.objects.filter(date=self.date).count(), 4)
+        self.assertEqual(AttendanceRecord.objects.get(student=self.students[2]).status, AttendanceRecord.Status.PRESENT)
+
+    def test_students_from_other_classes_are_rejected(self):
+        other = make_student(make_classroom("9", "B"), 1)
+        with self.assertRaises(ValidationError):
+            services.save_roll_call(self.classroom, self.date, {other.pk: AttendanceRecord.Status.PRESENT})
+
+    def test_roll_call_page(self):
+        url = reverse("academics:attendance_roll_call", args=[self.classroom.pk])
+        response = self.client.get(url, {"date": self.date.isoformat()})
+        self.assertEqual(len(response.context["formset"].forms), 4)
+
+        data = {
+            "date": self.date.isoformat(),
+            "form-TOTAL_FORMS": "4", "form-INITIAL_FORMS": "4",
+            "form-MIN_NUM_FORMS": "0", "form-MAX_NUM_FORMS": "1000",
+        }
+        for i, student in enumerate(self.students):
+            data[f"form-{i}-student_id"] = student.pk
+            data[f"form-{i}-status"] = "A" if i == 3 else "P"
+        with mock.patch("core.services.NotificationService.send_attendance_alerts") as alert:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        alert.assert_called_once_with([self.students[3].pk], self.date)
+        self.assertEqual(AttendanceRecord.objects.filter(date=self.date, status="P").count(), 3)
+
+        data["form-0-status"] = "X"
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        forms = response.context["formset"].forms
+        self.assertEqual(forms[0].initial["admission_number"], self.students[0].admission_number)
+        self.assertTrue(all(form.initial["marked"] for form in forms))
+        self.assertContains(response, self.students[1].admission_number)
+        self.assertNotContains(response, "Not marked")
+
+    def test_roll_call_api(self):
+        url = reverse("attendance-roll-call")
+        payload = {
+            "classroom": self.classroom.pk,
+            "date": self.date.isoformat(),
+            "records": [{"student": s.pk, "status": "P"} for s in self.students],
+        }
+        response = self.client.post(url, payload, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({r["status"] for r in response.json()["records"]}, {"P"})
+
+        response = self.client.get(url, {"classroom": self.classroom.pk, "date": self.date.isoformat()})
+        self.assertEqual(len(response.json()["records"]), 4)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class AttendanceSummaryTests(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom()
+        self.students = [make_student(self.classroom, n) for n in range(3)]
+        self.admin = User.objects.create_user(username="admin", password="pw", role=User.Roles.ADMIN)
+        self.client.force_login(self.admin)
+        # Student 0 present every day, student 1 absent on 3 of 4 days, student 2 unmarked.
+        for day in range(1, 5):
+            date = datetime.date(2025, 11, day)
+            statuses = {self.students[0].pk: "P", self.students[1].pk: "A" if day > 1 else "P"}
+            services.save_roll_call(self.classroom, date, statuses)
+
+    def test_roll_call_keeps_rollup_current(self):
+        summary = AttendanceMonthlySummary.objects.get(student=self.students[1])
+        self.assertEqual((summary.month, summary.present, summary.absent), (datetime.date(2025, 11, 1), 1, 3))
+        self.assertFalse(AttendanceMonthlySummary.objects.filter(student=self.students[2]).exists())
+
+        services.save_roll_call(self.classroom, datetime.date(2025, 11, 4), {self.students[1].pk: "L"})
+        summary.refresh_from_db()
+        self.assertEqual((summary.present, summary.absent, summary.leave), (1, 2, 1))
+
+    def test_daily_statuses_are_packed_two_bits_per_day(self):
+        summary = AttendanceMonthlySummary.objects.get(student=self.students[1])
+        self.assertEqual(summary.days, 0b10_10_10_01)
+        self.assertEqual(summary.day_codes, "PAAA" + "-" * 26)
+
+        AttendanceRecord.objects.create(student=self.students[1], date=datetime.date(2025, 11, 30), status="L")
+        summary.refresh_from_db()
+        self.assertEqual(summary.day_status(30), "L")
+        self.assertEqual(summary.day_status(29), None)
+
+    def test_history_reads_one_row_per_month(self):
+        for month in range(1, 4):
+            AttendanceRecord.objects.create(student=self.students[0], date=datetime.date(2026, month, 15), status="A")
+        with self.assertNumQueries(1):
+            history = services.attendance_history(self.students[0], datetime.date(2025, 11, 2), datetime.date(2026, 3, 31))
+        self.assertEqual(len(history), 6)
+        self.assertEqual(history[datetime.date(2026, 2, 15)], "A")
+        self.assertEqual(history[datetime.date(2025, 11, 2)], "P")
+        self.assertNotIn(datetime.date(2025, 11, 1), history)
+
+    def test_single_record_edits_move_counts_between_months(self):
+        record = AttendanceRecord.objects.get(student=self.students[0], date=datetime.date(2025, 11, 4))
+        record.date = datetime.date(2025, 12, 1)
+        record.save()
+        months = dict(AttendanceMonthlySummary.objects.filter(student=self.students[0]).values_list("month", "present"))
+        self.assertEqual(months, {datetime.date(2025, 11, 1): 3, datetime.date(2025, 12, 1): 1})
+
+        record.delete()
+        self.assertFalse(AttendanceMonthlySummary.objects.filter(month=datetime.date(2025, 12, 1)).exists())
+
+    def test_rebuild_command_matches_incremental_rollup(self):
+        expected = set(AttendanceMonthlySummary.objects.values_list("student_id", "month", "present", "absent", "leave"))
+        AttendanceMonthlySummary.objects.all().delete()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("rebuild_attendance_summaries", stdout=StringIO())
+        distinct = [query["sql"] for query in ctx.captured_queries if query["sql"].startswith('SELECT DISTINCT "academics_attendancerecord"."student_id"')]
+        self.assertTrue(distinct)
+        self.assertFalse(any("ORDER BY" in sql for sql in distinct))  # One row per student, not per (student, date).
+        rebuilt = set(AttendanceMonthlySummary.objects.values_list("student_id", "month", "present", "absent", "leave"))
+        self.assertEqual(rebuilt, expected)
+
+    def test_low_attendance_report(self):
+        start, end = datetime.date(2025, 6, 1), datetime.date(2026, 3, 31)
+        with self.assertNumQueries(1):
+            rows = list(services.low_attendance(75, start, end, classroom=self.classroom))
+        self.assertEqual([row["student_id"] for row in rows], [self.students[1].pk])
+        self.assertEqual(rows[0]["percentage"], 25.0)
+
+        response = self.client.get(reverse("academics:low_attendance_report"), {"threshold": "75"})
+        self.assertEqual([row["student_id"] for row in response.context["rows"]], [self.students[1].pk])
+
+    def test_summary_views(self):
+        response = self.client.get(reverse("academics:attendance_class_summary", args=[self.classroom.pk]))
+        self.assertEqual(len(response.context["rows"]), 2)
+        response = self.client.get(reverse("academics:attendance_student_summary", args=[self.students[0].pk]))
+        self.assertEqual(response.context["percentage"], 100.0)
+
+    def test_students_only_see_their_own_summary(self):
+        self.client.force_login(self.students[0].user)
+        url = "academics:attendance_student_summary"
+        self.assertEqual(self.client.get(reverse(url, args=[self.students[0].pk])).status_code, 200)
+        self.assertEqual(self.client.get(reverse(url, args=[self.students[1].pk])).status_code, 404)
+
+    def test_parent_dashboard_shows_children_attendance(self):
+        parent = User.objects.create_user(username="parent", role=User.Roles.PARENT)
+        ParentProfile.objects.create(user=parent).students.add(self.students[1])
+        self.client.force_login(parent)
+        response = self.client.get(reverse("core:parent_dashboard"))
+        (child,) = response.context["children"]
+        self.assertEqual(child.attendance_percentage, 25.0)
+
+    def test_totals_api(self):
+        response = self.client.get(reverse("attendance-summary-totals"), {"month_from": "2025-11", "below": "50"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["student"] for row in response.json()["students"]], [self.students[1].pk])
+        response = self.client.get(reverse("attendance-summary-list"), {"student": self.students[1].pk})
+        self.assertEqual(response.json()["results"][0]["days"][:5], "PAAA-")
+        response = self.client.get(reverse("attendance-summary-list"), {"month_from": "2025-12"})
+        self.assertEqual(response.json()["results"], [])
+        self.assertEqual(self.client.get(reverse("attendance-summary-list"), {"month_from": "nope"}).status_code, 400)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class StudentSearchTests(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom()
+        self.other = make_classroom("9", "B")
+        self.students = [make_student(self.classroom, n) for n in range(25)]
+        self.others = [make_student(self.other, n) for n in range(3)]
+        self.admin = User.objects.create_user(username="admin", password="pw", role=User.Roles.ADMIN)
+        self.client.force_login(self.admin)
+        self.url = reverse("academics:student_list")
+
+    def test_search_by_admission_prefix_name_and_class(self):
+        queryset = StudentProfile.objects.all()
+        self.assertEqual(
+            set(services.search_students(queryset, q=f"adm{self.other.pk}-")), set(self.others),
+        )
+        self.assertEqual(list(services.search_students(queryset, q="student12")), [self.students[12]])
+        self.assertEqual(len(services.search_students(queryset, classroom=self.other)), 3)
+        self.assertEqual(len(services.search_students(queryset, q="student1", classroom=self.other)), 1)
+
+    def test_keyset_pages_walk_forward_and_back(self):
+        response = self.client.get(self.url, {"classroom": self.classroom.pk})
+        first = [s.pk for s in response.context["students"]]
+        self.assertEqual(len(first), 20)
+        page = response.context["page"]
+        self.assertTrue(page["has_next"])
+        self.assertFalse(page["has_previous"])
+
+        with CaptureQueriesContext(connection) as deep:
+            response = self.client.get(self.url, {"classroom": self.classroom.pk, "after": page["next_key"]})
+        second = response.context["page"]
+        self.assertEqual([s.pk for s in second["object_list"]], [s.pk for s in self.students[20:]])
+        self.assertFalse(second["has_next"])
+        self.assertFalse(any("COUNT(" in q["sql"] for q in deep.captured_queries))
+
+        response = self.client.get(self.url, {"classroom": self.classroom.pk, "before": second["previous_key"]})
+        self.assertEqual([s.pk for s in response.context["students"]], first)
+
+    def test_filter_bar_keeps_selection(self):
+        response = self.client.get(self.url, {"q": "student", "classroom": self.other.pk})
+        self.assertContains(response, f'<option value="{self.other.pk}" selected>')
+        self.assertEqual(len(response.context["students"]), 3)
+
+    def test_api_search(self):
+        response = self.client.get(reverse("student-list"), {"q": "student2"})
+        names = {row["admission_number"] for row in response.json()["results"]}
+        self.assertIn(self.students[2].admission_number, names)
+        self.assertIn(self.students[20].admission_number, names)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class PageQueryCountTests(QueryCountMixin, TestCase):
+    """Pages listing exams and subjects must not run a query per row."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", password="pw", role=User.Roles.ADMIN)
+        self.client.force_login(self.admin)
+        self.classroom = make_classroom()
+        make_exam_with_results(self.classroom, class_size=2, subjects=2, exams=2)
+
+    def grow(self):
+        classroom = make_classroom(division=f"G{ClassRoom.objects.count()}")
+        make_exam_with_results(classroom, class_size=3, subjects=4, exams=3)
+        more = Exam.objects.create(
+            name="Extra", academic_year=self.classroom.academic_year, classroom=self.classroom,
+            date=datetime.date(2026, 2, 1),
+        )
+        Subject.objects.create(classroom=self.classroom, name="Extra", code=f"X{more.pk}")
+        make_student(self.classroom, 99)
+
+    def test_exam_list(self):
+        self.assertQueriesDoNotScale(reverse("academics:exam_list"), self.grow)
+
+    def test_exam_list_shares_subjects_per_class(self):
+        response, _ = self.get_and_count(reverse("academics:exam_list"))
+        first, second = [exam for exam in response.context["exams"] if exam.classroom_id == self.classroom.pk]
+        self.assertIs(first.classroom.subjects.all()[0], second.classroom.subjects.all()[0])
+
+    def test_classroom_detail(self):
+        self.assertQueriesDoNotScale(reverse("academics:classroom_detail", args=[self.classroom.pk]), self.grow)
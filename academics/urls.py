@@ -30,8 +30,16 @@ urlpatterns = [
     path("staff/import/template/", views.DownloadStaffImportTemplateView.as_view(), name="staff_import_template"),
     path("staff/<int:pk>/edit/", views.StaffUpdateView.as_view(), name="staff_update"),
 
+    # Import jobs
+    path("imports/<int:pk>/", views.ImportJobDetailView.as_view(), name="import_job_detail"),
+    path("imports/<int:pk>/progress/", views.ImportJobProgressView.as_view(), name="import_job_progress"),
+
     # Attendance
     path("attendance/add/", views.AttendanceCreateView.as_view(), name="attendance_create"),
+    path("attendance/roll-call/<int:classroom_id>/", views.AttendanceRollCallView.as_view(), name="attendance_roll_call"),
+    path("attendance/summary/class/<int:pk>/", views.ClassAttendanceSummaryView.as_view(), name="attendance_class_summary"),
+    path("attendance/summary/student/<int:pk>/", views.StudentAttendanceSummaryView.as_view(), name="attendance_student_summary"),
+    path("attendance/low/", views.LowAttendanceReportView.as_view(), name="low_attendance_report"),
 
     # Reports
     path("progress-report/<int:pk>/", views.ProgressReportView.as_view(), name="progress_report"),
@@ -1,23 +1,33 @@
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, View
-from django.http import HttpResponse
+import datetime
+from itertools import groupby
+from operator import attrgetter
+
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, View, TemplateView
+from django.http import HttpResponse, JsonResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.core.exceptions import ValidationError
 from django.db.models import Count
 from django.utils.translation import gettext_lazy as _
-from django.shortcuts import render, redirect
-from django.db import models
+from django.shortcuts import get_object_or_404, render, redirect
 
 from accounts.models import User
 from core.views import RoleRequiredMixin
-from core.services import NotificationService
-from core.utils import render_to_pdf
-from .models import ClassRoom, StudentProfile, StaffProfile, AttendanceRecord, ExamResult, Subject, Exam
+from core.pagination import keyset_page
+from core.pdf import chunked, pdf_bundle_response, pdf_response
+from .models import ClassRoom, StudentProfile, StaffProfile, AttendanceRecord, ExamStudentSummary, Subject, Exam, ImportJob
+from .services import (
+    LOW_ATTENDANCE_THRESHOLD, attendance_by_student, attendance_period, attendance_roll, low_attendance,
+    refresh_exam_summaries, results_by_student, save_roll_call, save_subject_marks, search_students,
+    send_absence_alerts, student_attendance_months, student_exams_data,
+)
 from django.contrib import messages
 from django.views.generic import FormView
 from .forms import (
     ClassRoomForm, StudentProfileForm, StaffCreationForm, StudentCreationForm, 
     StudentUpdateForm, StudentBulkImportForm, StaffUpdateForm, StaffBulkImportForm,
-    SubjectForm, ExamForm, BulkExamResultForm
+    SubjectForm, ExamForm, BulkExamResultForm, RollCallEntryForm, StudentSearchForm
 )
 from django.forms import formset_factory
 from django.db import transaction
@@ -25,6 +35,9 @@ import openpyxl
 from django.contrib import messages
 from django.views.generic import FormView
 
+# Cards per render job; each chunk is rendered (and cached) independently.
+ID_CARD_CHUNK_SIZE = 100
+
 # --- Class Room Views ---
 class ClassRoomListView(RoleRequiredMixin, ListView):
     model = ClassRoom
@@ -33,18 +46,20 @@ class ClassRoomListView(RoleRequiredMixin, ListView):
     allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
 
     def get_queryset(self):
-        return ClassRoom.objects.select_related('academic_year').annotate(student_count=Count('students'))
+        return ClassRoom.objects.select_related('academic_year', 'institution').annotate(student_count=Count('students'))
 
 class ClassRoomDetailView(RoleRequiredMixin, DetailView):
     model = ClassRoom
     template_name = "academics/classroom_detail.html"
     context_object_name = 'classroom'
     allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
-    
+    queryset = ClassRoom.objects.select_related('institution', 'academic_year')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['students'] = self.object.students.all().select_related('user')
-        context['subjects'] = self.object.subjects.all()
+        # Evaluated once; the exams tab repeats the subject list for every exam.
+        context['subjects'] = list(self.object.subjects.all())
         context['exams'] = self.object.exams.all().order_by('-date')
         return context
 
@@ -62,14 +77,36 @@ class ClassRoomCreateView(RoleRequiredMixin, CreateView):
 
 # --- Student Views ---
 class StudentListView(RoleRequiredMixin, ListView):
+    """Searchable student list, keyset-paginated on admission number."""
     model = StudentProfile
     template_name = "academics/student_list.html"
     context_object_name = 'students'
-    paginate_by = 20
+    page_size = 20
     allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
 
     def get_queryset(self):
-        return StudentProfile.objects.select_related('user', 'classroom').order_by('classroom__standard', 'user__first_name')
+        self.search_form = StudentSearchForm(self.request.GET)
+        queryset = StudentProfile.objects.select_related('user', 'classroom__academic_year')
+        if not self.search_form.is_valid():
+            return queryset.none()
+        return search_students(queryset, **self.search_form.cleaned_data)
+
+    def get_context_data(self, **kwargs):
+        page = keyset_page(
+            self.object_list, 'admission_number', self.page_size,
+            after=self.request.GET.get('after'), before=self.request.GET.get('before'),
+        )
+        params = self.request.GET.copy()
+        for key in ('after', 'before'):
+            params.pop(key, None)
+        context = super().get_context_data(object_list=page['object_list'], **kwargs)
+        context.update({
+            'page': page,
+            'filter_querystring': params.urlencode(),
+            'search_form': self.search_form,
+            'filter_fields': self.search_form.filter_fields(),
+        })
+        return context
 
 class StudentDetailView(RoleRequiredMixin, DetailView):
     model = StudentProfile
@@ -123,89 +160,13 @@ class StudentBulkImportView(RoleRequiredMixin, FormView):
         return context
 
     def form_valid(self, form):
-        excel_file = self.request.FILES['excel_file']
-        wb = openpyxl.load_workbook(excel_file)
-        ws = wb.active
-        
-        # Assume header is row 1
-        rows = list(ws.iter_rows(min_row=2, values_only=True))
-        
-        created_count = 0
-        errors = []
-        
-        for index, row in enumerate(rows, start=2):
-            # Columns: First Name, Last Name, Email, DOB, Admin No, WhatsApp, Class Code, Father Name, Mother Name, Address, Blood Group
-            try:
-                # Pad row with None if it's shorter than expected
-                row = list(row) + [None] * (11 - len(row))
-                first_name, last_name, email, dob, admission_number, whatsapp_number, class_code, father_name, mother_name, address, blood_group = row[:11]
-                
-                if not all([first_name, email, admission_number, class_code]):
-                    continue # Validating mandatory fields only
-
-                if StudentProfile.objects.filter(admission_number=admission_number).exists():
-                    errors.append(f"Row {index}: Student with admission number {admission_number} already exists.")
-                    continue
-                    
-                if User.objects.filter(email=email).exists():
-                    errors.append(f"Row {index}: User with email {email} already exists.")
-                    continue
-
-                # Find classroom (Assuming Subject Code logic, but here we need Class Code which isn't unique without Institution... 
-                # For MVP, let's assume Class Code maps to Standard + Division or verify strictly)
-                # Actually, earlier models didn't have strict 'code' for class. Let's assume input is Standard (e.g. "10 A")
-                # Wait, ClassRoom has `standard` and `division`.
-                # Simplification: Assume input is "Standard-Division" e.g. "10-A"
-                if '-' in str(class_code):
-                     std, div = str(class_code).split('-', 1)
-                     classroom = ClassRoom.objects.filter(standard__iexact=std.strip(), division__iexact=div.strip()).first()
-                else:
-                     classroom = ClassRoom.objects.filter(standard__iexact=str(class_code).strip()).first()
-
-                if not classroom:
-                    errors.append(f"Row {index}: Class '{class_code}' not found.")
-                    continue
-
-                # Create User
-                user = User.objects.create_user(
-                    username=email,
-                    email=email,
-                    password="password123", # Default password, should force change later
-                    first_name=first_name,
-                    last_name=last_name,
-                    role=User.Roles.STUDENT
-                )
-                
-                # Create Profile
-                StudentProfile.objects.create(
-                    user=user,
-                    admission_number=admission_number,
-                    whatsapp_number=whatsapp_number,
-                    date_of_birth=dob,
-                    classroom=classroom,
-                    father_name=father_name or "",
-                    mother_name=mother_name or "",
-                    address=address or "",
-                    blood_group=blood_group or ""
-                )
-                created_count += 1
-                
-            except Exception as e:
-                errors.append(f"Row {index}: Error processing - {str(e)}")
-
-        if created_count > 0:
-            messages.success(self.request, f"Successfully imported {created_count} students.")
-        
-        if errors:
-            messages.warning(self.request, f"Encoutered {len(errors)} errors. Check below.")
-            # Pass errors to template? Or just flash huge message.
-            # Ideally context, but redirects clear context. Using messages for now.
-            for err in errors[:5]: # Show first 5 errors
-                 messages.error(self.request, err)
-            if len(errors) > 5:
-                messages.error(self.request, f"...and {len(errors)-5} more errors.")
-                
-        return super().form_valid(form)
+        job = ImportJob.objects.create(
+            kind=ImportJob.Kind.STUDENTS,
+            file=form.cleaned_data['excel_file'],
+            created_by=self.request.user,
+        )
+        messages.info(self.request, _("Import queued. This page will update as rows are processed."))
+        return redirect('academics:import_job_detail', pk=job.pk)
 
 
 class DownloadStudentImportTemplateView(RoleRequiredMixin, View):
@@ -240,6 +201,7 @@ class StaffListView(RoleRequiredMixin, ListView):
     template_name = "academics/staff_list.html"
     context_object_name = 'staff_members'
     allowed_roles = [User.Roles.ADMIN]
+    queryset = StaffProfile.objects.select_related('user')
 
 class StaffCreateView(RoleRequiredMixin, CreateView):
     model = StaffProfile
@@ -272,83 +234,55 @@ class StaffBulkImportView(RoleRequiredMixin, FormView):
     allowed_roles = [User.Roles.ADMIN]
 
     def form_valid(self, form):
-        excel_file = form.cleaned_data['excel_file']
-        try:
-            wb = openpyxl.load_workbook(excel_file)
-            ws = wb.active
-            rows = list(ws.iter_rows(values_only=True))
-            
-            if not rows or len(rows) < 2:
-                messages.error(self.request, "The Excel file is empty or missing headers.")
-                return self.form_invalid(form)
-
-            # Skip header
-            created_count = 0
-            errors = []
-            
-            from core.models import Institution
-            # For this MVP, assign to first institution or let user pick, assuming 1 for now
-            institution = Institution.objects.first()
-
-            for index, row in enumerate(rows, start=2):
-                # Columns: First Name, Last Name, Email, Mobile, Place, Department, Designation, Qualification
-                try:
-                    # Pad row
-                    row = list(row) + [None] * (8 - len(row))
-                    first_name, last_name, email, mobile, place, department, designation, qualification = row[:8]
-                    
-                    if not all([first_name, email, mobile, place]):
-                        continue # Skip if compulsory fields are missing
-
-                    if User.objects.filter(email=email).exists():
-                        errors.append(f"Row {index}: User with email {email} already exists.")
-                        continue
-
-                    # Create User
-                    user = User.objects.create_user(
-                        email=email,
-                        username=email, # Use email as username
-                        password="defaultpassword123", # Set a default password
-                        first_name=first_name,
-                        last_name=last_name,
-                        role=User.Roles.STAFF
-                    )
-                    
-                    # Create Profile
-                    StaffProfile.objects.create(
-                        user=user,
-                        institution=institution,
-                        mobile_number=mobile,
-                        place=place,
-                        department=department or "",
-                        designation=designation or "",
-                        qualification=qualification or ""
-                    )
-                    created_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"Row {index}: Error - {str(e)}")
-            
-            if created_count > 0:
-                messages.success(self.request, f"Successfully imported {created_count} staff members.")
-            
-            if errors:
-                for error in errors[:10]: # Limit errors shown
-                    messages.warning(self.request, error)
-                if len(errors) > 10:
-                    messages.warning(self.request, f"And {len(errors) - 10} more errors.")
-                    
-        except Exception as e:
-            messages.error(self.request, f"Error processing file: {str(e)}")
-            return self.form_invalid(form)
-            
-        return super().form_valid(form)
+        job = ImportJob.objects.create(
+            kind=ImportJob.Kind.STAFF,
+            file=form.cleaned_data['excel_file'],
+            created_by=self.request.user,
+        )
+        messages.info(self.request, _("Import queued. This page will update as rows are processed."))
+        return redirect('academics:import_job_detail', pk=job.pk)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['page_title'] = _("Bulk Import Staff")
         return context
 
+class ImportJobDetailView(RoleRequiredMixin, DetailView):
+    model = ImportJob
+    template_name = "academics/import_job_detail.html"
+    context_object_name = 'job'
+    allowed_roles = [User.Roles.ADMIN]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_title'] = _("Import Progress")
+        context['back_url'] = reverse_lazy(
+            'academics:student_list' if self.object.kind == ImportJob.Kind.STUDENTS else 'academics:staff_list'
+        )
+        return context
+
+class ImportJobProgressView(RoleRequiredMixin, View):
+    """JSON progress for an import job; ``?since=N`` returns only errors after the first N."""
+    allowed_roles = [User.Roles.ADMIN]
+
+    def get(self, request, pk):
+        job = get_object_or_404(ImportJob, pk=pk)
+        try:
+            since = max(int(request.GET.get('since', 0)), 0)
+        except ValueError:
+            since = 0
+        return JsonResponse({
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'finished': job.is_finished,
+            'total_rows': job.total_rows,
+            'processed_rows': job.processed_rows,
+            'created_count': job.created_count,
+            'error_count': len(job.errors),
+            'errors': job.errors[since:],
+            'failure_reason': job.failure_reason,
+        })
+
 class DownloadStaffImportTemplateView(RoleRequiredMixin, View):
     allowed_roles = [User.Roles.ADMIN]
 
@@ -386,11 +320,7 @@ class AttendanceCreateView(RoleRequiredMixin, CreateView):
         response = super().form_valid(form)
         # Check if absent and send alert
         if self.object.status == AttendanceRecord.Status.ABSENT:
-            NotificationService.send_attendance_alert(
-                student=self.object.student,
-                date=self.object.date,
-                status=self.object.status
-            )
+            send_absence_alerts([self.object.student_id], self.object.date)
         return response
 
     def get_context_data(self, **kwargs):
@@ -398,6 +328,158 @@ class AttendanceCreateView(RoleRequiredMixin, CreateView):
         context['page_title'] = _("Mark Student Attendance")
         return context
 
+class AttendanceRollCallView(RoleRequiredMixin, View):
+    """Mark a whole class for one day: the roll is pre-filled and saved in one upsert."""
+    allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
+    template_name = "academics/attendance_roll_call.html"
+
+    def get_date(self, request):
+        value = request.POST.get('date') or request.GET.get('date')
+        if value:
+            try:
+                return datetime.date.fromisoformat(value)
+            except ValueError:
+                messages.error(request, _("Invalid date; showing today instead."))
+        return timezone.localdate()
+
+    def render_roll(self, request, classroom, date, formset):
+        context = {
+            'classroom': classroom,
+            'date': date,
+            'formset': formset,
+            'page_title': _("Roll Call"),
+        }
+        return render(request, self.template_name, context)
+
+    def get_initial(self, classroom, date):
+        """One row per student on the roll; also labels the rows when a POST is redisplayed."""
+        return [
+            {
+                'student_id': student.pk,
+                'student_name': student.user.get_full_name() or student.admission_number,
+                'admission_number': student.admission_number,
+                'status': student.status or AttendanceRecord.Status.PRESENT,
+                'marked': student.status is not None,
+            }
+            for student in attendance_roll(classroom, date)
+        ]
+
+    def get(self, request, classroom_id):
+        classroom = get_object_or_404(ClassRoom.objects.select_related('academic_year'), pk=classroom_id)
+        date = self.get_date(request)
+        formset = formset_factory(RollCallEntryForm, extra=0)(initial=self.get_initial(classroom, date))
+        return self.render_roll(request, classroom, date, formset)
+
+    def post(self, request, classroom_id):
+        classroom = get_object_or_404(ClassRoom.objects.select_related('academic_year'), pk=classroom_id)
+        date = self.get_date(request)
+        formset = formset_factory(RollCallEntryForm, extra=0)(request.POST, initial=self.get_initial(classroom, date))
+        if formset.is_valid():
+            statuses = {form.cleaned_data['student_id']: form.cleaned_data['status'] for form in formset}
+            try:
+                with transaction.atomic():
+                    written, newly_absent = save_roll_call(
+                        classroom, date, statuses,
+                        marked_by=getattr(request.user, 'staff_profile', None),
+                    )
+                    send_absence_alerts(newly_absent, date)
+            except ValidationError as e:
+                messages.error(request, " ".join(e.messages))
+            else:
+                messages.success(request, _("Attendance saved (%(count)d changed).") % {'count': written})
+                return redirect(f"{reverse('academics:attendance_roll_call', args=[classroom.pk])}?date={date.isoformat()}")
+        return self.render_roll(request, classroom, date, formset)
+
+class AttendancePeriodMixin:
+    """Reporting period from ``?from=YYYY-MM&to=YYYY-MM``, defaulting to the active academic year."""
+
+    def get_period(self):
+        start, end = attendance_period()
+        try:
+            if self.request.GET.get('from'):
+                start = datetime.datetime.strptime(self.request.GET['from'], '%Y-%m').date()
+            if self.request.GET.get('to'):
+                end = datetime.datetime.strptime(self.request.GET['to'], '%Y-%m').date()
+        except ValueError:
+            messages.error(self.request, _("Invalid month; showing the default period instead."))
+            start, end = attendance_period()
+        return start, end
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['period_start'], context['period_end'] = self.period = self.get_period()
+        return context
+
+class ClassAttendanceSummaryView(RoleRequiredMixin, AttendancePeriodMixin, DetailView):
+    """Per-student attendance for a class over a period, read from the monthly rollups."""
+    model = ClassRoom
+    template_name = "academics/attendance_class_summary.html"
+    context_object_name = 'classroom'
+    allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['rows'] = attendance_by_student(*self.period, classroom=self.object)
+        context['page_title'] = _("Attendance Summary")
+        return context
+
+class StudentAttendanceSummaryView(RoleRequiredMixin, AttendancePeriodMixin, DetailView):
+    """Month-by-month attendance for one student; parents and students only see their own."""
+    model = StudentProfile
+    template_name = "academics/attendance_student_summary.html"
+    context_object_name = 'student'
+    allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF, User.Roles.PARENT, User.Roles.STUDENT]
+
+    def get_queryset(self):
+        queryset = StudentProfile.objects.select_related('user', 'classroom')
+        user = self.request.user
+        if user.role == User.Roles.PARENT:
+            return queryset.filter(parents__user=user)
+        if user.role == User.Roles.STUDENT:
+            return queryset.filter(user=user)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        months = student_attendance_months(self.object, *self.period)
+        present = sum(month.present for month in months)
+        total = sum(month.total for month in months)
+        context.update({
+            'months': months,
+            'present': present,
+            'total': total,
+            'percentage': round(present * 100 / total, 1) if total else None,
+            'page_title': _("Attendance"),
+        })
+        return context
+
+class LowAttendanceReportView(RoleRequiredMixin, AttendancePeriodMixin, TemplateView):
+    """Students below an attendance threshold, optionally narrowed to a class or institution."""
+    template_name = "academics/low_attendance_report.html"
+    allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            threshold = float(self.request.GET.get('threshold') or LOW_ATTENDANCE_THRESHOLD)
+        except ValueError:
+            threshold = LOW_ATTENDANCE_THRESHOLD
+        filters = {}
+        classroom_id = self.request.GET.get('classroom')
+        if classroom_id and classroom_id.isdigit():
+            filters['classroom_id'] = int(classroom_id)
+        institution_id = self.request.GET.get('institution')
+        if institution_id and institution_id.isdigit():
+            filters['classroom__institution_id'] = int(institution_id)
+        context.update({
+            'rows': low_attendance(threshold, *self.period, **filters),
+            'threshold': threshold,
+            'classrooms': ClassRoom.objects.select_related('institution', 'academic_year'),
+            'selected_classroom': filters.get('classroom_id'),
+            'page_title': _("Low Attendance Report"),
+        })
+        return context
+
 # --- Exam / Reports Views ---
 class ProgressReportView(RoleRequiredMixin, DetailView):
     model = StudentProfile
@@ -407,49 +489,7 @@ class ProgressReportView(RoleRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        student = self.object
-        # Fetch all results for this student
-        results = ExamResult.objects.filter(student=student).select_related('exam', 'subject')
-        
-        # Group by Exam
-        exams_data = {}
-        for res in results:
-            if res.exam not in exams_data:
-                exams_data[res.exam] = {
-                    'exam': res.exam,
-                    'results': [],
-                    'total_marks': 0,
-                    'max_total': 0,
-                    'percentage': 0,
-                    'rank': 0
-                }
-            exams_data[res.exam]['results'].append(res)
-            exams_data[res.exam]['total_marks'] += res.marks_obtained
-            exams_data[res.exam]['max_total'] += res.max_marks
-            
-        # Calculate Rank and Percentage
-        for exam, data in exams_data.items():
-            if data['max_total'] > 0:
-                data['percentage'] = (data['total_marks'] / data['max_total']) * 100
-                
-            # Rank Calculation (Expensive but okay for small classes)
-            # Get all students in class
-            class_students = StudentProfile.objects.filter(classroom=exam.classroom)
-            exam_totals = []
-            for s in class_students:
-                # Sum marks for this student in this exam
-                total = ExamResult.objects.filter(exam=exam, student=s).aggregate(t=models.Sum('marks_obtained'))['t'] or 0
-                exam_totals.append(total)
-            
-            # Sort descending
-            exam_totals.sort(reverse=True)
-            # Find rank
-            try:
-                data['rank'] = exam_totals.index(data['total_marks']) + 1
-            except ValueError:
-                data['rank'] = '-'
-            
-        context['exams_data'] = exams_data.values()
+        context['exams_data'] = student_exams_data(self.object)
         return context
 
 class ClassExamResultView(RoleRequiredMixin, DetailView):
@@ -460,34 +500,20 @@ class ClassExamResultView(RoleRequiredMixin, DetailView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        exam = self.object
-        students = StudentProfile.objects.filter(classroom=exam.classroom).select_related('user')
-        
-        student_results = []
-        for student in students:
-            # Aggregate marks
-            results = ExamResult.objects.filter(exam=exam, student=student)
-            total_marks = results.aggregate(t=models.Sum('marks_obtained'))['t'] or 0
-            max_marks = results.aggregate(t=models.Sum('max_marks'))['t'] or 0
-            
-            percentage = (total_marks / max_marks * 100) if max_marks > 0 else 0
-            
-            student_results.append({
-                'student': student,
-                'total_marks': total_marks,
-                'max_marks': max_marks,
-                'percentage': percentage,
-            })
-            
-        # Sort by total marks desc
-        student_results.sort(key=lambda x: x['total_marks'], reverse=True)
-        
-        # Add Rank
-        for i, item in enumerate(student_results):
-            item['rank'] = i + 1
-            
-        context['student_results'] = student_results
+        student_results = list(
+            self.object.student_summaries.select_related('student__user').order_by('rank', 'student__admission_number')
+        )
         context['toppers'] = student_results[:5] # Top 5
+        # Students of the class with no marks entered yet are listed last, unranked.
+        unranked = (
+            StudentProfile.objects.filter(classroom_id=self.object.classroom_id)
+            .exclude(exam_summaries__exam=self.object)
+            .select_related('user').order_by('admission_number')
+        )
+        context['student_results'] = student_results + [
+            ExamStudentSummary(exam=self.object, student=student, total=0, max_total=0, percentage=0, rank=None)
+            for student in unranked
+        ]
         return context
 
 class StudentCertificateView(RoleRequiredMixin, DetailView):
@@ -516,13 +542,10 @@ class StudentIDCardView(RoleRequiredMixin, DetailView):
     def render_to_response(self, context, **response_kwargs):
         # We need a list for the template even for single item to reuse template logic
         context['students'] = [self.object]
-        pdf = render_to_pdf(self.template_name, context)
-        if pdf:
-            response = HttpResponse(pdf, content_type='application/pdf')
-            filename = f"Identity_Card_{self.object.admission_number}.pdf"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
-        return HttpResponse("Error generating PDF", status=500)
+        return pdf_response(
+            self.request, self.template_name, context,
+            filename=f"Identity_Card_{self.object.admission_number}.pdf",
+        )
 
 class StudentBulkIDCardView(RoleRequiredMixin, View):
     allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
@@ -531,22 +554,28 @@ class StudentBulkIDCardView(RoleRequiredMixin, View):
         # Optional: Filter by Class
         class_id = request.GET.get('class_id')
         if class_id:
-            students = StudentProfile.objects.filter(classroom_id=class_id).select_related('user', 'classroom', 'classroom__institution')
+            students = StudentProfile.objects.filter(classroom_id=class_id).select_related('user', 'classroom', 'classroom__institution', 'classroom__academic_year')
         else:
-            students = StudentProfile.objects.all().select_related('user', 'classroom', 'classroom__institution')
+            students = StudentProfile.objects.all().select_related('user', 'classroom', 'classroom__institution', 'classroom__academic_year')
 
         if not students.exists():
             messages.warning(request, "No students found to generate ID cards.")
             return HttpResponse("No students found", status=404)
 
-        context = {'students': students}
-        pdf = render_to_pdf("academics/pdf/student_id.html", context)
-        if pdf:
-            response = HttpResponse(pdf, content_type='application/pdf')
-            filename = "Student_ID_Cards_Bulk.pdf"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
-        return HttpResponse("Error generating PDF", status=500)
+        students = students.order_by(
+            'classroom__institution__code', 'classroom__standard', 'classroom__division', 'classroom_id', 'admission_number',
+        )
+        # Classes of different institutions can share a name, so the label carries the institution code.
+        parts = [
+            (f"{classroom.institution.code} {classroom}", {'students': chunk})
+            for classroom, group in groupby(students, key=attrgetter('classroom'))
+            for chunk in chunked(group, ID_CARD_CHUNK_SIZE)
+        ]
+        return pdf_bundle_response(
+            request, "academics/pdf/student_id.html", parts,
+            filename="Student_ID_Cards_Bulk.zip" if request.GET.get('format') == 'zip' else "Student_ID_Cards_Bulk.pdf",
+            as_zip=request.GET.get('format') == 'zip',
+        )
 
 class StaffIDCardView(RoleRequiredMixin, DetailView):
     model = StaffProfile
@@ -556,13 +585,10 @@ class StaffIDCardView(RoleRequiredMixin, DetailView):
 
     def render_to_response(self, context, **response_kwargs):
         context['staff_members'] = [self.object]
-        pdf = render_to_pdf(self.template_name, context)
-        if pdf:
-            response = HttpResponse(pdf, content_type='application/pdf')
-            filename = f"Staff_Identity_Card_{self.object.user.username}.pdf"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
-        return HttpResponse("Error generating PDF", status=500)
+        return pdf_response(
+            self.request, self.template_name, context,
+            filename=f"Staff_Identity_Card_{self.object.user.username}.pdf",
+        )
 
 class StaffBulkIDCardView(RoleRequiredMixin, View):
     allowed_roles = [User.Roles.ADMIN]
@@ -574,14 +600,17 @@ class StaffBulkIDCardView(RoleRequiredMixin, View):
              messages.warning(request, "No staff members found.")
              return HttpResponse("No staff found", status=404)
 
-        context = {'staff_members': staff_members}
-        pdf = render_to_pdf("academics/pdf/staff_id.html", context)
-        if pdf:
-            response = HttpResponse(pdf, content_type='application/pdf')
-            filename = "Staff_ID_Cards_Bulk.pdf"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
-        return HttpResponse("Error generating PDF", status=500)
+        staff_members = staff_members.order_by('institution__name', 'institution_id', 'user__first_name', 'pk')
+        parts = [
+            (str(institution), {'staff_members': chunk})
+            for institution, group in groupby(staff_members, key=attrgetter('institution'))
+            for chunk in chunked(group, ID_CARD_CHUNK_SIZE)
+        ]
+        return pdf_bundle_response(
+            request, "academics/pdf/staff_id.html", parts,
+            filename="Staff_ID_Cards_Bulk.zip" if request.GET.get('format') == 'zip' else "Staff_ID_Cards_Bulk.pdf",
+            as_zip=request.GET.get('format') == 'zip',
+        )
 
 # --- Result Management Views ---
 
@@ -595,8 +624,8 @@ class SubjectListView(RoleRequiredMixin, ListView):
         # Filter by classroom if provided
         classroom_id = self.request.GET.get('classroom')
         if classroom_id:
-             return Subject.objects.filter(classroom_id=classroom_id).select_related('classroom')
-        return Subject.objects.all().select_related('classroom')
+             return Subject.objects.filter(classroom_id=classroom_id).select_related('classroom__academic_year')
+        return Subject.objects.all().select_related('classroom__academic_year')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -635,10 +664,15 @@ class ExamListView(RoleRequiredMixin, ListView):
     allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
     
     def get_queryset(self):
+        # Each row lists its class's subjects: one prefetch query serves all rows,
+        # and exams of the same class share the prefetched subject list.
+        exams = Exam.objects.select_related('classroom__academic_year', 'academic_year').prefetch_related(
+            'classroom__subjects'
+        )
         classroom_id = self.request.GET.get('classroom')
         if classroom_id:
-             return Exam.objects.filter(classroom_id=classroom_id).select_related('classroom', 'academic_year')
-        return Exam.objects.all().select_related('classroom', 'academic_year')
+             return exams.filter(classroom_id=classroom_id)
+        return exams
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -676,10 +710,10 @@ class ExamResultEntryView(RoleRequiredMixin, View):
         subject = Subject.objects.get(pk=subject_id)
         
         # Get all students in the exam's classroom
-        students = StudentProfile.objects.filter(classroom=exam.classroom).order_by('admission_number')
+        students = StudentProfile.objects.filter(classroom=exam.classroom).select_related('user').order_by('admission_number')
         
         # Get existing results to pre-fill
-        existing_results = ExamResult.objects.filter(exam=exam, subject=subject).in_bulk(field_name='student_id')
+        existing_results = results_by_student(exam, subject)
         
         initial_data = []
         for student in students:
@@ -710,32 +744,17 @@ class ExamResultEntryView(RoleRequiredMixin, View):
         BulkResultFormSet = formset_factory(BulkExamResultForm)
         formset = BulkResultFormSet(request.POST) 
         
-        if formset.is_valid():
+        if formset.is_valid() and self.validate_marks(formset, exam, subject):
+            marks = {
+                form.cleaned_data['student_id']: form.cleaned_data['marks_obtained']
+                for form in formset
+                if form.cleaned_data.get('student_id') and form.cleaned_data.get('marks_obtained') is not None
+            }
             with transaction.atomic():
-                for form in formset:
-                    data = form.cleaned_data
-                    if not data: continue # Empty form
-                    
-                    student_id = data.get('student_id')
-                    marks = data.get('marks_obtained')
-                    is_absent = data.get('is_absent')
-                    
-                    if student_id:
-                        student = StudentProfile.objects.get(pk=student_id)
-                        
-                        if marks is not None:
-                            ExamResult.objects.update_or_create(
-                                exam=exam,
-                                student=student,
-                                subject=subject,
-                                defaults={
-                                    'marks_obtained': marks,
-                                    'max_marks': subject.max_marks, # Default to subject's max marks
-                                    'grade': '', # Calculate grade later if needed
-                                }
-                            )
+                save_subject_marks(exam, subject, marks)
+                refresh_exam_summaries(exam)
             messages.success(request, _("Marks saved successfully."))
-            return redirect('academics:classroom_detail', pk=exam.classroom.pk)
+            return redirect('academics:classroom_detail', pk=exam.classroom_id)
             
         context = {
             'exam': exam,
@@ -744,6 +763,28 @@ class ExamResultEntryView(RoleRequiredMixin, View):
         }
         return render(request, self.template_name, context)
 
+    def validate_marks(self, formset, exam, subject):
+        """Check every row against the class roll and the subject's max marks in memory."""
+        entered = [
+            form for form in formset
+            if form.cleaned_data.get('student_id') and form.cleaned_data.get('marks_obtained') is not None
+        ]
+        class_student_ids = set(
+            StudentProfile.objects.filter(
+                classroom_id=exam.classroom_id,
+                pk__in=[form.cleaned_data['student_id'] for form in entered],
+            ).values_list('pk', flat=True)
+        )
+        valid = True
+        for form in entered:
+            if form.cleaned_data['student_id'] not in class_student_ids:
+                form.add_error('marks_obtained', _("Student is not enrolled in this class."))
+                valid = False
+            elif form.cleaned_data['marks_obtained'] > subject.max_marks:
+                form.add_error('marks_obtained', _("Marks obtained cannot exceed maximum marks."))
+                valid = False
+        return valid
+
 
 class StudentCertificateView(RoleRequiredMixin, DetailView):
     model = StudentProfile
@@ -752,13 +793,10 @@ class StudentCertificateView(RoleRequiredMixin, DetailView):
     allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF, User.Roles.STUDENT, User.Roles.PARENT] # Accessible to students too
 
     def render_to_response(self, context, **response_kwargs):
-        pdf = render_to_pdf(self.template_name, context)
-        if pdf:
-            response = HttpResponse(pdf, content_type='application/pdf')
-            filename = f"Certificate_{self.object.admission_number}.pdf"
-            response['Content-Disposition'] = f'inline; filename="{filename}"'
-            return response
-        return HttpResponse("Error generating PDF", status=500)
+        return pdf_response(
+            self.request, self.template_name, context,
+            filename=f"Certificate_{self.object.admission_number}.pdf", attachment=False,
+        )
 
 
 class StudentMarksheetPDFView(RoleRequiredMixin, DetailView):
@@ -770,48 +808,9 @@ class StudentMarksheetPDFView(RoleRequiredMixin, DetailView):
     def render_to_response(self, context, **response_kwargs):
         # We need to populate context with exam data same as ProgressReportView
         student = self.object
-        results = ExamResult.objects.filter(student=student).select_related('exam', 'subject')
-        
-        exams_data = {}
-        for res in results:
-            if res.exam not in exams_data:
-                exams_data[res.exam] = {
-                    'exam': res.exam,
-                    'results': [],
-                    'total_marks': 0,
-                    'max_total': 0,
-                    'percentage': 0,
-                    'rank': 0
-                }
-            exams_data[res.exam]['results'].append(res)
-            exams_data[res.exam]['total_marks'] += res.marks_obtained
-            exams_data[res.exam]['max_total'] += res.max_marks
-            
-        for exam, data in exams_data.items():
-            if data['max_total'] > 0:
-                data['percentage'] = (data['total_marks'] / data['max_total']) * 100
-            
-            # Rank Calculation (simplified for PDF view, separate query for each student)
-            class_students = StudentProfile.objects.filter(classroom=exam.classroom)
-            exam_totals = []
-            for s in class_students:
-                 # Optimize: We could annotatate but this is distinct queries in loop
-                 # For MVP stick to loop or duplicate logic
-                total = ExamResult.objects.filter(exam=exam, student=s).aggregate(t=models.Sum('marks_obtained'))['t'] or 0
-                exam_totals.append(total)
-            exam_totals.sort(reverse=True)
-            try:
-                data['rank'] = exam_totals.index(data['total_marks']) + 1
-            except ValueError:
-                data['rank'] = '-'
-
-        context['exams_data'] = exams_data.values()
+        context['exams_data'] = student_exams_data(student)
         
-        pdf = render_to_pdf(self.template_name, context)
-        if pdf:
-            response = HttpResponse(pdf, content_type='application/pdf')
-            filename = f"Marksheet_{student.admission_number}.pdf"
-            # Use attachment to trigger download instead of inline preview
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
-        return HttpResponse("Error generating PDF", status=500)
\ No newline at end of file
+        return pdf_response(
+            self.request, self.template_name, context,
+            filename=f"Marksheet_{student.admission_number}.pdf",
+        )
\ No newline at end of file
@@ -105,6 +105,38 @@ else:
         }
     }
 
+# Student search matches names anywhere in the word using the pg_trgm GIN
+# indexes created on PostgreSQL; otherwise (and on SQLite) it matches prefixes.
+STUDENT_SEARCH_TRIGRAM = USE_POSTGRES and os.getenv("STUDENT_SEARCH_TRIGRAM", "True") == "True"
+
+
+# Cache: Redis when REDIS_URL is set (requires the `redis` package), a shared
+# file cache when CACHE_DIR is set, otherwise per-process local memory.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+elif os.getenv("CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_DIR"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "adabiyya",
+        }
+    }
+
+# Seconds anonymous visitors are served cached public pages (home, institutions, careers).
+PUBLIC_PAGE_CACHE_TIMEOUT = int(os.getenv("PUBLIC_PAGE_CACHE_TIMEOUT", "300"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -149,6 +181,23 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# PDFs (ID cards, marksheets, letters) are rendered by `manage.py run_pdf_jobs`
+# and cached under MEDIA_ROOT/pdf_cache. Set to False to render in the request.
+PDF_ASYNC_RENDERING = os.getenv("PDF_ASYNC_RENDERING", "True") == "True"
+# A failed render is retried on the next request up to PDF_MAX_ATTEMPTS times,
+# then again once PDF_RETRY_AFTER seconds have passed. A render still RUNNING
+# after PDF_RENDER_TIMEOUT seconds is assumed lost with its worker and re-queued.
+PDF_MAX_ATTEMPTS = int(os.getenv("PDF_MAX_ATTEMPTS", "3"))
+PDF_RETRY_AFTER = int(os.getenv("PDF_RETRY_AFTER", "3600"))
+PDF_RENDER_TIMEOUT = int(os.getenv("PDF_RENDER_TIMEOUT", "600"))
+
+# Seconds an ImportJob may stay RUNNING before run_import_jobs marks it FAILED
+# as abandoned by a crashed worker.
+IMPORT_JOB_TIMEOUT = int(os.getenv("IMPORT_JOB_TIMEOUT", "3600"))
+
+# Seconds the admin dashboard KPIs are cached; saves of the counted models clear it.
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", "60"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -190,7 +239,52 @@ DEFAULT_FROM_EMAIL = os.getenv(
 # Razorpay configuration placeholders
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID", "")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET", "")
+# Secret set on the Razorpay dashboard for the webhook at /payments/webhook/razorpay/.
+RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET", "")
+# Webhook events the run_payment_webhooks worker applies per batch.
+PAYMENT_WEBHOOK_BATCH_SIZE = int(os.getenv("PAYMENT_WEBHOOK_BATCH_SIZE", "500"))
+# Seconds before events left PROCESSING by a crashed worker are claimed again.
+PAYMENT_WEBHOOK_CLAIM_TIMEOUT = int(os.getenv("PAYMENT_WEBHOOK_CLAIM_TIMEOUT", "300"))
+# Gateway used for orders and signature checks (see payments/gateways.py). It is
+# built once per process and keeps a pool of connections to Razorpay.
+# payments.gateways.StubGateway works offline, for tests and benchmarks only.
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY", "payments.gateways.RazorpayGateway")
+PAYMENT_GATEWAY_TIMEOUT = float(os.getenv("PAYMENT_GATEWAY_TIMEOUT", "10"))
+PAYMENT_GATEWAY_POOL_SIZE = int(os.getenv("PAYMENT_GATEWAY_POOL_SIZE", "10"))
+PAYMENT_STUB_LATENCY_MS = int(os.getenv("PAYMENT_STUB_LATENCY_MS", "0"))
 
 # Basic SMS gateway placeholders (for future integration)
 SMS_GATEWAY_API_URL = os.getenv("SMS_GATEWAY_API_URL", "")
 SMS_GATEWAY_API_KEY = os.getenv("SMS_GATEWAY_API_KEY", "")
+# Delivery backend per channel (see core/notification_backends.py). The SMS backend
+# defaults to the HTTP gateway when SMS_GATEWAY_API_URL is set, otherwise to printing
+# messages; SMS_BACKEND can name another, e.g. core.notification_backends.FileSMSBackend.
+SMS_BACKEND = os.getenv("SMS_BACKEND") or (
+    "core.notification_backends.HTTPSMSBackend"
+    if SMS_GATEWAY_API_URL
+    else "core.notification_backends.ConsoleSMSBackend"
+)
+NOTIFICATION_BACKENDS = {
+    "EMAIL": "core.notification_backends.EmailBackend",
+    "SMS": SMS_BACKEND,
+}
+SMS_FILE_PATH = os.getenv("SMS_FILE_PATH") or str(BASE_DIR / "sms.log")
+
+# Notifications are queued and delivered by `manage.py run_notification_outbox`.
+# Set NOTIFICATIONS_ASYNC to False to deliver them right after the request's transaction.
+NOTIFICATIONS_ASYNC = os.getenv("NOTIFICATIONS_ASYNC", "True") == "True"
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "100"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+# Seconds a message may stay SENDING before it is counted as a failed attempt
+# (the worker that claimed it is assumed to have crashed).
+NOTIFICATION_SEND_TIMEOUT = int(os.getenv("NOTIFICATION_SEND_TIMEOUT", "600"))
+# Messages per minute for each channel (0 disables the limit).
+NOTIFICATION_RATE_LIMITS = {
+    "EMAIL": int(os.getenv("EMAIL_RATE_LIMIT_PER_MINUTE", "120")),
+    "SMS": int(os.getenv("SMS_RATE_LIMIT_PER_MINUTE", "60")),
+}
+
+# `manage.py prune_notification_logs` keeps this many days of NotificationLog rows;
+# older ones are moved to gzip JSONL files in NOTIFICATION_ARCHIVE_DIR.
+NOTIFICATION_LOG_RETENTION_DAYS = int(os.getenv("NOTIFICATION_LOG_RETENTION_DAYS", "180"))
+NOTIFICATION_ARCHIVE_DIR = os.getenv("NOTIFICATION_ARCHIVE_DIR") or str(BASE_DIR / "archive" / "notifications")
@@ -45,6 +45,7 @@ class AdmissionApplicationListView(RoleRequiredMixin, ListView):
     template_name = "components/data_table.html" # Reusing data table component via wrapper or context
     context_object_name = 'applications'
     allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
+    queryset = AdmissionApplication.objects.select_related('programme')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -200,8 +201,7 @@ class ProgrammeDeleteView(RoleRequiredMixin, DeleteView):
     allowed_roles = [User.Roles.ADMIN]
 
 from django.views.generic import View
-from django.http import HttpResponse
-from core.utils import render_to_pdf
+from core.pdf import pdf_response
 import datetime
 
 class AdmissionLetterView(LoginRequiredMixin, View):
@@ -238,10 +238,7 @@ class AdmissionLetterView(LoginRequiredMixin, View):
             'reporting_time': reporting_time,
         }
 
-        pdf = render_to_pdf('admissions/pdf/admission_letter.html', context)
-        if pdf:
-            response = HttpResponse(pdf, content_type='application/pdf')
-            filename = f"Admission_Letter_{application.id}.pdf"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
-        return HttpResponse("Error generating PDF", status=500)
+        return pdf_response(
+            request, 'admissions/pdf/admission_letter.html', context,
+            filename=f"Admission_Letter_{application.id}.pdf",
+        )
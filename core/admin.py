@@ -1,6 +1,7 @@
 from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
 from .models import (
-    AcademicYear, Institution, CMSPage, NotificationLog, NewsItem, JobOpening
+    AcademicYear, Institution, CMSPage, NotificationLog, NewsItem, JobOpening, OutboxMessage, PDFArtifact
 )
 
 # Register your models here.
@@ -26,14 +27,23 @@ class CMSPageAdmin(admin.ModelAdmin):
 
 @admin.register(NotificationLog)
 class NotificationLogAdmin(admin.ModelAdmin):
-    list_display = ('to', 'subject', 'channel', 'created_at')
-    list_filter = ('channel', 'created_at')
-    search_fields = ('to', 'subject', 'body')
-    readonly_fields = ('to', 'subject', 'body', 'channel', 'meta', 'created_at')
+    list_display = ('to', 'subject', 'channel', 'status', 'created_at')
+    list_filter = ('channel', 'status', 'created_at')
+    # Exact recipient match uses the index on `to`; free-text body search would scan the table.
+    search_fields = ('to',)
+    search_help_text = _("Exact recipient email or phone number.")
+    show_full_result_count = False
+    readonly_fields = ('to', 'subject', 'body', 'channel', 'status', 'meta', 'created_at')
 
     def has_add_permission(self, request):
         return False
 
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(to=search_term), False
+
 @admin.register(NewsItem)
 class NewsItemAdmin(admin.ModelAdmin):
     list_display = ('title', 'is_active', 'created_at')
@@ -45,3 +55,25 @@ class JobOpeningAdmin(admin.ModelAdmin):
     list_display = ('title', 'posted_at', 'is_active')
     list_filter = ('is_active',)
     search_fields = ('title',)
+
+@admin.register(PDFArtifact)
+class PDFArtifactAdmin(admin.ModelAdmin):
+    list_display = ('template_name', 'key', 'status', 'created_at', 'rendered_at')
+    list_filter = ('status', 'template_name')
+    search_fields = ('key',)
+    readonly_fields = ('key', 'template_name', 'file', 'status', 'error', 'created_at', 'rendered_at')
+    exclude = ('html',)
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('log', 'channel', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('channel', 'status')
+    list_select_related = ('log',)
+    raw_id_fields = ('log',)
+    readonly_fields = ('log', 'channel', 'attempts', 'last_error', 'created_at', 'sent_at')
+
+    def has_add_permission(self, request):
+        return False
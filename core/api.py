@@ -0,0 +1,92 @@
+"""Shared building blocks for the REST API.
+
+* ``CursorPage``: cursor pagination on the primary key. Paging stays stable
+  while rows are inserted, and a deep page costs the same as the first.
+* ``FieldSelectionMixin``: lets clients trim responses with ``?fields=a,b``.
+* ``FilterParamsMixin``: maps query parameters to queryset lookups; a value
+  the field cannot accept is answered with 400.
+* ``ConditionalGetMixin``: ETag / Last-Modified validators computed with one
+  aggregate query, so an unchanged resource is answered with 304 before
+  anything is loaded or serialized. Models need an ``updated_at`` field.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import serializers
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class CursorPage(CursorPagination):
+    ordering = "-pk"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class FieldSelectionMixin:
+    """Serializer mixin: keep only the fields named in ``?fields=``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        requested = request.query_params.get("fields") if request is not None else None
+        if requested:
+            wanted = {name.strip() for name in requested.split(",")}
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+
+class FilterParamsMixin:
+    """ViewSet mixin: ``filter_params`` maps query parameters to queryset
+    lookups, e.g. ``{"classroom": "classroom_id"}`` turns ``?classroom=3``
+    into ``.filter(classroom_id=3)``.
+    """
+
+    filter_params: dict[str, str] = {}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        for param, lookup in self.filter_params.items():
+            value = self.request.query_params.get(param)
+            if value:
+                try:
+                    queryset = queryset.filter(**{lookup: value})
+                except (ValueError, ValidationError):
+                    raise serializers.ValidationError({param: f"Invalid value: {value!r}."})
+        return queryset
+
+
+class ConditionalGetMixin:
+    """ViewSet mixin adding ETag and Last-Modified to ``list`` and ``retrieve``."""
+
+    def _validators(self, state) -> tuple[str, float | None]:
+        digest = hashlib.sha256(
+            f"{self.request.get_full_path()}|{self.request.accepted_renderer.format}|{state}".encode()
+        ).hexdigest()
+        last_modified = state.get("last_modified")
+        return quote_etag(digest[:32]), last_modified.timestamp() if last_modified else None
+
+    def _conditional(self, state, build_response):
+        etag, last_modified = self._validators(state)
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = build_response()
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        state = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            count=Count("pk"), last_pk=Max("pk"), last_modified=Max("updated_at"),
+        )
+        return self._conditional(state, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        state = {"pk": instance.pk, "last_modified": instance.updated_at}
+        return self._conditional(state, lambda: Response(self.get_serializer(instance).data))
@@ -0,0 +1,332 @@
+"""Synthetic school data and per-view query/latency budgets.
+
+``seed`` fills the database with a realistic institution group: several
+institutions and academic years, classes with subjects, 4,000 students
+(``BENCHMARK_SCALE`` multiplies them) with parents, exam results, a month of
+attendance, fee schedules, payments and ledger balances, and admission
+applications. Everything is written with ``bulk_create`` so seeding takes
+seconds.
+
+``VIEW_BUDGETS`` lists the main pages of academics, core, admissions and
+payments with the most queries and milliseconds each may take against that
+data. ``core.tests.ViewBudgetTests`` enforces the budgets and prints the
+report table; run it on its own with ``python manage.py test --tag benchmark``.
+
+``measure_checkout`` times the payment checkout API against the offline
+``payments.gateways.StubGateway`` and counts duplicate gateway orders.
+"""
+import datetime
+import os
+import statistics
+import time
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from academics.models import AttendanceRecord, ClassRoom, Exam, ExamResult, ParentProfile, StaffProfile, StudentProfile, Subject
+from academics.services import refresh_attendance_summaries, refresh_exam_summaries
+from accounts.models import User
+from admissions.models import AdmissionApplication, Programme
+from payments.gateways import get_gateway
+from payments.ledger import assess_fees, post_payments
+from payments.models import FeeSchedule, Payment
+from payments.revenue import refresh_daily_revenue
+
+from .models import AcademicYear, Institution, JobOpening, NewsItem
+
+# Multiplies the divisions per standard; 1 gives 4,000 students, the size
+# VIEW_BUDGETS were set against. Class sizes stay at STUDENTS_PER_CLASS.
+BENCHMARK_SCALE = int(os.getenv("BENCHMARK_SCALE", "1"))
+# Multiplies every latency budget, for slow CI machines.
+BENCHMARK_LATENCY_FACTOR = float(os.getenv("BENCHMARK_LATENCY_FACTOR", "1"))
+
+INSTITUTIONS = 2
+YEARS = 2
+STANDARDS = 10
+DIVISIONS_PER_STANDARD = 2
+STUDENTS_PER_CLASS = 50
+SUBJECTS_PER_CLASS = 5
+EXAMS_PER_CLASS = 2
+ATTENDANCE_DAYS = 20
+PAYMENTS_PER_STUDENT = 2
+APPLICATIONS_PER_PROGRAMME = 50
+
+
+def _users(prefix: str, count: int, role: str, password: str) -> list[User]:
+    return User.objects.bulk_create(
+        User(
+            username=f"{prefix}{n}",
+            email=f"{prefix}{n}@example.com",
+            first_name=f"{prefix.title()}{n}",
+            last_name="Synthetic",
+            password=password,
+            role=role,
+        )
+        for n in range(count)
+    )
+
+
+def seed(scale: int = BENCHMARK_SCALE) -> dict:
+    """Create the synthetic data set; returns the objects the budgets' URLs need."""
+    password = make_password("benchmark")
+    divisions = DIVISIONS_PER_STANDARD * scale
+
+    institutions = Institution.objects.bulk_create(
+        Institution(name=f"Institution {n}", code=f"INST{n}") for n in range(INSTITUTIONS)
+    )
+    years = AcademicYear.objects.bulk_create(
+        AcademicYear(
+            name=f"{2024 + n}-{25 + n}",
+            start_date=datetime.date(2024 + n, 6, 1),
+            end_date=datetime.date(2025 + n, 3, 31),
+            is_active=n == YEARS - 1,
+        )
+        for n in range(YEARS)
+    )
+    classrooms = ClassRoom.objects.bulk_create(
+        ClassRoom(
+            institution=institution, academic_year=year, standard=str(1 + n),
+            division=f"{chr(ord('A') + d % 26)}{d // 26 or ''}",
+        )
+        for institution in institutions
+        for year in years
+        for n in range(STANDARDS)
+        for d in range(divisions)
+    )
+    subjects = Subject.objects.bulk_create(
+        Subject(classroom=classroom, name=f"Subject {n}", code=f"S{n}")
+        for classroom in classrooms
+        for n in range(SUBJECTS_PER_CLASS)
+    )
+    subjects_by_class = {}
+    for subject in subjects:
+        subjects_by_class.setdefault(subject.classroom_id, []).append(subject)
+
+    student_users = _users("student", len(classrooms) * STUDENTS_PER_CLASS, User.Roles.STUDENT, password)
+    students = StudentProfile.objects.bulk_create(
+        StudentProfile(
+            user=user,
+            admission_number=f"ADM{n:06d}",
+            date_of_birth=datetime.date(2012, 1, 1),
+            classroom=classrooms[n // STUDENTS_PER_CLASS],
+        )
+        for n, user in enumerate(student_users)
+    )
+    parent_users = _users("parent", len(students) // 2, User.Roles.PARENT, password)
+    parents = ParentProfile.objects.bulk_create(ParentProfile(user=user) for user in parent_users)
+    ParentProfile.students.through.objects.bulk_create(
+        ParentProfile.students.through(parentprofile_id=parents[n // 2].pk, studentprofile_id=student.pk)
+        for n, student in enumerate(students[:len(parents) * 2])
+    )
+    staff_users = _users("staff", 10 * INSTITUTIONS, User.Roles.STAFF, password)
+    StaffProfile.objects.bulk_create(
+        StaffProfile(user=user, institution=institutions[n % INSTITUTIONS], designation="Teacher")
+        for n, user in enumerate(staff_users)
+    )
+
+    exams = Exam.objects.bulk_create(
+        Exam(
+            name=f"Term {n}", academic_year=classroom.academic_year, classroom=classroom,
+            date=classroom.academic_year.start_date + datetime.timedelta(days=60 * (n + 1)),
+        )
+        for classroom in classrooms
+        for n in range(EXAMS_PER_CLASS)
+    )
+    students_by_class = {}
+    for student in students:
+        students_by_class.setdefault(student.classroom_id, []).append(student)
+    ExamResult.objects.bulk_create(
+        (
+            ExamResult(
+                exam=exam, student=student, subject=subject,
+                marks_obtained=Decimal((student.pk * 7 + subject.pk) % 100), max_marks=Decimal(100),
+            )
+            for exam in exams
+            for student in students_by_class[exam.classroom_id]
+            for subject in subjects_by_class[exam.classroom_id]
+        ),
+        batch_size=2000,
+    )
+    for exam in exams:
+        refresh_exam_summaries(exam)
+
+    statuses = [AttendanceRecord.Status.PRESENT] * 8 + [AttendanceRecord.Status.ABSENT, AttendanceRecord.Status.LEAVE]
+    first_day = years[-1].start_date
+    days = [first_day + datetime.timedelta(days=n) for n in range(ATTENDANCE_DAYS)]
+    AttendanceRecord.objects.bulk_create(
+        (
+            AttendanceRecord(student=student, date=day, status=statuses[(student.pk + n) % len(statuses)])
+            for student in students
+            for n, day in enumerate(days)
+        ),
+        batch_size=2000,
+    )
+    refresh_attendance_summaries((student.pk, first_day) for student in students)
+
+    Payment.objects.bulk_create(
+        (
+            Payment(
+                payer=student_users[n], student=student, institution_id=student.classroom.institution_id,
+                category=Payment.Category.TUITION,
+                amount=Decimal(1500), status=[Payment.Status.SUCCESS, Payment.Status.PENDING][k % 2],
+            )
+            for n, student in enumerate(students)
+            for k in range(PAYMENTS_PER_STUDENT)
+        ),
+        batch_size=2000,
+    )
+    assess_fees(FeeSchedule.objects.bulk_create(
+        FeeSchedule(
+            academic_year_id=classroom.academic_year_id, classroom=classroom,
+            category=Payment.Category.TUITION, amount=Decimal(3000),
+        )
+        for classroom in classrooms
+    ))
+    post_payments(Payment.objects.filter(status=Payment.Status.SUCCESS))
+    refresh_daily_revenue(timezone.localtime(day).date() for day in Payment.objects.datetimes("created_at", "day"))
+
+    programmes = Programme.objects.bulk_create(
+        Programme(institution=institution, name=f"Programme {n}", code=f"P{n}")
+        for institution in institutions
+        for n in range(2)
+    )
+    applications = AdmissionApplication.objects.bulk_create(
+        AdmissionApplication(
+            academic_year=years[-1], programme=programme, institution=programme.institution,
+            full_name=f"Applicant {n}", date_of_birth=datetime.date(2015, 1, 1),
+            email=f"applicant{n}@example.com", phone="9999999999", address="Synthetic",
+        )
+        for programme in programmes
+        for n in range(APPLICATIONS_PER_PROGRAMME)
+    )
+    NewsItem.objects.bulk_create(NewsItem(title=f"News {n}") for n in range(10))
+    JobOpening.objects.bulk_create(JobOpening(title=f"Job {n}", description="Synthetic") for n in range(5))
+
+    admin = User.objects.create_user(username="benchmark-admin", password="benchmark", role=User.Roles.ADMIN)
+    active_class = next(c for c in classrooms if c.academic_year_id == years[-1].pk)
+    return {
+        "admin": admin,
+        "staff": staff_users[0],
+        "parent": parent_users[0],
+        "student_user": student_users[0],
+        "institution": institutions[0],
+        "classroom": active_class,
+        "student": students_by_class[active_class.pk][0],
+        "exam": next(e for e in exams if e.classroom_id == active_class.pk),
+        "subject": subjects_by_class[active_class.pk][0],
+        "application": applications[0],
+        "students": len(students),
+    }
+
+
+@dataclass
+class ViewBudget:
+    url_name: str
+    max_queries: int
+    max_ms: float = 300
+    args: tuple[str, ...] = ()
+    # Seed key of the user to log in as; None requests the page anonymously.
+    user: str | None = "admin"
+
+    def url(self, data: dict) -> str:
+        return reverse(self.url_name, args=[data[arg].pk for arg in self.args])
+
+
+VIEW_BUDGETS = [
+    # academics
+    ViewBudget("academics:classroom_list", 8),
+    ViewBudget("academics:classroom_detail", 10, args=("classroom",)),
+    ViewBudget("academics:student_list", 8),
+    ViewBudget("academics:student_detail", 8, args=("student",)),
+    ViewBudget("academics:staff_list", 8),
+    ViewBudget("academics:subject_list", 8),
+    ViewBudget("academics:exam_list", 8),
+    ViewBudget("academics:exam_result_entry", 12, args=("exam", "subject")),
+    ViewBudget("academics:class_exam_result", 8, args=("exam",)),
+    ViewBudget("academics:progress_report", 10, args=("student",)),
+    ViewBudget("academics:attendance_roll_call", 8, args=("classroom",)),
+    ViewBudget("academics:attendance_class_summary", 8, args=("classroom",)),
+    ViewBudget("academics:attendance_student_summary", 8, args=("student",)),
+    ViewBudget("academics:low_attendance_report", 8),
+    # core
+    ViewBudget("core:home", 4, user=None),
+    ViewBudget("core:institutions", 4, user=None),
+    ViewBudget("core:institution_detail", 6, args=("institution",), user=None),
+    ViewBudget("core:career", 4, user=None),
+    ViewBudget("core:admin_dashboard", 12),
+    ViewBudget("core:staff_dashboard", 6, user="staff"),
+    ViewBudget("core:student_dashboard", 8, user="student_user"),
+    ViewBudget("core:parent_dashboard", 8, user="parent"),
+    ViewBudget("core:committee_dashboard", 10),
+    ViewBudget("core:academicyear_list", 6),
+    ViewBudget("core:institution_manage", 6),
+    # admissions
+    ViewBudget("admissions:application_list", 8),
+    ViewBudget("admissions:application_detail", 10, args=("application",)),
+    ViewBudget("admissions:programme_list", 8),
+    # payments
+    ViewBudget("payments:payment_list", 8),
+    ViewBudget("payments:defaulters_report", 10),
+]
+
+
+def measure(client, url: str, repeat: int = 3) -> tuple[int, int, float]:
+    """GET ``url`` ``repeat`` times with an empty cache.
+
+    Returns ``(status_code, queries, median_ms)``.
+    """
+    timings, queries, status = [], 0, 0
+    for _ in range(repeat):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries, status = len(ctx.captured_queries), response.status_code
+    return status, queries, statistics.median(timings)
+
+
+def format_report(rows: list[tuple[str, int, int, float, float]]) -> str:
+    """Table of ``(view, queries, max_queries, ms, max_ms)`` rows; over-budget cells are starred."""
+    width = max([len("view")] + [len(row[0]) for row in rows])
+    lines = [f"{'view':<{width}}  {'queries':>11}  {'ms':>15}", "-" * (width + 30)]
+    for name, queries, max_queries, ms, max_ms in rows:
+        query_cell = f"{queries}/{max_queries}" + ("*" if queries > max_queries else " ")
+        ms_cell = f"{ms:.1f}/{max_ms:.0f}" + ("*" if ms > max_ms else " ")
+        lines.append(f"{name:<{width}}  {query_cell:>11}  {ms_cell:>15}")
+    return "\n".join(lines)
+
+
+def measure_checkout(client, checkouts: int = 20, submits: int = 2) -> dict:
+    """POST ``checkouts`` payments, each submitted ``submits`` times with one key.
+
+    Run with ``PAYMENT_GATEWAY`` set to the stub. Returns the median and
+    worst checkout time in ms and the duplicate-order rate: gateway orders
+    beyond one per checkout, divided by the number of checkouts.
+    """
+    url = reverse("payment-list")
+    orders_before = len(get_gateway().orders)
+    timings = []
+    for _ in range(checkouts):
+        key = uuid.uuid4().hex
+        for _ in range(submits):
+            start = time.perf_counter()
+            response = client.post(
+                url, {"category": Payment.Category.DONATION, "amount": "500.00"}, HTTP_IDEMPOTENCY_KEY=key,
+            )
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code in (200, 201), response.content
+    orders = len(get_gateway().orders) - orders_before
+    return {
+        "median_ms": statistics.median(timings),
+        "max_ms": max(timings),
+        "orders": orders,
+        "duplicate_rate": (orders - checkouts) / checkouts,
+    }
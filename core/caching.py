@@ -0,0 +1,76 @@
+"""Whole-page caching for the public site.
+
+Anonymous GET requests to the public pages are served from the cache for
+``PUBLIC_PAGE_CACHE_TIMEOUT`` seconds. Every cache key embeds a version
+number; ``invalidate_public_pages`` bumps it whenever content shown on those
+pages changes (see ``core.signals``), which retires all cached pages at once
+without having to know their URLs. Logged-in users, non-GET requests and
+requests with pending flash messages always get a fresh page.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+
+PUBLIC_PAGES_VERSION_KEY = "public-pages:version"
+
+
+def public_pages_version() -> int:
+    version = cache.get(PUBLIC_PAGES_VERSION_KEY)
+    if version is None:
+        cache.add(PUBLIC_PAGES_VERSION_KEY, 1, timeout=None)
+        version = cache.get(PUBLIC_PAGES_VERSION_KEY, 1)
+    return version
+
+
+def invalidate_public_pages(**kwargs) -> None:
+    """Retire every cached public page. Usable directly as a signal receiver."""
+    try:
+        cache.incr(PUBLIC_PAGES_VERSION_KEY)
+    except ValueError:  # Not set yet (or evicted): nothing cached under a known version.
+        cache.add(PUBLIC_PAGES_VERSION_KEY, 1, timeout=None)
+
+
+def _is_cacheable(request) -> bool:
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def cache_public_page(timeout: int | None = None):
+    """Cache a view's 200 responses for anonymous visitors."""
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable(request):
+                return view_func(request, *args, **kwargs)
+
+            key = f"public-page:{public_pages_version()}:{request.get_full_path()}"
+            response = cache.get(key)
+            if response is not None:
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            if hasattr(response, "render") and callable(response.render):
+                response = response.render()
+            if response.status_code == 200 and not response.cookies:
+                cache.set(key, response, settings.PUBLIC_PAGE_CACHE_TIMEOUT if timeout is None else timeout)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+class PublicPageCacheMixin:
+    """Class-based view counterpart of ``cache_public_page``."""
+
+    cache_timeout: int | None = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return cache_public_page(cls.cache_timeout)(super().as_view(**initkwargs))
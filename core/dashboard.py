@@ -0,0 +1,48 @@
+"""Cached KPI figures for the admin dashboard.
+
+Every figure comes from conditional aggregation, one query per table
+(revenue from the daily revenue rollup, ``payments.revenue``), and the
+result is cached for ``DASHBOARD_CACHE_TIMEOUT`` seconds. Saves and
+deletes of the counted models drop the cached copy (see ``core.signals``);
+bulk writes, which send no signals, are picked up when the TTL expires.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from academics.models import StaffProfile, StudentProfile
+from admissions.models import AdmissionApplication
+from payments.models import DailyRevenue, Payment
+from sponsorship.models import SponsorshipAllocation
+
+ADMIN_METRICS_CACHE_KEY = "dashboard:admin-metrics"
+
+
+def compute_admin_metrics() -> dict:
+    applications = AdmissionApplication.objects.aggregate(
+        total_applications=Count("pk"),
+        pending_applications=Count("pk", filter=Q(status=AdmissionApplication.Status.UNDER_REVIEW)),
+    )
+    payments = DailyRevenue.objects.filter(status=Payment.Status.SUCCESS).aggregate(
+        total_payments=Sum("payments"),
+        total_revenue=Sum("amount"),
+    )
+    return {
+        "total_students": StudentProfile.objects.count(),
+        "total_staff": StaffProfile.objects.count(),
+        "pending_applications": applications["pending_applications"],
+        "total_applications": applications["total_applications"],
+        "total_payments": payments["total_payments"] or 0,
+        "total_revenue": payments["total_revenue"] or 0,
+        "active_sponsorships": SponsorshipAllocation.objects.filter(active=True).count(),
+    }
+
+
+def admin_metrics() -> dict:
+    """Dashboard figures, served from the cache when fresh."""
+    return cache.get_or_set(ADMIN_METRICS_CACHE_KEY, compute_admin_metrics, settings.DASHBOARD_CACHE_TIMEOUT)
+
+
+def invalidate_admin_metrics(**kwargs) -> None:
+    """Drop the cached figures. Usable directly as a signal receiver."""
+    cache.delete(ADMIN_METRICS_CACHE_KEY)
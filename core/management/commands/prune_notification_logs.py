@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.retention import prunable, prune_notification_logs
+
+
+class Command(BaseCommand):
+    help = "Archive notification logs older than the retention period to JSONL.gz files and delete them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Keep this many days of logs (default: NOTIFICATION_LOG_RETENTION_DAYS).",
+        )
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=5000,
+            help="Rows archived and deleted per transaction.",
+        )
+        parser.add_argument(
+            "--no-archive",
+            action="store_true",
+            help="Delete without writing archive files.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows would be pruned.",
+        )
+
+    def handle(self, *args, days=None, batch=5000, no_archive=False, dry_run=False, **options):
+        days = settings.NOTIFICATION_LOG_RETENTION_DAYS if days is None else days
+        if dry_run:
+            self.stdout.write(f"{prunable(days).count()} notification logs older than {days} days would be pruned.")
+            return
+        removed = prune_notification_logs(days, batch_size=batch, archive=not no_archive)
+        destination = "deleted" if no_archive else f"archived to {settings.NOTIFICATION_ARCHIVE_DIR}"
+        self.stdout.write(self.style.SUCCESS(f"{removed} notification logs {destination}."))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import drain_once
+
+
+class Command(BaseCommand):
+    help = "Deliver queued email/SMS notifications in rate-limited batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver everything currently due and exit instead of polling.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep between polls when nothing is due.",
+        )
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=None,
+            help="Messages claimed per channel per poll (default: NOTIFICATION_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, once=False, interval=5.0, batch=None, **options):
+        while True:
+            outcome = drain_once(batch)
+            for channel, (attempted, sent) in outcome.items():
+                if attempted:
+                    style = self.style.SUCCESS if sent == attempted else self.style.WARNING
+                    self.stdout.write(style(f"{channel}: sent {sent} of {attempted}"))
+            if not any(attempted for attempted, _ in outcome.values()):
+                if once:
+                    return
+                time.sleep(interval)
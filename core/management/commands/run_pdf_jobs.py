@@ -0,0 +1,81 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.pdf import claim_pending, html_to_pdf, render_artifact, store_rendered
+
+
+class Command(BaseCommand):
+    help = "Render queued PDFs (PDFArtifact) in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Render everything pending and exit instead of polling.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep between polls when the queue is empty.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Renderer processes (0 renders in this process).",
+        )
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=None,
+            help="Jobs claimed per poll (default: twice the worker count).",
+        )
+
+    def handle(self, *args, once=False, interval=2.0, workers=1, batch=None, **options):
+        batch = batch or max(workers, 1) * 2
+        # Children only run xhtml2pdf; don't let them inherit open DB connections.
+        connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        try:
+            while True:
+                artifacts = claim_pending(batch)
+                if not artifacts:
+                    if once:
+                        return
+                    time.sleep(interval)
+                    continue
+
+                if executor is None:
+                    rendered = [render_artifact(artifact) for artifact in artifacts]
+                else:
+                    rendered, broken = self.render_in_pool(executor, artifacts)
+                    if broken:
+                        executor.shutdown(cancel_futures=True)
+                        executor = ProcessPoolExecutor(max_workers=workers)
+
+                for artifact in rendered:
+                    style = self.style.SUCCESS if artifact.status == artifact.Status.READY else self.style.ERROR
+                    self.stdout.write(style(str(artifact)))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def render_in_pool(self, executor, artifacts):
+        futures = {executor.submit(html_to_pdf, artifact.html): artifact for artifact in artifacts}
+        rendered, broken = [], False
+        for future in as_completed(futures):
+            artifact = futures[future]
+            try:
+                pdf, error = future.result(), ""
+            except BrokenProcessPool as e:
+                pdf, error, broken = None, f"Renderer process died: {e}", True
+            except Exception as e:
+                pdf, error = None, str(e)
+            rendered.append(store_rendered(artifact, pdf, error))
+        return rendered, broken
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_charityapplication'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PDFArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('template_name', models.CharField(max_length=255)),
+                ('html', models.TextField(blank=True, help_text='Source HTML; cleared once rendered.')),
+                ('file', models.FileField(blank=True, upload_to='pdf_cache/')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Rendering'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('rendered_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'PDF Artifact',
+                'verbose_name_plural': 'PDF Artifacts',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='core_pdfart_status_28853c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0 on 2026-10-18 01:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_pdfartifact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationlog',
+            name='status',
+            field=models.CharField(choices=[('QUEUED', 'Queued'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='SENT', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(choices=[('EMAIL', 'Email'), ('SMS', 'SMS')], max_length=10)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('log', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='outbox', to='core.notificationlog')),
+            ],
+            options={
+                'verbose_name': 'Outbox Message',
+                'verbose_name_plural': 'Outbox Messages',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'channel', 'next_attempt_at'], name='core_outbox_status_ca6499_idx'), models.Index(fields=['channel', 'sent_at'], name='core_outbox_channel_75babf_idx')],
+            },
+        ),
+    ]
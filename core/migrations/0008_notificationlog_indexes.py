@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-18 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificationlog',
+            index=models.Index(fields=['created_at'], name='core_notifi_created_db2a22_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationlog',
+            index=models.Index(fields=['channel', 'created_at'], name='core_notifi_channel_96ae8f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationlog',
+            index=models.Index(fields=['to'], name='core_notifi_to_d48e14_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-18 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_notificationlog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfartifact',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pdfartifact',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -67,15 +68,26 @@ class NotificationLog(models.Model):
         (SMS, "SMS"),
     ]
 
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", _("Queued")
+        SENT = "SENT", _("Sent")
+        FAILED = "FAILED", _("Failed")
+
     channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
     to = models.CharField(max_length=255)
     subject = models.CharField(max_length=255, blank=True)
     body = models.TextField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.SENT)
     created_at = models.DateTimeField(auto_now_add=True)
     meta = models.JSONField(blank=True, null=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["channel", "created_at"]),
+            models.Index(fields=["to"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.channel} to {self.to} at {self.created_at:%Y-%m-%d %H:%M}"
@@ -192,3 +204,76 @@ class CharityApplication(models.Model):
 
     def __str__(self) -> str:
         return f"{self.full_name} - {self.get_category_display()}"
+
+
+class PDFArtifact(models.Model):
+    """A rendered PDF cached under MEDIA_ROOT, keyed by a hash of its HTML.
+
+    The HTML already contains every input that affects the document, so a
+    change to the underlying student/staff data produces a new key and the old
+    file is simply no longer requested. Rendering is done by
+    ``python manage.py run_pdf_jobs`` unless PDF_ASYNC_RENDERING is off.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", _("Pending")
+        RUNNING = "RUNNING", _("Rendering")
+        READY = "READY", _("Ready")
+        FAILED = "FAILED", _("Failed")
+
+    key = models.CharField(max_length=64, unique=True)
+    template_name = models.CharField(max_length=255)
+    html = models.TextField(blank=True, help_text=_("Source HTML; cleared once rendered."))
+    file = models.FileField(upload_to="pdf_cache/", blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    rendered_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+        verbose_name = _("PDF Artifact")
+        verbose_name_plural = _("PDF Artifacts")
+
+    def __str__(self) -> str:
+        return f"{self.template_name} [{self.key[:12]}] ({self.get_status_display()})"
+
+
+class OutboxMessage(models.Model):
+    """Delivery state of a queued notification.
+
+    The message itself (recipient, subject, body) lives on the
+    ``NotificationLog`` row; ``python manage.py run_notification_outbox``
+    sends pending messages in batches and writes the final status back to it.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", _("Pending")
+        SENDING = "SENDING", _("Sending")
+        SENT = "SENT", _("Sent")
+        FAILED = "FAILED", _("Failed")
+
+    log = models.OneToOneField(NotificationLog, on_delete=models.CASCADE, related_name="outbox")
+    channel = models.CharField(max_length=10, choices=NotificationLog.CHANNEL_CHOICES)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["next_attempt_at"]
+        indexes = [
+            models.Index(fields=["status", "channel", "next_attempt_at"]),
+            models.Index(fields=["channel", "sent_at"]),
+        ]
+        verbose_name = _("Outbox Message")
+        verbose_name_plural = _("Outbox Messages")
+
+    def __str__(self) -> str:
+        return f"{self.channel} #{self.log_id} ({self.get_status_display()})"
@@ -0,0 +1,135 @@
+"""Pluggable delivery backends for notifications, one per channel.
+
+Every backend implements ``send_many(messages)``: it takes objects with
+``to``, ``subject`` and ``body`` attributes (normally ``NotificationLog``
+rows) and returns one entry per message, ``None`` for success or an error
+string. A backend opens its connection once per call, so a batch of
+thousands of messages costs one SMTP login or one kept-alive HTTP connection.
+
+Backends are chosen per channel by ``settings.NOTIFICATION_BACKENDS``.
+"""
+import http.client
+import json
+import threading
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils.module_loading import import_string
+
+
+class BaseBackend:
+    def open(self) -> None:
+        """Acquire any connection needed for a batch."""
+
+    def close(self) -> None:
+        """Release the connection acquired by ``open``."""
+
+    def send(self, message) -> None:
+        """Deliver a single message; raise on failure."""
+        raise NotImplementedError
+
+    def send_many(self, messages) -> list[str | None]:
+        messages = list(messages)
+        try:
+            self.open()
+        except Exception as e:
+            return [f"Could not connect: {e}"] * len(messages)
+        errors = []
+        try:
+            for message in messages:
+                try:
+                    self.send(message)
+                    errors.append(None)
+                except Exception as e:
+                    errors.append(str(e))
+        finally:
+            self.close()
+        return errors
+
+
+class EmailBackend(BaseBackend):
+    """Sends through Django's EMAIL_BACKEND (SMTP, console, file, locmem) on one connection."""
+
+    def open(self):
+        self.connection = get_connection(fail_silently=False)
+        self.connection.open()
+
+    def close(self):
+        self.connection.close()
+
+    def send(self, message):
+        self.connection.send_messages([
+            EmailMessage(message.subject, message.body, settings.DEFAULT_FROM_EMAIL, [message.to], connection=self.connection)
+        ])
+
+
+class ConsoleSMSBackend(BaseBackend):
+    """Prints messages; the default SMS backend when no gateway URL is configured."""
+
+    def send(self, message):
+        print(f"[{settings.TIME_ZONE}] SMS to {message.to}: {message.body}")
+
+
+class FileSMSBackend(BaseBackend):
+    """Appends one JSON line per message to ``SMS_FILE_PATH``."""
+
+    def open(self):
+        self.file = open(settings.SMS_FILE_PATH, "a", encoding="UTF-8")
+
+    def close(self):
+        self.file.close()
+
+    def send(self, message):
+        self.file.write(json.dumps({"to": message.to, "message": message.body}) + "\n")
+
+
+class LocMemSMSBackend(BaseBackend):
+    """Keeps messages in ``LocMemSMSBackend.outbox`` as ``(to, body)``; for tests and local runs."""
+
+    outbox: list[tuple[str, str]] = []
+    _lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            LocMemSMSBackend.outbox.append((message.to, message.body))
+
+
+class HTTPSMSBackend(BaseBackend):
+    """POSTs ``{"to", "message"}`` as JSON to ``SMS_GATEWAY_API_URL`` over one kept-alive connection."""
+
+    timeout = 10
+
+    def open(self):
+        url = urlsplit(settings.SMS_GATEWAY_API_URL)
+        connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        self.connection = connection_class(url.netloc, timeout=self.timeout)
+        self.path = url.path or "/"
+        if url.query:
+            self.path += f"?{url.query}"
+
+    def close(self):
+        self.connection.close()
+
+    def send(self, message):
+        try:
+            self.connection.request(
+                "POST",
+                self.path,
+                body=json.dumps({"to": message.to, "message": message.body}),
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {settings.SMS_GATEWAY_API_KEY}",
+                },
+            )
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()  # Reconnect on the next message.
+            raise
+        if response.status >= 300:
+            raise RuntimeError(f"SMS gateway returned HTTP {response.status}")
+
+
+def get_backend(channel: str) -> BaseBackend:
+    return import_string(settings.NOTIFICATION_BACKENDS[channel])()
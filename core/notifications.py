@@ -1,40 +1,27 @@
-from django.conf import settings
-from django.core.mail import send_mail
-
+"""The one entry point for sending notifications.
+
+``send_many`` takes a list of messages (dicts with ``channel``, ``to``,
+``body`` and optional ``subject``/``meta``) and queues them with bulk
+inserts; the outbox worker hands them to the channel's backend in batches
+(see ``core.outbox`` and ``core.notification_backends``). ``send`` is the
+single-message form. ``NotificationService`` and the helpers below are thin
+wrappers kept for existing callers.
+"""
+from . import outbox
 from .models import NotificationLog
 
 
-def send_email_notification(subject: str, body: str, to_email: str, meta: dict | None = None) -> None:
-    """MVP email notification wrapper that also logs to the database."""
-    send_mail(
-        subject,
-        body,
-        settings.DEFAULT_FROM_EMAIL,
-        [to_email],
-        fail_silently=True,
-    )
-    NotificationLog.objects.create(
-        channel=NotificationLog.EMAIL,
-        to=to_email,
-        subject=subject,
-        body=body,
-        meta=meta or {},
-    )
+def send_many(messages: list[dict]) -> list[NotificationLog]:
+    return outbox.enqueue_many(messages)
 
 
-def send_sms_notification(message: str, to_phone: str, meta: dict | None = None) -> None:
-    """Placeholder SMS notification function.
+def send(channel: str, to: str, body: str, subject: str = "", meta: dict | None = None) -> NotificationLog:
+    return send_many([{"channel": channel, "to": to, "subject": subject, "body": body, "meta": meta}])[0]
 
-    Integrate with an SMS provider by using settings.SMS_GATEWAY_API_URL / API_KEY.
-    """
-    # TODO: Call external SMS API here in production.
-    NotificationLog.objects.create(
-        channel=NotificationLog.SMS,
-        to=to_phone,
-        subject="",
-        body=message,
-        meta=meta or {},
-    )
 
+def send_email_notification(subject: str, body: str, to_email: str, meta: dict | None = None) -> None:
+    send(NotificationLog.EMAIL, to_email, body, subject=subject, meta=meta)
 
 
+def send_sms_notification(message: str, to_phone: str, meta: dict | None = None) -> None:
+    send(NotificationLog.SMS, to_phone, message, meta=meta)
@@ -0,0 +1,160 @@
+"""Notification outbox: queue messages in the request, deliver them in a worker.
+
+``enqueue_many`` writes a ``NotificationLog`` row (status QUEUED) and an
+``OutboxMessage`` for every message with two bulk inserts; nothing talks to
+SMTP or the SMS gateway inside the request. ``python manage.py
+run_notification_outbox`` then drains the outbox in batches:
+
+* each batch goes to the channel's backend (``core.notification_backends``)
+  in one ``send_many`` call, so it shares one SMTP or HTTP connection;
+* each channel is held to ``NOTIFICATION_RATE_LIMITS`` messages per minute,
+  counted from the outbox itself so the limit holds across workers;
+* a failed message is retried with exponential backoff, and after
+  ``NOTIFICATION_MAX_ATTEMPTS`` it is marked FAILED;
+* a message left SENDING for ``NOTIFICATION_SEND_TIMEOUT`` by a worker that
+  died is counted as a failed attempt and retried the same way;
+* the final status is written back to the ``NotificationLog`` row.
+
+With ``NOTIFICATIONS_ASYNC`` off, queued messages are delivered right after
+the surrounding transaction commits, without a worker.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import NotificationLog, OutboxMessage
+from .notification_backends import get_backend
+
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 6 * 60 * 60
+
+
+def enqueue_many(messages: list[dict]) -> list[NotificationLog]:
+    """Queue messages given as dicts of ``channel``, ``to``, ``body`` and optional ``subject``/``meta``."""
+    logs = NotificationLog.objects.bulk_create(
+        NotificationLog(
+            channel=message["channel"],
+            to=message["to"],
+            subject=message.get("subject", ""),
+            body=message["body"],
+            meta=message.get("meta") or {},
+            status=NotificationLog.Status.QUEUED,
+        )
+        for message in messages
+    )
+    outbox = OutboxMessage.objects.bulk_create(OutboxMessage(log=log, channel=log.channel) for log in logs)
+    if outbox and not settings.NOTIFICATIONS_ASYNC:
+        ids = [message.pk for message in outbox]
+        transaction.on_commit(lambda: deliver_now(ids))
+    return logs
+
+
+def backoff(attempts: int) -> datetime.timedelta:
+    """Delay before retry number ``attempts``: 30s, 1m, 2m, 4m, ... capped at 6h."""
+    return datetime.timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def _record(batch: list[OutboxMessage], results: dict[int, str | None]) -> None:
+    now = timezone.now()
+    sent, failed_logs = [], []
+    for message in batch:
+        error = results.get(message.pk, "Not attempted.")
+        message.attempts += 1
+        if error is None:
+            message.status, message.sent_at, message.last_error = OutboxMessage.Status.SENT, now, ""
+            sent.append(message.log_id)
+        else:
+            message.last_error = error
+            if message.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+                message.status = OutboxMessage.Status.FAILED
+                failed_logs.append(message.log_id)
+            else:
+                message.status = OutboxMessage.Status.PENDING
+                message.next_attempt_at = now + backoff(message.attempts)
+    OutboxMessage.objects.bulk_update(batch, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"])
+    NotificationLog.objects.filter(pk__in=sent).update(status=NotificationLog.Status.SENT)
+    NotificationLog.objects.filter(pk__in=failed_logs).update(status=NotificationLog.Status.FAILED)
+
+
+def deliver(batch: list[OutboxMessage]) -> int:
+    """Send claimed messages of one channel and record the outcome. Returns the number sent."""
+    if not batch:
+        return 0
+    errors = get_backend(batch[0].channel).send_many([message.log for message in batch])
+    results = {message.pk: error for message, error in zip(batch, errors)}
+    _record(batch, results)
+    return sum(error is None for error in results.values())
+
+
+def _claim(pks) -> list[int]:
+    """Move the given PENDING messages to SENDING, one conditional UPDATE each."""
+    now = timezone.now()
+    return [
+        pk for pk in pks
+        if OutboxMessage.objects.filter(pk=pk, status=OutboxMessage.Status.PENDING).update(
+            status=OutboxMessage.Status.SENDING, claimed_at=now,
+        )
+    ]
+
+
+def claim(channel: str, limit: int) -> list[OutboxMessage]:
+    """Move up to ``limit`` due messages of a channel to SENDING and return them.
+
+    Each claim is a conditional UPDATE, so several workers can share the outbox.
+    """
+    if limit <= 0:
+        return []
+    due = OutboxMessage.objects.filter(
+        status=OutboxMessage.Status.PENDING, channel=channel, next_attempt_at__lte=timezone.now(),
+    ).order_by("next_attempt_at", "pk")
+    claimed = _claim(due.values_list("pk", flat=True)[:limit])
+    return list(OutboxMessage.objects.filter(pk__in=claimed).select_related("log").order_by("next_attempt_at", "pk"))
+
+
+def reclaim_stale() -> int:
+    """Return messages stuck in SENDING to the queue; their worker is presumed dead.
+
+    A claim older than NOTIFICATION_SEND_TIMEOUT counts as a failed attempt,
+    so the message is retried with the usual backoff, or marked FAILED once
+    it runs out of attempts.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=settings.NOTIFICATION_SEND_TIMEOUT)
+    stale = list(OutboxMessage.objects.filter(status=OutboxMessage.Status.SENDING, claimed_at__lt=cutoff))
+    _record(stale, {message.pk: "Delivery interrupted; the worker stopped before recording a result." for message in stale})
+    return len(stale)
+
+
+def remaining_allowance(channel: str) -> int:
+    """Messages this channel may still send in the current one-minute window."""
+    limit = settings.NOTIFICATION_RATE_LIMITS.get(channel)
+    if not limit:
+        return settings.NOTIFICATION_BATCH_SIZE
+    window_start = timezone.now() - datetime.timedelta(minutes=1)
+    return limit - OutboxMessage.objects.filter(channel=channel, sent_at__gte=window_start).count()
+
+
+def drain_once(batch_size: int | None = None) -> dict[str, tuple[int, int]]:
+    """Deliver one batch per channel within its rate limit.
+
+    Returns ``{channel: (attempted, sent)}``.
+    """
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    reclaim_stale()
+    outcome = {}
+    for channel in settings.NOTIFICATION_BACKENDS:
+        batch = claim(channel, min(batch_size, remaining_allowance(channel)))
+        outcome[channel] = (len(batch), deliver(batch))
+    return outcome
+
+
+def deliver_now(ids: list[int]) -> int:
+    """Deliver specific queued messages immediately (NOTIFICATIONS_ASYNC off)."""
+    delivered = 0
+    for channel in settings.NOTIFICATION_BACKENDS:
+        pks = _claim(OutboxMessage.objects.filter(
+            pk__in=ids, channel=channel, status=OutboxMessage.Status.PENDING,
+        ).values_list("pk", flat=True))
+        delivered += deliver(list(OutboxMessage.objects.filter(pk__in=pks).select_related("log")))
+    return delivered
@@ -0,0 +1,32 @@
+"""Keyset ("seek") pagination for HTML list views.
+
+Pages are addressed by the last key seen (``?after=``) or the first key of
+the page after the one wanted (``?before=``) instead of an offset, so page
+500 costs the same index range scan as page 1 and no COUNT(*) is needed.
+The key must be unique, and should be indexed together with any filters.
+"""
+
+
+def keyset_page(queryset, key: str, size: int, after=None, before=None) -> dict:
+    """Fetch one page of ``queryset`` ordered by ``key``.
+
+    Returns the page's ``object_list`` plus ``has_next``/``has_previous`` and
+    the ``next_key``/``previous_key`` to put in the ``after``/``before`` links.
+    """
+    if before not in (None, ""):
+        rows = list(queryset.filter(**{f"{key}__lt": before}).order_by(f"-{key}")[:size + 1])
+        has_previous, has_next = len(rows) > size, True
+        rows = rows[:size][::-1]
+    else:
+        if after not in (None, ""):
+            queryset = queryset.filter(**{f"{key}__gt": after})
+        rows = list(queryset.order_by(key)[:size + 1])
+        has_previous, has_next = after not in (None, ""), len(rows) > size
+        rows = rows[:size]
+    return {
+        "object_list": rows,
+        "has_next": has_next and bool(rows),
+        "has_previous": has_previous and bool(rows),
+        "next_key": getattr(rows[-1], key) if rows else None,
+        "previous_key": getattr(rows[0], key) if rows else None,
+    }
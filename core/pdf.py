@@ -0,0 +1,260 @@
+"""Queued, cached PDF rendering.
+
+Views render their template to HTML (cheap) and hand it to ``pdf_response``.
+The HTML is hashed; if a PDF for that hash is already on disk it is served
+straight away, otherwise a ``PDFArtifact`` job is queued and the browser gets
+a "preparing" page that refreshes until the worker has rendered it. The
+worker (``run_pdf_jobs``) converts HTML to PDF with xhtml2pdf in a process
+pool, so the web workers never run xhtml2pdf themselves.
+"""
+import datetime
+import hashlib
+import zipfile
+from io import BytesIO
+from itertools import groupby
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError
+from django.db.models import F
+from django.http import FileResponse, HttpResponse
+from django.shortcuts import render
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.text import slugify
+from pypdf import PdfWriter
+from xhtml2pdf import pisa
+
+from .models import PDFArtifact
+
+
+def render_html(template_src: str, context: dict) -> str:
+    return get_template(template_src).render(context)
+
+
+def html_to_pdf(html: str) -> bytes | None:
+    """Convert HTML to PDF bytes; ``None`` if xhtml2pdf reports an error.
+
+    Pure function with no database access, safe to run in a child process.
+    """
+    result = BytesIO()
+    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
+    if pdf.err:
+        return None
+    return result.getvalue()
+
+
+def content_key(template_src: str, html: str) -> str:
+    digest = hashlib.sha256(template_src.encode("UTF-8"))
+    digest.update(b"\0")
+    digest.update(html.encode("UTF-8"))
+    return digest.hexdigest()
+
+
+def _requeue(artifact: PDFArtifact, html: str, **changes) -> PDFArtifact:
+    """Put an artifact back in the queue unless another request already did."""
+    requeued = PDFArtifact.objects.filter(pk=artifact.pk, status=artifact.status).update(
+        html=html, status=PDFArtifact.Status.PENDING, **changes
+    )
+    artifact.refresh_from_db(fields=["html", "status", "attempts"] if requeued else None)
+    return artifact
+
+
+def reclaim_stale(queryset=None) -> int:
+    """Re-queue renders left RUNNING longer than PDF_RENDER_TIMEOUT.
+
+    Their worker is assumed to have crashed. One that has already used up
+    PDF_MAX_ATTEMPTS is marked FAILED instead, so a document that keeps
+    killing the renderer is not retried forever. Bundles have no HTML and are
+    rebuilt by the next request, so they are left alone.
+    """
+    now = timezone.now()
+    cutoff = now - datetime.timedelta(seconds=settings.PDF_RENDER_TIMEOUT)
+    stale = (queryset if queryset is not None else PDFArtifact.objects.all()).filter(
+        status=PDFArtifact.Status.RUNNING, started_at__lt=cutoff,
+    ).exclude(html="")
+    failed = stale.filter(attempts__gte=settings.PDF_MAX_ATTEMPTS).update(
+        status=PDFArtifact.Status.FAILED, error="Render timed out; the worker may have crashed.", rendered_at=now,
+    )
+    return failed + stale.update(status=PDFArtifact.Status.PENDING)
+
+
+def get_or_enqueue(template_src: str, html: str) -> PDFArtifact:
+    """Return the artifact for this HTML, queueing a render if it is new.
+
+    A failed render is queued again while it has attempts left
+    (PDF_MAX_ATTEMPTS), and with a fresh set of attempts once PDF_RETRY_AFTER
+    seconds have passed since the last one.
+    """
+    key = content_key(template_src, html)
+    try:
+        artifact, _ = PDFArtifact.objects.get_or_create(
+            key=key,
+            defaults={"template_name": template_src, "html": html},
+        )
+    except IntegrityError:  # Lost a race with a concurrent request for the same document.
+        artifact = PDFArtifact.objects.get(key=key)
+
+    now = timezone.now()
+    if artifact.status == PDFArtifact.Status.READY and not artifact.file.storage.exists(artifact.file.name):
+        # The cached file was removed from MEDIA_ROOT; render it again.
+        return _requeue(artifact, html, attempts=0)
+    if artifact.status == PDFArtifact.Status.FAILED:
+        if artifact.attempts < settings.PDF_MAX_ATTEMPTS:
+            return _requeue(artifact, html)
+        if artifact.rendered_at and artifact.rendered_at < now - datetime.timedelta(seconds=settings.PDF_RETRY_AFTER):
+            return _requeue(artifact, html, attempts=0)
+    if (
+        artifact.status == PDFArtifact.Status.RUNNING and artifact.started_at
+        and artifact.started_at < now - datetime.timedelta(seconds=settings.PDF_RENDER_TIMEOUT)
+    ):
+        reclaim_stale(PDFArtifact.objects.filter(pk=artifact.pk))
+        artifact.refresh_from_db()
+    return artifact
+
+
+def store_rendered(artifact: PDFArtifact, pdf: bytes | None, error: str = "", extension: str = "pdf") -> PDFArtifact:
+    """Save the outcome of a render onto the artifact, as ``<key>.<extension>``."""
+    if pdf is None:
+        artifact.status = PDFArtifact.Status.FAILED
+        artifact.error = error or "xhtml2pdf reported an error."
+    else:
+        artifact.file.save(f"{artifact.key}.{extension}", ContentFile(pdf), save=False)
+        artifact.status = PDFArtifact.Status.READY
+        artifact.error = ""
+        artifact.html = ""
+    artifact.rendered_at = timezone.now()
+    artifact.save(update_fields=["file", "status", "error", "html", "rendered_at"])
+    return artifact
+
+
+def render_artifact(artifact: PDFArtifact) -> PDFArtifact:
+    """Render an artifact in the current process."""
+    try:
+        pdf = html_to_pdf(artifact.html)
+    except Exception as e:
+        return store_rendered(artifact, None, str(e))
+    return store_rendered(artifact, pdf)
+
+
+def _claim(queryset) -> int:
+    return queryset.filter(status=PDFArtifact.Status.PENDING).update(
+        status=PDFArtifact.Status.RUNNING, started_at=timezone.now(), attempts=F("attempts") + 1,
+    )
+
+
+def claim_pending(limit: int) -> list[PDFArtifact]:
+    """Move up to ``limit`` pending artifacts to RUNNING and return them.
+
+    Renders abandoned by a crashed worker are re-queued first. Each claim is a
+    conditional UPDATE, so several workers can share the queue.
+    """
+    reclaim_stale()
+    claimed = []
+    candidates = PDFArtifact.objects.filter(status=PDFArtifact.Status.PENDING).order_by("created_at", "pk")
+    for pk in candidates.values_list("pk", flat=True)[:limit]:
+        if _claim(PDFArtifact.objects.filter(pk=pk)):
+            claimed.append(PDFArtifact.objects.get(pk=pk))
+    return claimed
+
+
+def _render_now_if_sync(artifact: PDFArtifact) -> PDFArtifact:
+    """With PDF_ASYNC_RENDERING off, render a pending artifact in this request."""
+    if artifact.status != PDFArtifact.Status.PENDING or settings.PDF_ASYNC_RENDERING:
+        return artifact
+    if not _claim(PDFArtifact.objects.filter(pk=artifact.pk)):
+        return artifact
+    artifact.attempts += 1
+    return render_artifact(artifact)
+
+
+def _file_response(artifact: PDFArtifact, filename: str, attachment: bool = True, content_type: str = "application/pdf"):
+    return FileResponse(
+        artifact.file.open("rb"),
+        as_attachment=attachment,
+        filename=filename,
+        content_type=content_type,
+    )
+
+
+def pdf_response(request, template_src: str, context: dict, filename: str, attachment: bool = True) -> HttpResponse:
+    """Serve a cached PDF for ``template_src`` rendered with ``context``."""
+    html = render_html(template_src, context)
+    artifact = _render_now_if_sync(get_or_enqueue(template_src, html))
+
+    if artifact.status == PDFArtifact.Status.READY:
+        return _file_response(artifact, filename, attachment)
+    if artifact.status == PDFArtifact.Status.FAILED:
+        return HttpResponse("Error generating PDF", status=500)
+    return render(request, "core/pdf_pending.html", {"filename": filename}, status=202)
+
+
+def chunked(items, size: int):
+    """Split a sequence into lists of at most ``size`` items."""
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _merge(artifacts: list[PDFArtifact]) -> bytes:
+    writer = PdfWriter()
+    for artifact in artifacts:
+        with artifact.file.open("rb") as f:
+            writer.append(BytesIO(f.read()))
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def _build_bundle(parts: list[tuple[str, PDFArtifact]], as_zip: bool) -> bytes:
+    ready = [(label, a) for label, a in parts if a.status == PDFArtifact.Status.READY]
+    if not as_zip:
+        return _merge([a for _, a in ready])
+
+    output = BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        for label, group in groupby(ready, key=lambda part: part[0]):
+            archive.writestr(f"{slugify(label) or 'part'}.pdf", _merge([a for _, a in group]))
+        failed = [f"{label}: {a.error}" for label, a in parts if a.status == PDFArtifact.Status.FAILED]
+        if failed:
+            archive.writestr("FAILED.txt", "\n".join(failed) + "\n")
+    return output.getvalue()
+
+
+def pdf_bundle_response(request, template_src: str, parts: list[tuple[str, dict]], filename: str, as_zip: bool = False) -> HttpResponse:
+    """Serve many documents rendered as independent chunks, merged into one file.
+
+    ``parts`` is a list of ``(label, context)`` in output order. Each chunk is
+    its own cached artifact, so chunks render in parallel on the worker pool,
+    unchanged chunks are reused, and a chunk that fails to render is left out
+    instead of failing the whole bundle (its label is reported in the
+    ``X-PDF-Failed-Parts`` header, and in FAILED.txt for ZIPs). With
+    ``as_zip`` the chunks are merged per label and returned as a ZIP.
+    """
+    artifacts = [
+        (label, _render_now_if_sync(get_or_enqueue(template_src, render_html(template_src, context))))
+        for label, context in parts
+    ]
+    done = sum(a.status in (PDFArtifact.Status.READY, PDFArtifact.Status.FAILED) for _, a in artifacts)
+    if done < len(artifacts):
+        context = {"filename": filename, "done": done, "total": len(artifacts)}
+        return render(request, "core/pdf_pending.html", context, status=202)
+
+    if not any(a.status == PDFArtifact.Status.READY for _, a in artifacts):
+        return HttpResponse("Error generating PDF", status=500)
+    failed = sorted({label for label, a in artifacts if a.status == PDFArtifact.Status.FAILED})
+
+    bundle_key = content_key(
+        f"bundle:{'zip' if as_zip else 'pdf'}:{template_src}",
+        "\n".join(f"{label}\t{a.key}" for label, a in artifacts),
+    )
+    bundle, created = PDFArtifact.objects.get_or_create(
+        key=bundle_key,
+        defaults={"template_name": f"bundle:{template_src}", "status": PDFArtifact.Status.RUNNING},
+    )
+    if created or not bundle.file or not bundle.file.storage.exists(bundle.file.name):
+        bundle = store_rendered(bundle, _build_bundle(artifacts, as_zip), extension="zip" if as_zip else "pdf")
+
+    response = _file_response(bundle, filename, content_type="application/zip" if as_zip else "application/pdf")
+    if failed:
+        response["X-PDF-Failed-Parts"] = ", ".join(failed)
+    return response
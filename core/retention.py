@@ -0,0 +1,84 @@
+"""Retention for ``NotificationLog``.
+
+Rows older than the retention period are deleted in primary-key batches,
+so memory and lock time stay flat however large the table is, and written
+to gzip-compressed JSONL files under ``NOTIFICATION_ARCHIVE_DIR`` (one file
+per month of ``created_at``, appended to on every run). A batch is appended
+to the monthly files only once its delete has committed, so a failed delete
+never leaves rows both archived and still in the table (to be archived
+again next run). Until then it waits in a staging file beside them; one
+left behind by a crash after the commit still holds those rows. Messages
+still waiting in the outbox are never pruned.
+"""
+import datetime
+import gzip
+import json
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import NotificationLog
+
+ARCHIVE_FIELDS = ["id", "channel", "to", "subject", "body", "status", "created_at", "meta"]
+
+
+def archive_path(month: datetime.date) -> Path:
+    return Path(settings.NOTIFICATION_ARCHIVE_DIR) / f"notifications-{month:%Y-%m}.jsonl.gz"
+
+
+def _stage(rows: list[dict]) -> Path:
+    path = Path(settings.NOTIFICATION_ARCHIVE_DIR) / f"staging-{uuid.uuid4().hex}.jsonl.gz"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="UTF-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+    return path
+
+
+def _archive_staged(rows: list[dict], staged: Path) -> None:
+    _write_archive(rows)
+    staged.unlink(missing_ok=True)
+
+
+def _write_archive(rows: list[dict]) -> None:
+    by_month: dict[datetime.date, list[dict]] = {}
+    for row in rows:
+        by_month.setdefault(row["created_at"].date().replace(day=1), []).append(row)
+    for month, month_rows in by_month.items():
+        path = archive_path(month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Appending adds a new gzip member; gzip readers see one continuous stream.
+        with gzip.open(path, "at", encoding="UTF-8") as f:
+            for row in month_rows:
+                f.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+
+
+def prunable(days: int):
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    return NotificationLog.objects.filter(created_at__lt=cutoff).exclude(status=NotificationLog.Status.QUEUED)
+
+
+def prune_notification_logs(days: int, batch_size: int = 5000, archive: bool = True) -> int:
+    """Archive (unless ``archive`` is False) and delete logs older than ``days``. Returns rows removed."""
+    queryset = prunable(days).order_by("pk")
+    removed, last_pk = 0, 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk).values(*ARCHIVE_FIELDS)[:batch_size])
+        if not rows:
+            return removed
+        last_pk = rows[-1]["id"]
+        staged = _stage(rows) if archive else None
+        try:
+            with transaction.atomic():
+                NotificationLog.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+                if staged:
+                    transaction.on_commit(lambda rows=rows, staged=staged: _archive_staged(rows, staged))
+        except Exception:
+            if staged:
+                staged.unlink(missing_ok=True)
+            raise
+        removed += len(rows)
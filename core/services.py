@@ -1,4 +1,4 @@
-from django.conf import settings
+from . import notifications
 from .models import NotificationLog
 
 class NotificationService:
@@ -7,55 +7,28 @@ class NotificationService:
     @staticmethod
     def send_sms(to_number: str, message: str, meta: dict = None):
         """
-        Send an SMS to the given number.
-        For MVP, this logs to the database and console.
+        Queue an SMS to the given number; the outbox worker delivers it.
         """
-        # In a real app, integrate Twilio/AWS SNS/local gateway here.
-        # e.g., requests.post(settings.SMS_GATEWAY_URL, ...)
-        
-        print(f"[{settings.TIME_ZONE}] SMS to {to_number}: {message}")
-        
-        NotificationLog.objects.create(
-            channel=NotificationLog.SMS,
-            to=to_number,
-            body=message,
-            meta=meta or {}
-        )
+        notifications.send(NotificationLog.SMS, to_number, message, meta=meta)
 
     @staticmethod
     def send_email(to_email: str, subject: str, message: str, meta: dict = None):
         """
-        Send an email.
+        Queue an email; the outbox worker delivers it and records failures.
         """
-        # Use Django's send_mail
-        from django.core.mail import send_mail
-        
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [to_email],
-                fail_silently=False,
-            )
-            # Log successful attempt
-            NotificationLog.objects.create(
-                channel=NotificationLog.EMAIL,
-                to=to_email,
-                subject=subject,
-                body=message,
-                meta=meta or {"status": "sent"}
-            )
-        except Exception as e:
-            # Log failure
-            print(f"Failed to send email to {to_email}: {e}")
-            NotificationLog.objects.create(
-                channel=NotificationLog.EMAIL,
-                to=to_email,
-                subject=subject,
-                body=f"FAILED: {message}",
-                meta=meta or {"error": str(e)}
-            )
+        notifications.send(NotificationLog.EMAIL, to_email, message, subject=subject, meta=meta)
+
+    @staticmethod
+    def send_sms_many(messages: list[tuple[str, str, dict]]) -> int:
+        """
+        Queue many SMS messages at once; ``messages`` holds ``(to_number, message, meta)``.
+        The NotificationLog and outbox rows are written with bulk inserts.
+        """
+        notifications.send_many([
+            {"channel": NotificationLog.SMS, "to": to_number, "body": message, "meta": meta}
+            for to_number, message, meta in messages
+        ])
+        return len(messages)
 
     @classmethod
     def send_attendance_alert(cls, student, date, status):
@@ -63,17 +36,49 @@ class NotificationService:
         Send an alert to the parent regarding student attendance.
         """
         if status == 'A': # Absent
-            # Find parent phone
-            # Assuming student.parents.first() gets the primary guardian
-            parent = student.parents.first()
-            if parent and parent.user.phone:
-                message = (
-                    f"Alert: Your ward {student.user.get_full_name()} "
-                    f"was marked ABSENT on {date}. "
-                    f"Please contact the admin if this is an error."
-                )
-                cls.send_sms(
-                    to_number=parent.user.phone, 
-                    message=message,
-                    meta={"student_id": student.id, "type": "attendance_alert"}
-                )
+            cls.send_attendance_alerts([student.pk], date)
+
+    @classmethod
+    def send_attendance_alerts(cls, student_ids, date) -> int:
+        """
+        Alert parents of every absent student in ``student_ids`` for ``date``.
+
+        The primary guardian of each student (the first linked parent, as
+        before) and their phone number are resolved with one query. A parent
+        with several absent wards gets a single message naming all of them.
+        Returns the number of messages sent.
+        """
+        from academics.models import StudentProfile
+
+        links = (
+            StudentProfile.parents.through.objects
+            .filter(studentprofile_id__in=list(student_ids))
+            .select_related('parentprofile__user', 'studentprofile__user')
+            .order_by('studentprofile_id', 'parentprofile_id')
+        )
+        wards_by_phone = {}
+        seen_students = set()
+        for link in links:
+            if link.studentprofile_id in seen_students:
+                continue  # Only the primary guardian is alerted.
+            seen_students.add(link.studentprofile_id)
+            phone = link.parentprofile.user.phone
+            if phone:
+                wards_by_phone.setdefault(phone, []).append(link.studentprofile)
+
+        messages = []
+        for phone, wards in wards_by_phone.items():
+            names = [ward.user.get_full_name() for ward in wards]
+            if len(names) == 1:
+                who = f"Your ward {names[0]} was"
+            else:
+                who = f"Your wards {', '.join(names[:-1])} and {names[-1]} were"
+            message = (
+                f"Alert: {who} marked ABSENT on {date}. "
+                f"Please contact the admin if this is an error."
+            )
+            meta = {"student_ids": [ward.id for ward in wards], "type": "attendance_alert"}
+            if len(wards) == 1:
+                meta["student_id"] = wards[0].id
+            messages.append((phone, message, meta))
+        return cls.send_sms_many(messages)
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+
+from academics.models import ClassRoom, StaffProfile, StudentProfile
+from admissions.models import AdmissionApplication
+from payments.models import Payment
+from sponsorship.models import SponsorshipAllocation
+
+from .caching import invalidate_public_pages
+from .dashboard import invalidate_admin_metrics
+from .models import AcademicYear, Institution, JobOpening, NewsItem
+
+for model in (StudentProfile, StaffProfile, AdmissionApplication, Payment, SponsorshipAllocation):
+    post_save.connect(invalidate_admin_metrics, sender=model, dispatch_uid=f"admin-metrics-save-{model.__name__}")
+    post_delete.connect(invalidate_admin_metrics, sender=model, dispatch_uid=f"admin-metrics-delete-{model.__name__}")
+
+# Content shown on the cached public pages (home, institutions, careers).
+for model in (NewsItem, Institution, JobOpening, ClassRoom, AcademicYear):
+    post_save.connect(invalidate_public_pages, sender=model, dispatch_uid=f"public-pages-save-{model.__name__}")
+    post_delete.connect(invalidate_public_pages, sender=model, dispatch_uid=f"public-pages-delete-{model.__name__}")
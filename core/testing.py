@@ -0,0 +1,35 @@
+"""Test helpers for query-count regressions.
+
+``QueryCountMixin`` is mixed into ``TestCase`` classes to assert that a page
+runs the same number of queries however many rows it shows, which is what
+catches an N+1 query before it ships.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin:
+    def get_and_count(self, url: str, params: dict | None = None):
+        """GET ``url`` with an empty cache; return ``(response, query_count)``."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200, url)
+        return response, len(ctx.captured_queries)
+
+    def assertQueriesDoNotScale(self, url: str, grow, params: dict | None = None):
+        """Fetch ``url``, call ``grow()`` to add more rows, fetch again.
+
+        Fails if the second request ran a different number of queries.
+        ``grow`` should add more of every repeated row the page renders.
+        """
+        _, before = self.get_and_count(url, params)
+        grow()
+        _, after = self.get_and_count(url, params)
+        if before != after:
+            self.fail(
+                f"{url} ran {before} queries, then {after} after adding rows: "
+                f"some query runs once per row (N+1)."
+            )
+        return after
@@ -1,3 +1,511 @@
-from django.test import TestCase
+import datetime
+import gzip
+import json
+import os
+import shutil
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+from django.utils import timezone
+from pypdf import PdfReader
+
+from academics.models import ClassRoom, ParentProfile
+from academics.tests import make_classroom, make_student
+from accounts.models import User
+
+from . import benchmark, outbox
+from .caching import PUBLIC_PAGES_VERSION_KEY
+from .dashboard import ADMIN_METRICS_CACHE_KEY, admin_metrics
+from .notification_backends import BaseBackend, FileSMSBackend, HTTPSMSBackend, LocMemSMSBackend
+from .models import AcademicYear, Institution, NewsItem, NotificationLog, OutboxMessage, PDFArtifact
+from .pdf import claim_pending
+from .retention import archive_path
+from .services import NotificationService
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class PDFRenderingTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.admin = User.objects.create_user(username="admin", password="pw", role=User.Roles.ADMIN)
+        self.client.force_login(self.admin)
+        self.student = make_student(make_classroom(), 1)
+        self.url = reverse("academics:student_id_card", args=[self.student.pk])
+
+    def run_worker(self, workers=0):
+        call_command("run_pdf_jobs", once=True, workers=workers, stdout=StringIO())
+
+    @override_settings(PDF_ASYNC_RENDERING=True)
+    def test_pdf_is_queued_then_served_from_cache(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(PDFArtifact.objects.get().status, PDFArtifact.Status.PENDING)
+
+        self.run_worker()
+        artifact = PDFArtifact.objects.get()
+        self.assertEqual(artifact.status, PDFArtifact.Status.READY)
+        self.assertEqual(artifact.html, "")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+        self.assertEqual(PDFArtifact.objects.count(), 1)
+
+    @override_settings(PDF_ASYNC_RENDERING=True)
+    def test_changed_data_gets_a_new_artifact(self):
+        self.client.get(self.url)
+        self.run_worker()
+        self.student.user.first_name = "Renamed"
+        self.student.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 202)
+        self.assertEqual(PDFArtifact.objects.count(), 2)
+
+    @override_settings(PDF_ASYNC_RENDERING=True)
+    def test_worker_renders_in_process_pool(self):
+        self.client.get(self.url)
+        self.run_worker(workers=1)
+        self.assertEqual(PDFArtifact.objects.get().status, PDFArtifact.Status.READY)
+
+    @override_settings(PDF_ASYNC_RENDERING=False)
+    def test_synchronous_mode_renders_in_request(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(PDFArtifact.objects.get().status, PDFArtifact.Status.READY)
+
+    @override_settings(PDF_ASYNC_RENDERING=True, PDF_MAX_ATTEMPTS=2)
+    def test_failed_render_is_retried_until_attempts_run_out(self):
+        with mock.patch("core.pdf.html_to_pdf", return_value=None):
+            for _ in range(2):
+                self.assertEqual(self.client.get(self.url).status_code, 202)
+                self.run_worker()
+        artifact = PDFArtifact.objects.get()
+        self.assertEqual((artifact.status, artifact.attempts), (PDFArtifact.Status.FAILED, 2))
+        self.assertEqual(self.client.get(self.url).status_code, 500)
+
+        PDFArtifact.objects.update(rendered_at=timezone.now() - datetime.timedelta(hours=2))
+        self.assertEqual(self.client.get(self.url).status_code, 202)
+        self.run_worker()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @override_settings(PDF_ASYNC_RENDERING=True, PDF_RENDER_TIMEOUT=60)
+    def test_render_abandoned_by_crashed_worker_is_requeued(self):
+        self.client.get(self.url)
+        claimed = claim_pending(10)  # The worker dies before storing the result.
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(self.client.get(self.url).status_code, 202)
+        self.assertEqual(claim_pending(10), [])
+
+        PDFArtifact.objects.update(started_at=timezone.now() - datetime.timedelta(minutes=5))
+        self.run_worker()
+        artifact = PDFArtifact.objects.get()
+        self.assertEqual((artifact.status, artifact.attempts), (PDFArtifact.Status.READY, 2))
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+@mock.patch("academics.views.ID_CARD_CHUNK_SIZE", 2)
+class BulkIDCardTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.admin = User.objects.create_user(username="admin", password="pw", role=User.Roles.ADMIN)
+        self.client.force_login(self.admin)
+        class_a, class_b = make_classroom("10", "A"), make_classroom("10", "B")
+        for n in range(3):
+            make_student(class_a, n)
+        make_student(class_b, 0)
+        self.url = reverse("academics:student_id_card_bulk")
+
+    def run_worker(self):
+        call_command("run_pdf_jobs", once=True, workers=0, stdout=StringIO())
+
+    @override_settings(PDF_ASYNC_RENDERING=True)
+    def test_chunks_are_queued_separately_then_merged(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertContains(response, "0 of 3 parts ready", status_code=202)
+        self.assertEqual(PDFArtifact.objects.filter(status=PDFArtifact.Status.PENDING).count(), 3)
+
+        self.run_worker()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        merged = PdfReader(BytesIO(b"".join(response.streaming_content)))
+        parts = PDFArtifact.objects.filter(template_name="academics/pdf/student_id.html")
+        self.assertEqual(len(merged.pages), sum(len(PdfReader(a.file.path).pages) for a in parts))
+
+        # The merged file itself is cached.
+        self.client.get(self.url)
+        self.assertEqual(PDFArtifact.objects.filter(template_name__startswith="bundle:").count(), 1)
+
+    @override_settings(PDF_ASYNC_RENDERING=False, PDF_MAX_ATTEMPTS=1)
+    def test_zip_has_one_pdf_per_class_and_skips_failed_chunks(self):
+        self.client.get(self.url)  # Renders every chunk inline.
+        failed = PDFArtifact.objects.filter(template_name="academics/pdf/student_id.html").order_by("pk").last()
+        PDFArtifact.objects.filter(pk=failed.pk).update(status=PDFArtifact.Status.FAILED, error="boom")
+
+        response = self.client.get(self.url, {"format": "zip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        self.assertIn("AMA 10 - B", response["X-PDF-Failed-Parts"])
+        archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), ["ama-10-a-2025-26.pdf", "FAILED.txt"])
+        self.assertIn("boom", archive.read("FAILED.txt").decode())
+        bundle = PDFArtifact.objects.get(template_name__startswith="bundle:", file__endswith=".zip")
+        self.assertTrue(bundle.file.name.endswith(f"{bundle.key}.zip"))
+
+    @override_settings(PDF_ASYNC_RENDERING=False)
+    def test_same_class_name_in_two_institutions_gets_two_files(self):
+        other = Institution.objects.create(code="AHS", name="Adabiyya High School")
+        year = AcademicYear.objects.get()
+        make_student(ClassRoom.objects.create(institution=other, academic_year=year, standard="10", division="A"), 0)
+
+        response = self.client.get(self.url, {"format": "zip"})
+        archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), ["ahs-10-a-2025-26.pdf", "ama-10-a-2025-26.pdf", "ama-10-b-2025-26.pdf"])
+
+    @override_settings(PDF_ASYNC_RENDERING=False, PDF_MAX_ATTEMPTS=1)
+    def test_all_chunks_failed(self):
+        self.client.get(self.url)
+        PDFArtifact.objects.update(status=PDFArtifact.Status.FAILED)
+        self.assertEqual(self.client.get(self.url).status_code, 500)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class AdminDashboardMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.classroom = make_classroom()
+        make_student(self.classroom, 1)
+
+    def test_metrics_are_cached(self):
+        with self.assertNumQueries(5):
+            self.assertEqual(admin_metrics()["total_students"], 1)
+        with self.assertNumQueries(0):
+            admin_metrics()
+
+    def test_saving_a_counted_model_invalidates(self):
+        admin_metrics()
+        make_student(self.classroom, 2)
+        self.assertIsNone(cache.get(ADMIN_METRICS_CACHE_KEY))
+        self.assertEqual(admin_metrics()["total_students"], 2)
+
+    def test_dashboard_view(self):
+        admin = User.objects.create_user(username="admin", password="pw", role=User.Roles.ADMIN)
+        self.client.force_login(admin)
+        response = self.client.get(reverse("core:admin_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["total_students"], 1)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class PublicPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        NewsItem.objects.create(title="Admissions open")
+        self.url = reverse("core:home")
+
+    def test_anonymous_page_is_served_from_cache(self):
+        self.assertContains(self.client.get(self.url), "Admissions open")
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(self.url), "Admissions open")
+
+    def test_content_change_invalidates(self):
+        self.client.get(self.url)
+        version = cache.get(PUBLIC_PAGES_VERSION_KEY)
+        NewsItem.objects.create(title="Results published")
+        self.assertEqual(cache.get(PUBLIC_PAGES_VERSION_KEY), version + 1)
+        self.assertContains(self.client.get(self.url), "Results published")
+
+    def test_logged_in_users_are_not_cached(self):
+        self.client.get(self.url)
+        user = User.objects.create_user(username="visitor", password="pw", role=User.Roles.APPLICANT)
+        self.client.force_login(user)
+        response = self.client.get(self.url)
+        self.assertContains(response, "logout-form")
+
+
+class AttendanceAlertTests(TestCase):
+    def setUp(self):
+        classroom = make_classroom()
+        self.students = [make_student(classroom, n) for n in range(4)]
+        self.date = datetime.date(2025, 11, 3)
+
+    def make_parent(self, name, phone, *wards):
+        user = User.objects.create_user(username=name, first_name=name, phone=phone, role=User.Roles.PARENT)
+        parent = ParentProfile.objects.create(user=user)
+        parent.students.add(*wards)
+        return parent
+
+    def test_wards_of_one_parent_share_a_message(self):
+        self.make_parent("parent1", "9000000001", self.students[0], self.students[1])
+        self.make_parent("parent2", "9000000002", self.students[2])
+        self.make_parent("parent3", "", self.students[3])  # No phone: skipped.
+
+        with self.assertNumQueries(3):  # Parent lookup, log insert, outbox insert.
+            sent = NotificationService.send_attendance_alerts([s.pk for s in self.students], self.date)
+        self.assertEqual(sent, 2)
+
+        shared = NotificationLog.objects.get(to="9000000001")
+        self.assertIn("Your wards Student0 and Student1 were marked ABSENT", shared.body)
+        self.assertEqual(shared.meta["student_ids"], [self.students[0].pk, self.students[1].pk])
+        single = NotificationLog.objects.get(to="9000000002")
+        self.assertEqual(single.meta["student_id"], self.students[2].pk)
+
+    def test_only_the_primary_guardian_is_alerted(self):
+        self.make_parent("first", "9000000001", self.students[0])
+        self.make_parent("second", "9000000002", self.students[0])
+        NotificationService.send_attendance_alert(self.students[0], self.date, "A")
+        self.assertEqual(list(NotificationLog.objects.values_list("to", flat=True)), ["9000000001"])
+
+
+class FailingSMSBackend(BaseBackend):
+    def send(self, message):
+        raise ConnectionError("gateway down")
+
+
+LOCMEM_BACKENDS = {
+    "EMAIL": "core.notification_backends.EmailBackend",
+    "SMS": "core.notification_backends.LocMemSMSBackend",
+}
+
+
+@override_settings(NOTIFICATION_BACKENDS=LOCMEM_BACKENDS, NOTIFICATIONS_ASYNC=True)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        LocMemSMSBackend.outbox = []
+
+    def drain(self):
+        call_command("run_notification_outbox", once=True, stdout=StringIO())
+
+    def test_messages_are_queued_then_delivered_in_batches(self):
+        NotificationService.send_email("parent@example.com", "Fees", "Fee due")
+        NotificationService.send_sms_many([("9000000001", "Hello", {}), ("9000000002", "Hello", {})])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(set(NotificationLog.objects.values_list("status", flat=True)), {NotificationLog.Status.QUEUED})
+
+        self.drain()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual([to for to, _ in LocMemSMSBackend.outbox], ["9000000001", "9000000002"])
+        self.assertEqual(set(NotificationLog.objects.values_list("status", flat=True)), {NotificationLog.Status.SENT})
+
+    def test_email_batch_shares_one_connection(self):
+        for n in range(3):
+            NotificationService.send_email(f"p{n}@example.com", "Results", "Published")
+        with mock.patch("core.notification_backends.get_connection", wraps=get_connection) as connect:
+            self.drain()
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(
+        NOTIFICATION_BACKENDS={**LOCMEM_BACKENDS, "SMS": "core.tests.FailingSMSBackend"},
+        NOTIFICATION_MAX_ATTEMPTS=2,
+    )
+    def test_failures_back_off_then_fail(self):
+        NotificationService.send_sms("9000000001", "Hello")
+        self.drain()
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), (OutboxMessage.Status.PENDING, 1))
+        self.assertGreater(message.next_attempt_at, message.created_at)
+        self.assertIn("gateway down", message.last_error)
+
+        self.drain()  # Not due yet.
+        self.assertEqual(OutboxMessage.objects.get().attempts, 1)
+
+        OutboxMessage.objects.update(next_attempt_at=message.created_at)
+        self.drain()
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.Status.FAILED)
+        self.assertEqual(message.log.status, NotificationLog.Status.FAILED)
+
+    @override_settings(NOTIFICATION_SEND_TIMEOUT=60)
+    def test_message_abandoned_in_sending_is_retried_with_backoff(self):
+        NotificationService.send_sms("9000000001", "Hello")
+        self.assertEqual(len(outbox.claim("SMS", 10)), 1)  # The worker dies before sending.
+        self.drain()
+        self.assertEqual(LocMemSMSBackend.outbox, [])
+
+        OutboxMessage.objects.update(claimed_at=timezone.now() - datetime.timedelta(minutes=5))
+        self.drain()
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), (OutboxMessage.Status.PENDING, 1))
+        self.assertGreater(message.next_attempt_at, timezone.now())
+
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.drain()
+        self.assertEqual([to for to, _ in LocMemSMSBackend.outbox], ["9000000001"])
+
+    @override_settings(NOTIFICATION_RATE_LIMITS={"SMS": 2, "EMAIL": 0})
+    def test_rate_limit_per_channel(self):
+        NotificationService.send_sms_many([(f"90000000{n:02d}", "Hello", {}) for n in range(5)])
+        self.drain()
+        self.assertEqual(len(LocMemSMSBackend.outbox), 2)
+        self.assertEqual(OutboxMessage.objects.filter(status=OutboxMessage.Status.PENDING).count(), 3)
+
+    @override_settings(NOTIFICATIONS_ASYNC=False)
+    def test_synchronous_mode_delivers_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationService.send_sms("9000000001", "Hello")
+        self.assertEqual(len(LocMemSMSBackend.outbox), 1)
+        self.assertEqual(NotificationLog.objects.get().status, NotificationLog.Status.SENT)
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive.
+    received = []
+    client_ports = set()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        GatewayHandler.received.append(json.loads(body))
+        GatewayHandler.client_ports.add(self.client_address[1])
+        status = 500 if b"fail" in body else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class NotificationBackendTests(TestCase):
+    messages = [NotificationLog(to=f"90000000{n:02d}", body=f"Message {n}") for n in range(3)]
+
+    def test_http_backend_reuses_one_connection(self):
+        GatewayHandler.received, GatewayHandler.client_ports = [], set()
+        server = ThreadingHTTPServer(("127.0.0.1", 0), GatewayHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        failing = NotificationLog(to="9000000099", body="please fail")
+        with override_settings(SMS_GATEWAY_API_URL=f"http://127.0.0.1:{server.server_port}/send"):
+            errors = HTTPSMSBackend().send_many([*self.messages, failing])
+        self.assertEqual(errors[:3], [None, None, None])
+        self.assertIn("HTTP 500", errors[3])
+        self.assertEqual([m["to"] for m in GatewayHandler.received[:3]], [m.to for m in self.messages])
+        self.assertEqual(len(GatewayHandler.client_ports), 1)
+
+    def test_file_backend(self):
+        path = tempfile.mktemp(suffix=".jsonl")
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        with override_settings(SMS_FILE_PATH=path):
+            self.assertEqual(FileSMSBackend().send_many(self.messages), [None] * 3)
+        with open(path) as f:
+            self.assertEqual([json.loads(line)["to"] for line in f], [m.to for m in self.messages])
+
+    def test_connection_failure_fails_the_whole_batch(self):
+        with override_settings(SMS_FILE_PATH="/nonexistent/dir/sms.log"):
+            errors = FileSMSBackend().send_many(self.messages)
+        self.assertTrue(all(error.startswith("Could not connect") for error in errors))
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class NotificationLogRetentionTests(TestCase):
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        archive = override_settings(NOTIFICATION_ARCHIVE_DIR=self.archive_dir)
+        archive.enable()
+        self.addCleanup(archive.disable)
+
+        old = timezone.now() - datetime.timedelta(days=400)
+        logs = NotificationLog.objects.bulk_create(
+            NotificationLog(channel=NotificationLog.SMS, to=f"90000000{n:02d}", body=f"Old {n}") for n in range(5)
+        )
+        queued = NotificationLog.objects.create(
+            channel=NotificationLog.SMS, to="9000000099", body="Stuck", status=NotificationLog.Status.QUEUED,
+        )
+        NotificationLog.objects.filter(pk__in=[log.pk for log in logs] + [queued.pk]).update(created_at=old)
+        self.old_month = old.date().replace(day=1)
+        NotificationLog.objects.create(channel=NotificationLog.EMAIL, to="recent@example.com", body="Recent")
+
+    def test_old_logs_are_archived_and_deleted_in_batches(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            call_command("prune_notification_logs", days=180, batch=2, stdout=StringIO())
+        self.assertEqual(len(callbacks), 3)
+        self.assertEqual(
+            sorted(NotificationLog.objects.values_list("body", flat=True)), ["Recent", "Stuck"],
+        )
+        with gzip.open(archive_path(self.old_month), "rt") as f:
+            archived = [json.loads(line) for line in f]
+        self.assertEqual([row["body"] for row in archived], [f"Old {n}" for n in range(5)])
+
+    def test_failed_delete_archives_nothing(self):
+        with mock.patch.object(QuerySet, "delete", side_effect=DatabaseError("locked")):
+            with self.assertRaises(DatabaseError), self.captureOnCommitCallbacks(execute=True):
+                call_command("prune_notification_logs", days=180, batch=2, stdout=StringIO())
+        self.assertEqual(NotificationLog.objects.count(), 7)
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+    def test_dry_run_changes_nothing(self):
+        out = StringIO()
+        call_command("prune_notification_logs", days=180, dry_run=True, stdout=out)
+        self.assertIn("5 notification logs", out.getvalue())
+        self.assertEqual(NotificationLog.objects.count(), 7)
+
+    def test_admin_search_matches_recipient_exactly(self):
+        admin_user = User.objects.create_superuser(username="root", password="pw", email="root@example.com")
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse("admin:core_notificationlog_changelist"), {"q": "recent@example.com"})
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+
+@tag("benchmark")
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class ViewBudgetTests(TestCase):
+    """Query-count and latency budgets for the main pages, against 4,000 synthetic students.
+
+    Prints a table of queries and milliseconds per view. Exclude it from a
+    quick run with ``--exclude-tag benchmark``.
+    """
+
+    report: list = []
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = benchmark.seed()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.report:
+            sys.stderr.write(f"\n\nView budgets ({cls.data['students']} students):\n")
+            sys.stderr.write(benchmark.format_report(cls.report) + "\n")
+        super().tearDownClass()
+
+    def test_views_stay_within_budget(self):
+        for budget in benchmark.VIEW_BUDGETS:
+            with self.subTest(view=budget.url_name):
+                if budget.user:
+                    self.client.force_login(self.data[budget.user])
+                else:
+                    self.client.logout()
+                status, queries, ms = benchmark.measure(self.client, budget.url(self.data))
+                max_ms = budget.max_ms * benchmark.BENCHMARK_LATENCY_FACTOR
+                self.report.append((budget.url_name, queries, budget.max_queries, ms, max_ms))
+                self.assertEqual(status, 200)
+                self.assertLessEqual(queries, budget.max_queries, "query budget exceeded")
+                self.assertLessEqual(ms, max_ms, "latency budget exceeded")
@@ -1,13 +1,14 @@
-from io import BytesIO
 from django.http import HttpResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
+
+from .pdf import html_to_pdf, render_html
+
 
 def render_to_pdf(template_src, context_dict={}):
-    template = get_template(template_src)
-    html  = template.render(context_dict)
-    result = BytesIO()
-    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
-    if not pdf.err:
-        return HttpResponse(result.getvalue(), content_type='application/pdf')
+    """Render a template to a PDF response synchronously (uncached).
+
+    Prefer ``core.pdf.pdf_response`` in views; it queues and caches the output.
+    """
+    pdf = html_to_pdf(render_html(template_src, context_dict))
+    if pdf is not None:
+        return HttpResponse(pdf, content_type='application/pdf')
     return None
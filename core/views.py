@@ -1,4 +1,3 @@
-from django.db import models
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.views.generic import RedirectView, TemplateView, ListView, DetailView, CreateView, UpdateView
@@ -6,14 +5,16 @@ from django.views.generic import RedirectView, TemplateView, ListView, DetailVie
 from accounts.models import User
 from accounts.permissions import RoleRequiredMixin
 from admissions.models import AdmissionApplication
-from academics.models import StudentProfile, StaffProfile
-from payments.models import Payment
-from sponsorship.models import SponsorshipAllocation
+from academics.models import StudentProfile
+from academics.services import attendance_by_student, attendance_period
+from payments.revenue import monthly_revenue, term_revenue, year_over_year
+from .caching import PublicPageCacheMixin
+from .dashboard import admin_metrics
 from .models import NewsItem, JobOpening, AcademicYear, Institution, JobApplication, CharityApplication
 from .forms import AcademicYearForm, InstitutionForm, JobApplicationForm, CharityApplicationForm
 
 
-class HomeView(TemplateView):
+class HomeView(PublicPageCacheMixin, TemplateView):
     template_name = "core/home.html"
 
     def get_context_data(self, **kwargs):
@@ -26,7 +27,7 @@ class AboutView(TemplateView):
     template_name = "core/about.html"
 
 
-class InstitutionsView(TemplateView):
+class InstitutionsView(PublicPageCacheMixin, TemplateView):
     template_name = "core/institutions.html"
 
     def get_context_data(self, **kwargs):
@@ -36,7 +37,7 @@ class InstitutionsView(TemplateView):
         return context
 
 
-class InstitutionDetailView(DetailView):
+class InstitutionDetailView(PublicPageCacheMixin, DetailView):
     model = Institution
     template_name = "core/institution_detail.html"
     context_object_name = "institution"
@@ -71,7 +72,7 @@ class ContactView(TemplateView):
     template_name = "core/contact.html"
 
 
-class CareerView(TemplateView):
+class CareerView(PublicPageCacheMixin, TemplateView):
     template_name = "core/career.html"
 
     def get_context_data(self, **kwargs):
@@ -126,18 +127,7 @@ class AdminDashboardView(BaseDashboardView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Admin dashboard statistics
-        context.update({
-            'total_students': StudentProfile.objects.count(),
-            'total_staff': StaffProfile.objects.count(),
-            'pending_applications': AdmissionApplication.objects.filter(status=AdmissionApplication.Status.UNDER_REVIEW).count(),
-            'total_applications': AdmissionApplication.objects.count(),
-            'total_payments': Payment.objects.filter(status=Payment.Status.SUCCESS).count(),
-            'total_revenue': Payment.objects.filter(status=Payment.Status.SUCCESS).aggregate(
-                total=models.Sum('amount')
-            )['total'] or 0,
-            'active_sponsorships': SponsorshipAllocation.objects.filter(active=True).count(),
-        })
+        context.update(admin_metrics())
         return context
 
 
@@ -167,6 +157,23 @@ class ParentDashboardView(BaseDashboardView):
     template_name = "core/dashboard_parent.html"
     allowed_roles = [User.Roles.PARENT, User.Roles.ADMIN]
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        children = list(
+            StudentProfile.objects.filter(parents__user=self.request.user)
+            .select_related('user', 'classroom__academic_year')
+            .order_by('admission_number')
+        )
+        # Attendance comes from the monthly rollups: one grouped query for all children.
+        percentages = {
+            row['student_id']: row['percentage']
+            for row in attendance_by_student(*attendance_period(), student__in=children)
+        }
+        for child in children:
+            child.attendance_percentage = percentages.get(child.pk)
+        context['children'] = children
+        return context
+
 
 class SponsorDashboardView(BaseDashboardView):
     template_name = "core/dashboard_sponsor.html"
@@ -174,9 +181,33 @@ class SponsorDashboardView(BaseDashboardView):
 
 
 class CommitteeDashboardView(BaseDashboardView):
+    """Revenue by month, term and academic year, read from the daily revenue rollup."""
     template_name = "core/dashboard_committee.html"
     allowed_roles = [User.Roles.COMMITTEE, User.Roles.ADMIN]
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        filters = {}
+        institution_id = self.request.GET.get('institution')
+        if institution_id and institution_id.isdigit():
+            filters['institution_id'] = int(institution_id)
+        years = list(AcademicYear.objects.order_by('start_date'))
+        year = next((y for y in years if y.is_active), years[-1] if years else None)
+        if year:
+            monthly = monthly_revenue(year.start_date, year.end_date, **filters)
+            yoy = year_over_year(years, **filters)
+            context.update({
+                'academic_year': year,
+                'monthly': monthly,
+                'peak_month': max(row['collected'] for row in monthly) or 1,
+                'terms': term_revenue(year, **filters),
+                'year_over_year': yoy,
+                'current': next(row for row in yoy if row['academic_year'] == year),
+            })
+        context['institutions'] = Institution.objects.order_by('name')
+        context['selected_institution'] = filters.get('institution_id')
+        return context
+
 # --- Academic Year Management ---
 class AcademicYearListView(RoleRequiredMixin, ListView):
     model = AcademicYear
@@ -1,3 +1,59 @@
 from django.contrib import admin
 
-# Register your models here.
+from .ledger import assess_fees
+from .models import DailyRevenue, FeeSchedule, LedgerEntry, Payment, StudentFeeAccount, WebhookEvent
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'payer', 'student', 'category', 'amount', 'status', 'created_at')
+    list_filter = ('status', 'category')
+    search_fields = ('razorpay_order_id', 'razorpay_payment_id', 'payer__username', 'student__admission_number')
+    raw_id_fields = ('payer', 'student', 'verified_by')
+    readonly_fields = ('idempotency_key', 'institution', 'refunded_amount', 'created_at', 'updated_at')
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'event', 'razorpay_order_id', 'razorpay_payment_id', 'status', 'received_at')
+    list_filter = ('status', 'event')
+    search_fields = ('event_id', 'razorpay_order_id', 'razorpay_payment_id')
+    readonly_fields = [field.name for field in WebhookEvent._meta.fields]
+
+
+@admin.register(FeeSchedule)
+class FeeScheduleAdmin(admin.ModelAdmin):
+    list_display = ('classroom', 'academic_year', 'category', 'amount', 'due_date')
+    list_filter = ('academic_year', 'category', 'classroom__institution')
+    readonly_fields = ('academic_year',)
+    actions = ['assess']
+
+    @admin.action(description="Charge the selected fees to their classes")
+    def assess(self, request, queryset):
+        posted = assess_fees(queryset.select_related('classroom'))
+        self.message_user(request, f"Posted {posted} ledger entries.")
+
+
+@admin.register(StudentFeeAccount)
+class StudentFeeAccountAdmin(admin.ModelAdmin):
+    list_display = ('student', 'academic_year', 'classroom', 'charged', 'paid', 'outstanding')
+    list_filter = ('academic_year',)
+    search_fields = ('student__admission_number', 'student__user__first_name', 'student__user__last_name')
+    list_select_related = ('student__user', 'academic_year', 'classroom')
+    readonly_fields = ('student', 'academic_year', 'classroom', 'charged', 'paid', 'outstanding', 'updated_at')
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('account', 'kind', 'amount', 'balance_after', 'fee_schedule', 'payment', 'created_at')
+    list_filter = ('kind',)
+    search_fields = ('account__student__admission_number',)
+    readonly_fields = [field.name for field in LedgerEntry._meta.fields]
+
+
+@admin.register(DailyRevenue)
+class DailyRevenueAdmin(admin.ModelAdmin):
+    list_display = ('date', 'category', 'institution', 'status', 'amount', 'payments')
+    list_filter = ('status', 'category', 'institution')
+    date_hierarchy = 'date'
+    readonly_fields = [field.name for field in DailyRevenue._meta.fields]
@@ -0,0 +1,203 @@
+from django.core.exceptions import ValidationError
+from rest_framework import mixins, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from accounts.models import User
+from accounts.permissions import RolePermission
+from core.api import ConditionalGetMixin, CursorPage, FilterParamsMixin
+from core.models import AcademicYear
+
+from .gateways import GatewayError
+from .models import DailyRevenue, Payment
+from .revenue import monthly_revenue, term_revenue, year_over_year
+from .serializers import (
+    DailyRevenueSerializer,
+    PaymentCreateSerializer,
+    PaymentSerializer,
+    PaymentVerifySerializer,
+    RevenueQuerySerializer,
+)
+from .services import OrderInProgress, create_payment, create_razorpay_order, verify_payment
+
+
+class PaymentViewSet(
+    ConditionalGetMixin,
+    FilterParamsMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Online payments: create with a Razorpay order, list, and verify.
+
+    ``POST`` needs an ``Idempotency-Key`` header (or ``idempotency_key`` in
+    the body). Repeating a request with the same key returns the payment and
+    order created the first time (200 instead of 201), so a retried or
+    double-submitted checkout never opens a second order. Admin and staff see
+    every payment; everyone else sees the payments they made.
+    """
+
+    queryset = Payment.objects.all()
+    serializer_class = PaymentSerializer
+    permission_classes = [IsAuthenticated, RolePermission]
+    allowed_roles: list[str] = []
+    pagination_class = CursorPage
+    filter_params = {
+        "status": "status",
+        "category": "category",
+        "student": "student_id",
+        "payer": "payer_id",
+    }
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.role in (User.Roles.ADMIN, User.Roles.STAFF) or user.is_superuser:
+            return self.queryset
+        return self.queryset.filter(payer=user)
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key") or request.data.get("idempotency_key", "")
+        if not key or len(key) > 64:
+            raise serializers.ValidationError({"idempotency_key": "An Idempotency-Key of at most 64 characters is required."})
+        serializer = PaymentCreateSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        try:
+            payment, created = create_payment(request.user, key, **serializer.validated_data)
+        except ValidationError as e:
+            raise serializers.ValidationError({"idempotency_key": e.messages})
+        try:
+            checkout = create_razorpay_order(payment)
+        except OrderInProgress:
+            return Response(
+                {"detail": "This checkout is already being processed; retry shortly."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except GatewayError:
+            return Response(
+                {"detail": "The payment gateway is unavailable; retry with the same Idempotency-Key."},
+                status=status.HTTP_502_BAD_GATEWAY,
+            )
+        return Response(
+            {"payment": PaymentSerializer(payment, context=self.get_serializer_context()).data, "checkout": checkout},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=["post"])
+    def verify(self, request, pk=None):
+        """POST the ``razorpay_payment_id`` and ``razorpay_signature`` Checkout returned."""
+        payment = self.get_object()
+        serializer = PaymentVerifySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if not verify_payment(payment, **serializer.validated_data):
+            raise serializers.ValidationError({"razorpay_signature": "Signature verification failed."})
+        return Response(PaymentSerializer(payment, context=self.get_serializer_context()).data)
+
+
+def _money(value) -> str:
+    return f"{value:.2f}"
+
+
+class RevenueViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """The daily revenue rollup and the reports built on it, for admins and the committee.
+
+    Rows are filtered by ``date_from``, ``date_to``, ``category``,
+    ``institution`` and ``status``. The ``monthly``, ``terms`` and
+    ``year-over-year`` reports accept ``institution`` and ``category``.
+    """
+
+    queryset = DailyRevenue.objects.all()
+    serializer_class = DailyRevenueSerializer
+    permission_classes = [IsAuthenticated, RolePermission]
+    allowed_roles = [User.Roles.ADMIN, User.Roles.COMMITTEE]
+    pagination_class = CursorPage
+
+    def filter_queryset(self, queryset):
+        params = self.query_params()
+        data = params.validated_data
+        if "date_from" in data:
+            queryset = queryset.filter(date__gte=data["date_from"])
+        if "date_to" in data:
+            queryset = queryset.filter(date__lte=data["date_to"])
+        if "status" in data:
+            queryset = queryset.filter(status=data["status"])
+        return queryset.filter(**params.rollup_filters())
+
+    def query_params(self) -> RevenueQuerySerializer:
+        serializer = RevenueQuerySerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def academic_year(self, params) -> AcademicYear:
+        year = params.validated_data.get("academic_year") or (
+            AcademicYear.objects.order_by("-is_active", "-start_date").first()
+        )
+        if year is None:
+            raise serializers.ValidationError({"academic_year": "No academic year is set up."})
+        return year
+
+    @action(detail=False, methods=["get"])
+    def monthly(self, request):
+        """Collected, refunded and payments per month from ``date_from`` to
+        ``date_to`` (default: the ``academic_year``, else the active one).
+        """
+        params = self.query_params()
+        if "date_from" in params.validated_data and "date_to" in params.validated_data:
+            start, end = params.validated_data["date_from"], params.validated_data["date_to"]
+        else:
+            year = self.academic_year(params)
+            start = params.validated_data.get("date_from", year.start_date)
+            end = params.validated_data.get("date_to", year.end_date)
+        rows = monthly_revenue(start, end, **params.rollup_filters())
+        return Response({
+            "date_from": start,
+            "date_to": end,
+            "months": [
+                {
+                    "month": row["month"].strftime("%Y-%m"),
+                    "collected": _money(row["collected"]),
+                    "refunded": _money(row["refunded"]),
+                    "payments": row["payments"],
+                }
+                for row in rows
+            ],
+        })
+
+    @action(detail=False, methods=["get"])
+    def terms(self, request):
+        """Per-term totals of the ``academic_year`` (default: the active one)."""
+        params = self.query_params()
+        year = self.academic_year(params)
+        return Response({
+            "academic_year": year.name,
+            "terms": [
+                {
+                    "term": row["term"],
+                    "start": row["start"],
+                    "end": row["end"],
+                    "collected": _money(row["collected"]),
+                    "refunded": _money(row["refunded"]),
+                    "payments": row["payments"],
+                }
+                for row in term_revenue(year, **params.rollup_filters())
+            ],
+        })
+
+    @action(detail=False, methods=["get"], url_path="year-over-year")
+    def year_over_year(self, request):
+        """Totals and monthly collections per academic year, with the change from the year before."""
+        params = self.query_params()
+        return Response({
+            "years": [
+                {
+                    "academic_year": row["academic_year"].name,
+                    "collected": _money(row["collected"]),
+                    "refunded": _money(row["refunded"]),
+                    "payments": row["payments"],
+                    "months": [_money(value) for value in row["months"]],
+                    "change": row["change"],
+                }
+                for row in year_over_year(**params.rollup_filters())
+            ],
+        })
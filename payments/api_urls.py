@@ -1,10 +1,9 @@
 from rest_framework.routers import DefaultRouter
 
-router = DefaultRouter()
+from .api import PaymentViewSet, RevenueViewSet
 
-# ViewSets for payments (fees, donations) will be registered here.
+router = DefaultRouter()
+router.register("payments", PaymentViewSet, basename="payment")
+router.register("revenue", RevenueViewSet, basename="revenue")
 
 urlpatterns = router.urls
-
-
-
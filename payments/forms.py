@@ -0,0 +1,32 @@
+from django import forms
+
+from .models import Payment
+
+
+class PaymentFilterForm(forms.Form):
+    """Filters shared by the payment list and its exports; every field is optional.
+
+    Invalid values match nothing rather than being ignored, so a mistyped
+    date never turns into a list or export of every payment.
+    """
+
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    category = forms.ChoiceField(choices=[('', 'All categories')] + Payment.Category.choices, required=False)
+    status = forms.ChoiceField(choices=[('', 'All statuses')] + Payment.Status.choices, required=False)
+
+    def filter(self, queryset):
+        if not self.is_bound:
+            return queryset
+        if not self.is_valid():
+            return queryset.none()
+        data = self.cleaned_data
+        if data['date_from']:
+            queryset = queryset.filter(created_at__date__gte=data['date_from'])
+        if data['date_to']:
+            queryset = queryset.filter(created_at__date__lte=data['date_to'])
+        if data['category']:
+            queryset = queryset.filter(category=data['category'])
+        if data['status']:
+            queryset = queryset.filter(status=data['status'])
+        return queryset
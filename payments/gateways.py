@@ -0,0 +1,180 @@
+"""Payment gateways: Razorpay, and an in-process stub for tests and benchmarks.
+
+A gateway creates upstream orders, checks payment signatures and lists
+payments for reconciliation. The one in use is named by
+``settings.PAYMENT_GATEWAY`` and built once per process by ``get_gateway``,
+so every request shares one Razorpay client and one pooled, kept-alive HTTPS
+session instead of a new TLS handshake per checkout.
+"""
+import datetime
+import hashlib
+import hmac
+import itertools
+import threading
+import time
+from collections.abc import Iterator
+
+import razorpay
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+
+# Payments per page when listing them from Razorpay (its maximum).
+PAGE_SIZE = 100
+
+
+class GatewayError(Exception):
+    """The gateway could not create the order or list payments."""
+
+
+class BaseGateway:
+    key_id = ""
+
+    def create_order(self, amount_paise: int, currency: str, receipt: str, notes: dict | None = None) -> dict:
+        """Create an order upstream; return it as a dict with at least ``id``."""
+        raise NotImplementedError
+
+    def verify_payment_signature(self, order_id: str, payment_id: str, signature: str) -> bool:
+        raise NotImplementedError
+
+    def fetch_payments(self, since: datetime.datetime) -> Iterator[dict]:
+        """Every payment created upstream since ``since``, as Razorpay payment entities."""
+        raise NotImplementedError
+
+    @property
+    def webhook_secret(self) -> str:
+        return settings.RAZORPAY_WEBHOOK_SECRET
+
+    def verify_webhook_signature(self, body: bytes, signature: str) -> bool:
+        """Check ``X-Razorpay-Signature``: HMAC-SHA256 of the raw body with the webhook secret."""
+        if not self.webhook_secret or not signature:
+            return False
+        return hmac.compare_digest(hmac_signature(self.webhook_secret, body.decode("utf-8", "replace")), signature)
+
+
+def hmac_signature(secret: str, message: str) -> str:
+    return hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+class RazorpayGateway(BaseGateway):
+    def __init__(self):
+        self.key_id = settings.RAZORPAY_KEY_ID
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.PAYMENT_GATEWAY_POOL_SIZE)
+        session.mount("https://", adapter)
+        self.client = razorpay.Client(
+            session=session, auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+        )
+
+    def create_order(self, amount_paise, currency, receipt, notes=None):
+        data = {"amount": amount_paise, "currency": currency, "receipt": receipt, "payment_capture": 1}
+        if notes:
+            data["notes"] = notes
+        try:
+            return self.client.order.create(data, timeout=settings.PAYMENT_GATEWAY_TIMEOUT)
+        except (requests.RequestException, razorpay.errors.BadRequestError,
+                razorpay.errors.GatewayError, razorpay.errors.ServerError) as e:
+            raise GatewayError(str(e)) from e
+
+    def fetch_payments(self, since):
+        query = {"from": int(since.timestamp()), "count": PAGE_SIZE, "skip": 0}
+        while True:
+            try:
+                page = self.client.payment.all(query, timeout=settings.PAYMENT_GATEWAY_TIMEOUT)
+            except (requests.RequestException, razorpay.errors.BadRequestError,
+                    razorpay.errors.GatewayError, razorpay.errors.ServerError) as e:
+                raise GatewayError(str(e)) from e
+            items = page.get("items", [])
+            yield from items
+            if len(items) < PAGE_SIZE:
+                return
+            query["skip"] += PAGE_SIZE
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        try:
+            self.client.utility.verify_payment_signature({
+                "razorpay_order_id": order_id,
+                "razorpay_payment_id": payment_id,
+                "razorpay_signature": signature,
+            })
+        except razorpay.errors.SignatureVerificationError:
+            return False
+        return True
+
+
+class StubGateway(BaseGateway):
+    """Creates orders in memory and signs like Razorpay, for offline runs.
+
+    ``orders`` records every order created, so tests and benchmarks can count
+    duplicate orders; ``PAYMENT_STUB_LATENCY_MS`` simulates the round trip.
+    ``pay`` records a payment against an order for ``fetch_payments`` to list.
+    """
+
+    key_id = "rzp_test_stub"
+    secret = "stub-secret"
+    webhook_secret = "stub-webhook-secret"
+
+    def __init__(self):
+        self.orders: list[dict] = []
+        self.payments: list[dict] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create_order(self, amount_paise, currency, receipt, notes=None):
+        if settings.PAYMENT_STUB_LATENCY_MS:
+            time.sleep(settings.PAYMENT_STUB_LATENCY_MS / 1000)
+        with self._lock:
+            order = {
+                "id": f"order_stub{next(self._ids):010d}",
+                "entity": "order",
+                "amount": amount_paise,
+                "currency": currency,
+                "receipt": receipt,
+                "notes": notes or {},
+                "status": "created",
+            }
+            self.orders.append(order)
+        return order
+
+    def pay(self, order_id: str, status: str = "captured") -> dict:
+        """Record a payment against ``order_id`` as Razorpay would list it."""
+        with self._lock:
+            payment = {
+                "id": f"pay_stub{next(self._ids):010d}",
+                "entity": "payment",
+                "order_id": order_id,
+                "status": status,
+                "created_at": int(time.time()),
+            }
+            self.payments.append(payment)
+        return payment
+
+    def fetch_payments(self, since):
+        return iter([payment for payment in self.payments if payment["created_at"] >= int(since.timestamp())])
+
+    def sign(self, order_id: str, payment_id: str) -> str:
+        """The signature Razorpay Checkout would return for this payment."""
+        return hmac_signature(self.secret, f"{order_id}|{payment_id}")
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        return hmac.compare_digest(self.sign(order_id, payment_id), signature)
+
+    def sign_webhook(self, body: bytes) -> str:
+        """The ``X-Razorpay-Signature`` Razorpay would send with this body."""
+        return hmac_signature(self.webhook_secret, body.decode())
+
+
+_gateway: BaseGateway | None = None
+_gateway_path = ""
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> BaseGateway:
+    """The process-wide gateway named by ``PAYMENT_GATEWAY``."""
+    global _gateway, _gateway_path
+    with _gateway_lock:
+        if _gateway is None or _gateway_path != settings.PAYMENT_GATEWAY:
+            _gateway, _gateway_path = import_string(settings.PAYMENT_GATEWAY)(), settings.PAYMENT_GATEWAY
+        return _gateway
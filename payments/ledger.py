@@ -0,0 +1,178 @@
+"""Fee ledger: what each student owes, kept current as fees are set and paid.
+
+Every change to a ``StudentFeeAccount`` goes through ``_post``: it is
+recorded as a ``LedgerEntry`` carrying the balance after it, and the
+account's ``charged``, ``paid`` and ``outstanding`` are updated in the same
+transaction, with the account rows locked. Posting is idempotent:
+
+* ``assess_fees`` charges each student in a schedule's class the schedule
+  amount less what their account was already charged for that category,
+  so re-running it after a fee change, an admission or a move to another
+  division only posts the difference;
+* ``post_payments`` credits a successful fee payment once and reverses
+  what has been refunded of it (in full or in part) not yet reversed.
+
+``defaulters`` then reads outstanding balances directly, a range scan on
+the ``(academic_year, outstanding)`` index.
+"""
+from collections.abc import Iterable
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from academics.models import StudentProfile
+
+from .models import FeeSchedule, LedgerEntry, Payment, StudentFeeAccount
+
+ZERO = Decimal("0.00")
+
+
+def _accounts(
+    keys: Iterable[tuple[int, int, int | None]], fallback: dict[int, int] | None = None,
+) -> dict[tuple[int, int], StudentFeeAccount]:
+    """Lock, creating where missing, the accounts for ``(student, academic_year, classroom)`` keys.
+
+    A ``None`` classroom leaves an existing account's classroom alone (a past
+    year's account); a missing one is then created in ``fallback[student]``.
+    Returns them keyed by ``(student_id, academic_year_id)``.
+    """
+    keys = set(keys)
+    if not keys:
+        return {}
+    fallback = fallback or {}
+    StudentFeeAccount.objects.bulk_create(
+        [
+            StudentFeeAccount(student_id=student, academic_year_id=year, classroom_id=classroom or fallback[student])
+            for student, year, classroom in keys
+        ],
+        ignore_conflicts=True,
+    )
+    classrooms = {(student, year): classroom for student, year, classroom in keys}
+    accounts = StudentFeeAccount.objects.select_for_update().filter(
+        student_id__in={student for student, _year, _classroom in keys},
+        academic_year_id__in={year for _student, year, _classroom in keys},
+    )
+    locked = {}
+    for account in accounts:
+        key = (account.student_id, account.academic_year_id)
+        if key in classrooms:
+            if classrooms[key] is not None:
+                account.classroom_id = classrooms[key]  # Follows a student moved to another division.
+            locked[key] = account
+    return locked
+
+
+def _post(entries: list[LedgerEntry]) -> int:
+    """Apply unsaved entries to their (locked) accounts and save both. Returns the entries posted."""
+    entries = [entry for entry in entries if entry.amount]
+    if not entries:
+        return 0
+    now = timezone.now()
+    accounts = {}
+    for entry in entries:
+        account = entry.account
+        if entry.kind == LedgerEntry.Kind.CHARGE:
+            account.charged += entry.amount
+        else:
+            account.paid -= entry.amount
+        account.outstanding = account.charged - account.paid
+        account.updated_at = now
+        entry.balance_after = account.outstanding
+        accounts[account.pk] = account
+    LedgerEntry.objects.bulk_create(entries)
+    StudentFeeAccount.objects.bulk_update(accounts.values(), ["classroom", "charged", "paid", "outstanding", "updated_at"])
+    return len(entries)
+
+
+def assess_fees(schedules: Iterable[FeeSchedule]) -> int:
+    """Charge the students of each schedule's class up to the schedule amount for its category.
+
+    Returns the number of ledger entries posted.
+    """
+    posted = 0
+    with transaction.atomic():
+        for schedule in schedules:
+            students = StudentProfile.objects.filter(classroom_id=schedule.classroom_id).values_list("pk", flat=True)
+            accounts = _accounts((student, schedule.academic_year_id, schedule.classroom_id) for student in students)
+            # Per account and category, not per schedule: a student moved from 8A to
+            # 8B was charged under 8A's schedule and owes only the difference.
+            charged = dict(
+                LedgerEntry.objects.filter(
+                    account__in=accounts.values(), kind=LedgerEntry.Kind.CHARGE,
+                    fee_schedule__category=schedule.category,
+                )
+                .values("account_id").annotate(total=Sum("amount")).values_list("account_id", "total")
+            )
+            posted += _post([
+                LedgerEntry(
+                    account=account, kind=LedgerEntry.Kind.CHARGE, fee_schedule=schedule,
+                    amount=schedule.amount - charged.get(account.pk, ZERO),
+                )
+                for account in accounts.values()
+            ])
+    return posted
+
+
+def post_payments(payments: Iterable[Payment]) -> int:
+    """Credit successful fee payments and reverse their refunds, posting only what is not in the ledger yet.
+
+    A payment counts against the account of the academic year it was made
+    for (``Payment.academic_year``), so last year's dues paid after a
+    promotion clear last year's balance; payments without a year fall back to
+    the student's current one. Donations and payments without a student are
+    skipped. Returns the number of ledger entries posted.
+    """
+    fees = [
+        payment for payment in payments
+        if payment.student_id and payment.category != Payment.Category.DONATION
+        and payment.status in (Payment.Status.SUCCESS, Payment.Status.REFUNDED)
+    ]
+    if not fees:
+        return 0
+    with transaction.atomic():
+        placement = {
+            student: (year, classroom)
+            for student, classroom, year in StudentProfile.objects.filter(
+                pk__in={payment.student_id for payment in fees}
+            ).values_list("pk", "classroom_id", "classroom__academic_year_id")
+        }
+        years = {payment.pk: payment.academic_year_id or placement[payment.student_id][0] for payment in fees}
+        accounts = _accounts(
+            (
+                (payment.student_id, years[payment.pk],
+                 placement[payment.student_id][1] if years[payment.pk] == placement[payment.student_id][0] else None)
+                for payment in fees
+            ),
+            fallback={student: classroom for student, (_year, classroom) in placement.items()},
+        )
+        # Read what is already posted only once the accounts are locked, so two
+        # concurrent calls cannot both post the same refund.
+        credited, refunded = set(), {}
+        for payment_id, kind, amount in LedgerEntry.objects.filter(payment__in=fees).values_list("payment_id", "kind", "amount"):
+            if kind == LedgerEntry.Kind.PAYMENT:
+                credited.add(payment_id)
+            else:
+                refunded[payment_id] = refunded.get(payment_id, ZERO) + amount
+        entries = []
+        for payment in fees:
+            account = accounts[(payment.student_id, years[payment.pk])]
+            if payment.pk not in credited:
+                entries.append(LedgerEntry(account=account, kind=LedgerEntry.Kind.PAYMENT, payment=payment, amount=-Decimal(payment.amount)))
+            if payment.refunded_total > refunded.get(payment.pk, ZERO):
+                entries.append(LedgerEntry(
+                    account=account, kind=LedgerEntry.Kind.REFUND, payment=payment,
+                    amount=payment.refunded_total - refunded.get(payment.pk, ZERO),
+                ))
+        return _post(entries)
+
+
+def defaulters(academic_year, min_outstanding: Decimal = Decimal("0.01"), classroom=None):
+    """Accounts owing at least ``min_outstanding``, largest balance first."""
+    accounts = StudentFeeAccount.objects.filter(outstanding__gte=min_outstanding)
+    if classroom is not None:
+        accounts = accounts.filter(classroom=classroom)
+    else:
+        accounts = accounts.filter(academic_year=academic_year)
+    return accounts.select_related("student__user", "classroom__academic_year").order_by("-outstanding", "pk")
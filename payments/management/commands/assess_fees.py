@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import AcademicYear
+from payments.ledger import assess_fees, post_payments
+from payments.models import FeeSchedule, Payment
+
+CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Charge fee schedules to students and post successful payments missing from the fee ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--year",
+            type=int,
+            default=None,
+            help="Academic year ID to assess (default: the active year).",
+        )
+
+    def handle(self, *args, year=None, **options):
+        years = AcademicYear.objects.filter(pk=year) if year else AcademicYear.objects.filter(is_active=True)
+        academic_year = years.first()
+        if academic_year is None:
+            raise CommandError("No such academic year." if year else "No active academic year; pass --year.")
+        charged = assess_fees(FeeSchedule.objects.filter(academic_year=academic_year))
+
+        credited, chunk = 0, []
+        payments = Payment.objects.filter(
+            status__in=[Payment.Status.SUCCESS, Payment.Status.REFUNDED], student__isnull=False,
+        ).exclude(category=Payment.Category.DONATION).order_by("pk")
+        for payment in payments.iterator(chunk_size=CHUNK_SIZE):
+            chunk.append(payment)
+            if len(chunk) == CHUNK_SIZE:
+                credited += post_payments(chunk)
+                chunk = []
+        credited += post_payments(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f"{academic_year}: posted {charged} charges and {credited} payment entries."
+        ))
@@ -0,0 +1,40 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from payments.models import DailyRevenue, Payment
+from payments.revenue import REVENUE_STATUSES, refresh_daily_revenue
+
+DAYS_PER_REFRESH = 31
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyRevenue rollup from successful and refunded payments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Only rebuild days from this one onwards (YYYY-MM-DD).",
+        )
+
+    def handle(self, *args, since=None, **options):
+        payments = Payment.objects.filter(status__in=REVENUE_STATUSES)
+        rollup = DailyRevenue.objects.all()
+        if since:
+            try:
+                start = datetime.datetime.strptime(since, "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--since must look like 2025-06-01.")
+            payments = payments.filter(created_at__date__gte=start)
+            rollup = rollup.filter(date__gte=start)
+
+        with transaction.atomic():
+            rollup.delete()
+            days = [timezone.localtime(day).date() for day in payments.datetimes("created_at", "day")]
+            total = 0
+            for n in range(0, len(days), DAYS_PER_REFRESH):
+                total += refresh_daily_revenue(days[n:n + DAYS_PER_REFRESH])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} daily revenue rows over {len(days)} days."))
@@ -0,0 +1,31 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.gateways import GatewayError
+from payments.webhooks import reconcile_pending
+
+
+class Command(BaseCommand):
+    help = "Check pending payments against Razorpay in one batch and apply what it reports."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=15,
+            help="Only payments pending for at least this many minutes (default: 15).",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Check at most this many payments, oldest first.",
+        )
+
+    def handle(self, *args, older_than=15, limit=None, **options):
+        try:
+            checked, changed = reconcile_pending(datetime.timedelta(minutes=older_than), limit)
+        except GatewayError as e:
+            raise CommandError(f"Razorpay could not list payments: {e}") from e
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} pending payments; {changed} updated."))
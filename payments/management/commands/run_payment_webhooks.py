@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.webhooks import process_once
+
+
+class Command(BaseCommand):
+    help = "Apply received Razorpay webhook events to payments in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Apply everything pending and exit instead of polling.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep between polls when nothing is pending.",
+        )
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=None,
+            help="Events applied per batch (default: PAYMENT_WEBHOOK_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, once=False, interval=2.0, batch=None, **options):
+        while True:
+            events, changed = process_once(batch)
+            if events:
+                self.stdout.write(self.style.SUCCESS(f"Applied {events} events; {changed} payments updated."))
+            elif once:
+                return
+            else:
+                time.sleep(interval)
@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-18 01:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0012_student_search_indexes'),
+        ('payments', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Client-supplied key; repeating a checkout with the same key returns the same payment.', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key', ''), _negated=True), fields=('payer', 'idempotency_key'), name='payment_unique_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0 on 2026-10-18 01:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0012_student_search_indexes'),
+        ('payments', '0002_payment_idempotency_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(help_text='X-Razorpay-Event-Id; repeated deliveries are dropped.', max_length=64, unique=True)),
+                ('event', models.CharField(max_length=64)),
+                ('payload', models.JSONField()),
+                ('razorpay_order_id', models.CharField(blank=True, max_length=255)),
+                ('razorpay_payment_id', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSING', 'Processing'), ('APPLIED', 'Applied'), ('IGNORED', 'Ignored')], default='PENDING', max_length=12)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Webhook Event',
+                'verbose_name_plural': 'Webhook Events',
+                'ordering': ['pk'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['razorpay_order_id'], name='payments_pa_razorpa_86ad18_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['razorpay_payment_id'], name='payments_pa_razorpa_4059b1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(fields=['status', 'id'], name='payments_we_status_db1844_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.0 on 2026-10-18 01:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0012_student_search_indexes'),
+        ('core', '0008_notificationlog_indexes'),
+        ('payments', '0003_webhook_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('TUITION', 'Tuition Fee'), ('EXAM', 'Exam Fee'), ('HOSTEL', 'Hostel Fee'), ('DONATION', 'Donation')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='fee_schedules', to='core.academicyear')),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='fee_schedules', to='academics.classroom')),
+            ],
+            options={
+                'verbose_name': 'Fee Schedule',
+                'verbose_name_plural': 'Fee Schedules',
+                'ordering': ['classroom', 'category'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentFeeAccount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('charged', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('academic_year', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='fee_accounts', to='core.academicyear')),
+                ('classroom', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='fee_accounts', to='academics.classroom')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_accounts', to='academics.studentprofile')),
+            ],
+            options={
+                'verbose_name': 'Student Fee Account',
+                'verbose_name_plural': 'Student Fee Accounts',
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CHARGE', 'Charge'), ('PAYMENT', 'Payment'), ('REFUND', 'Refund')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('fee_schedule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='payments.feeschedule')),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='payments.payment')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='payments.studentfeeaccount')),
+            ],
+            options={
+                'verbose_name': 'Ledger Entry',
+                'verbose_name_plural': 'Ledger Entries',
+                'ordering': ['account', 'pk'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feeschedule',
+            constraint=models.UniqueConstraint(fields=('classroom', 'category'), name='fee_schedule_unique_class_category'),
+        ),
+        migrations.AddIndex(
+            model_name='studentfeeaccount',
+            index=models.Index(fields=['academic_year', 'outstanding'], name='payments_st_academi_bffbb6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentfeeaccount',
+            index=models.Index(fields=['classroom', 'outstanding'], name='payments_st_classro_7ef1e3_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentfeeaccount',
+            constraint=models.UniqueConstraint(fields=('student', 'academic_year'), name='fee_account_unique_student_year'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerentry',
+            constraint=models.UniqueConstraint(fields=('payment', 'kind'), name='ledger_entry_unique_payment_kind'),
+        ),
+    ]
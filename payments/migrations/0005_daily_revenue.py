@@ -0,0 +1,56 @@
+# Generated by Django 5.0 on 2026-10-18 01:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0012_student_search_indexes'),
+        ('core', '0008_notificationlog_indexes'),
+        ('payments', '0004_fee_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(choices=[('TUITION', 'Tuition Fee'), ('EXAM', 'Exam Fee'), ('HOSTEL', 'Hostel Fee'), ('DONATION', 'Donation')], max_length=20)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SUCCESS', 'Success'), ('FAILED', 'Failed'), ('REFUNDED', 'Refunded')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payments', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Revenue',
+                'verbose_name_plural': 'Daily Revenue',
+                'ordering': ['date', 'category'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['created_at'], name='payments_pa_created_b8a300_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailyrevenue',
+            name='institution',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='daily_revenue', to='core.institution'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyrevenue',
+            index=models.Index(fields=['status', 'date'], name='payments_da_status_02fc85_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrevenue',
+            constraint=models.UniqueConstraint(fields=('date', 'category', 'institution', 'status'), name='daily_revenue_unique_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrevenue',
+            constraint=models.UniqueConstraint(condition=models.Q(('institution__isnull', True)), fields=('date', 'category', 'status'), name='daily_revenue_unique_unassigned_bucket'),
+        ),
+    ]
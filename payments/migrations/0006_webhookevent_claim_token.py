@@ -0,0 +1,27 @@
+# Generated by Django 5.0 on 2026-10-18 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_daily_revenue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='claim_token',
+            field=models.CharField(blank=True, help_text='Identifies the worker batch that claimed the event.', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(fields=['claim_token'], name='payments_we_claim_t_600c12_idx'),
+        ),
+    ]
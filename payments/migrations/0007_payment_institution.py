@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-18 02:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_institution(apps, schema_editor):
+    # Existing payments take the student's current institution, the best record there is.
+    Payment = apps.get_model('payments', 'Payment')
+    StudentProfile = apps.get_model('academics', 'StudentProfile')
+    Payment.objects.filter(student__isnull=False).update(institution_id=Subquery(
+        StudentProfile.objects.filter(pk=OuterRef('student_id')).values('classroom__institution_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0012_student_search_indexes'),
+        ('core', '0010_outboxmessage_claimed_at'),
+        ('payments', '0006_webhookevent_claim_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='institution',
+            field=models.ForeignKey(blank=True, help_text="The student's institution when the payment was made; kept if the student moves.", null=True, on_delete=django.db.models.deletion.PROTECT, related_name='payments', to='core.institution'),
+        ),
+        migrations.RunPython(backfill_institution, migrations.RunPython.noop),
+    ]
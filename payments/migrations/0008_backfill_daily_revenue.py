@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+REVENUE_STATUSES = ("SUCCESS", "REFUNDED")
+
+
+def backfill_daily_revenue(apps, schema_editor):
+    # The dashboard and revenue reports read only the rollup, so fill it from the
+    # payments taken before it existed instead of showing zero until a manual rebuild.
+    Payment = apps.get_model('payments', 'Payment')
+    DailyRevenue = apps.get_model('payments', 'DailyRevenue')
+    rows = Payment.objects.filter(status__in=REVENUE_STATUSES).values(
+        'category', 'status', 'institution', day=TruncDate('created_at'),
+    ).annotate(total=Sum('amount'), count=Count('pk')).order_by()
+    DailyRevenue.objects.all().delete()
+    DailyRevenue.objects.bulk_create(
+        (
+            DailyRevenue(
+                date=row['day'], category=row['category'], institution_id=row['institution'],
+                status=row['status'], amount=row['total'], payments=row['count'],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_payment_institution'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_revenue, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-18 02:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_academic_years(apps, schema_editor):
+    Payment = apps.get_model('payments', 'Payment')
+    FeeSchedule = apps.get_model('payments', 'FeeSchedule')
+    LedgerEntry = apps.get_model('payments', 'LedgerEntry')
+    ClassRoom = apps.get_model('academics', 'ClassRoom')
+    # Payments already in the ledger keep the year of the account they were credited to;
+    # the rest fall back to the student's current year when posted.
+    Payment.objects.filter(ledger_entries__isnull=False).update(academic_year_id=Subquery(
+        LedgerEntry.objects.filter(payment_id=OuterRef('pk'), kind='PAYMENT').values('account__academic_year_id')[:1]
+    ))
+    FeeSchedule.objects.update(academic_year_id=Subquery(
+        ClassRoom.objects.filter(pk=OuterRef('classroom_id')).values('academic_year_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0012_student_search_indexes'),
+        ('core', '0010_outboxmessage_claimed_at'),
+        ('payments', '0008_backfill_daily_revenue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='academic_year',
+            field=models.ForeignKey(blank=True, help_text="Year whose fees this pays, e.g. last year's dues paid after promotion; defaults to the student's current year.", null=True, on_delete=django.db.models.deletion.PROTECT, related_name='payments', to='core.academicyear'),
+        ),
+        migrations.AlterField(
+            model_name='feeschedule',
+            name='academic_year',
+            field=models.ForeignKey(help_text='Copied from the classroom on save.', on_delete=django.db.models.deletion.PROTECT, related_name='fee_schedules', to='core.academicyear'),
+        ),
+        migrations.RunPython(backfill_academic_years, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0 on 2026-10-18 02:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0009_payment_academic_year'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='ledgerentry',
+            name='ledger_entry_unique_payment_kind',
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='refunded_amount',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Refunded so far; the status becomes Refunded only once the whole amount is.', max_digits=10),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind', 'PAYMENT')), fields=('payment',), name='ledger_entry_unique_payment'),
+        ),
+    ]
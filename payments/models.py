@@ -1,8 +1,11 @@
+from decimal import Decimal
+
 from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-from academics.models import StudentProfile
+from academics.models import ClassRoom, StudentProfile
+from core.models import AcademicYear, Institution
 
 
 class Payment(models.Model):
@@ -33,9 +36,29 @@ class Payment(models.Model):
         null=True,
         help_text=_("Linked student, if applicable."),
     )
+    institution = models.ForeignKey(
+        Institution,
+        on_delete=models.PROTECT,
+        related_name="payments",
+        blank=True,
+        null=True,
+        help_text=_("The student's institution when the payment was made; kept if the student moves."),
+    )
+    academic_year = models.ForeignKey(
+        AcademicYear,
+        on_delete=models.PROTECT,
+        related_name="payments",
+        blank=True,
+        null=True,
+        help_text=_("Year whose fees this pays, e.g. last year's dues paid after promotion; defaults to the student's current year."),
+    )
     category = models.CharField(max_length=20, choices=Category.choices)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=10, default="INR")
+    refunded_amount = models.DecimalField(
+        max_digits=10, decimal_places=2, default=0,
+        help_text=_("Refunded so far; the status becomes Refunded only once the whole amount is."),
+    )
 
     # Razorpay-specific fields
     razorpay_order_id = models.CharField(max_length=255, blank=True)
@@ -59,9 +82,216 @@ class Payment(models.Model):
     verified_at = models.DateTimeField(blank=True, null=True)
 
     notes = models.TextField(blank=True)
+    idempotency_key = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text=_("Client-supplied key; repeating a checkout with the same key returns the same payment."),
+    )
 
     class Meta:
         ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["payer", "idempotency_key"],
+                condition=~models.Q(idempotency_key=""),
+                name="payment_unique_idempotency_key",
+            ),
+        ]
+        indexes = [
+            # Webhook events are matched to payments on these.
+            models.Index(fields=["razorpay_order_id"]),
+            models.Index(fields=["razorpay_payment_id"]),
+            # Date-range filters, exports and the daily revenue rollup.
+            models.Index(fields=["created_at"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.student_id and not (self.institution_id and self.academic_year_id):
+            classroom = self.student.classroom
+            self.institution_id = self.institution_id or classroom.institution_id
+            self.academic_year_id = self.academic_year_id or classroom.academic_year_id
+        super().save(*args, **kwargs)
+
+    @property
+    def refunded_total(self) -> Decimal:
+        """What has been given back: everything once REFUNDED, otherwise any partial refunds."""
+        return Decimal(self.amount) if self.status == self.Status.REFUNDED else Decimal(self.refunded_amount)
 
     def __str__(self) -> str:
         return f"{self.get_category_display()} - {self.amount} {self.currency} ({self.status})"
+
+
+class WebhookEvent(models.Model):
+    """A Razorpay webhook delivery, stored as received.
+
+    The view only checks the signature and inserts the row;
+    ``python manage.py run_payment_webhooks`` applies pending events to
+    payments in batches. The raw body is never modified, only the
+    processing state.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", _("Pending")
+        PROCESSING = "PROCESSING", _("Processing")
+        APPLIED = "APPLIED", _("Applied")
+        IGNORED = "IGNORED", _("Ignored")
+
+    event_id = models.CharField(max_length=64, unique=True, help_text=_("X-Razorpay-Event-Id; repeated deliveries are dropped."))
+    event = models.CharField(max_length=64)
+    payload = models.JSONField()
+    razorpay_order_id = models.CharField(max_length=255, blank=True)
+    razorpay_payment_id = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=12, choices=Status.choices, default=Status.PENDING)
+    note = models.CharField(max_length=255, blank=True)
+    claim_token = models.CharField(max_length=32, blank=True, help_text=_("Identifies the worker batch that claimed the event."))
+    received_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["pk"]
+        indexes = [
+            models.Index(fields=["status", "id"]),
+            models.Index(fields=["claim_token"]),
+        ]
+        verbose_name = _("Webhook Event")
+        verbose_name_plural = _("Webhook Events")
+
+    def __str__(self) -> str:
+        return f"{self.event} {self.event_id} ({self.get_status_display()})"
+
+
+class FeeSchedule(models.Model):
+    """The fee a class owes for one category in an academic year."""
+
+    academic_year = models.ForeignKey(
+        AcademicYear, on_delete=models.PROTECT, related_name="fee_schedules", help_text=_("Copied from the classroom on save."),
+    )
+    classroom = models.ForeignKey(ClassRoom, on_delete=models.PROTECT, related_name="fee_schedules")
+    category = models.CharField(max_length=20, choices=Payment.Category.choices)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    due_date = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["classroom", "category"]
+        constraints = [
+            models.UniqueConstraint(fields=["classroom", "category"], name="fee_schedule_unique_class_category"),
+        ]
+        verbose_name = _("Fee Schedule")
+        verbose_name_plural = _("Fee Schedules")
+
+    def save(self, *args, **kwargs):
+        # Always the classroom's year, so the two cannot disagree.
+        if self.classroom_id:
+            self.academic_year_id = self.classroom.academic_year_id
+        super().save(*args, **kwargs)
+
+    def __str__(self) -> str:
+        return f"{self.classroom} - {self.get_category_display()}: {self.amount}"
+
+
+class StudentFeeAccount(models.Model):
+    """A student's running fee balance for one academic year.
+
+    ``outstanding`` is charged minus paid, kept current by the ledger
+    (``payments.ledger``), so dues and defaulter lists are read from here
+    instead of summing payments.
+    """
+
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name="fee_accounts")
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.PROTECT, related_name="fee_accounts")
+    classroom = models.ForeignKey(ClassRoom, on_delete=models.PROTECT, related_name="fee_accounts")
+    charged = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    outstanding = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["student", "academic_year"], name="fee_account_unique_student_year"),
+        ]
+        indexes = [
+            # Defaulter lists: outstanding above an amount, per year or class.
+            models.Index(fields=["academic_year", "outstanding"]),
+            models.Index(fields=["classroom", "outstanding"]),
+        ]
+        verbose_name = _("Student Fee Account")
+        verbose_name_plural = _("Student Fee Accounts")
+
+    def __str__(self) -> str:
+        return f"{self.student} {self.academic_year}: {self.outstanding}"
+
+
+class LedgerEntry(models.Model):
+    """One movement on a fee account. Entries are only ever added."""
+
+    class Kind(models.TextChoices):
+        CHARGE = "CHARGE", _("Charge")
+        PAYMENT = "PAYMENT", _("Payment")
+        REFUND = "REFUND", _("Refund")
+
+    account = models.ForeignKey(StudentFeeAccount, on_delete=models.CASCADE, related_name="entries")
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    # Signed: charges and refunds raise the balance, payments lower it.
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+    fee_schedule = models.ForeignKey(FeeSchedule, on_delete=models.PROTECT, related_name="ledger_entries", blank=True, null=True)
+    payment = models.ForeignKey(Payment, on_delete=models.PROTECT, related_name="ledger_entries", blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["account", "pk"]
+        constraints = [
+            # A payment is credited once; partial refunds each add a REFUND entry.
+            models.UniqueConstraint(
+                fields=["payment"], condition=models.Q(kind="PAYMENT"), name="ledger_entry_unique_payment",
+            ),
+        ]
+        verbose_name = _("Ledger Entry")
+        verbose_name_plural = _("Ledger Entries")
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} {self.amount} (balance {self.balance_after})"
+
+
+class DailyRevenue(models.Model):
+    """Successful and refunded payments summed per day, category, institution and status.
+
+    Kept current from payment status changes by ``payments.revenue``;
+    revenue dashboards read these rows, a handful per day, instead of the
+    payments. ``institution`` is the one stored on the payment (the
+    student's at the time of payment), and empty for payments not linked to
+    a student (e.g. donations).
+    """
+
+    date = models.DateField()
+    category = models.CharField(max_length=20, choices=Payment.Category.choices)
+    institution = models.ForeignKey(
+        Institution, on_delete=models.PROTECT, related_name="daily_revenue", blank=True, null=True,
+    )
+    status = models.CharField(max_length=20, choices=Payment.Status.choices)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payments = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["date", "category"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "category", "institution", "status"], name="daily_revenue_unique_bucket",
+            ),
+            models.UniqueConstraint(
+                fields=["date", "category", "status"],
+                condition=models.Q(institution__isnull=True),
+                name="daily_revenue_unique_unassigned_bucket",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "date"]),
+        ]
+        verbose_name = _("Daily Revenue")
+        verbose_name_plural = _("Daily Revenue")
+
+    def __str__(self) -> str:
+        return f"{self.date} {self.category} {self.status}: {self.amount}"
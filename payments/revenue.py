@@ -0,0 +1,169 @@
+"""Daily revenue rollup and the monthly, term and year-over-year views built on it.
+
+``DailyRevenue`` holds one row per day, category, institution and status
+(SUCCESS or REFUNDED) with the amount and number of payments. A partly
+refunded payment counts what it kept under SUCCESS and what was refunded
+under REFUNDED. A payment
+saved into or out of those statuses, or changed by the webhook worker,
+schedules ``refresh_daily_revenue`` for its day once the transaction
+commits. The day is recomputed from its payments (through the
+``created_at`` index) and its rows replaced, so the rollup stays exact when
+writers race.
+
+Reports read only the rollup: a year of monthly figures is one grouped
+query over a few hundred rows, however many payments were taken.
+"""
+import datetime
+from collections.abc import Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Q, Sum, When
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from academics.services import month_start, next_month
+from core.dashboard import invalidate_admin_metrics
+from core.models import AcademicYear
+
+from .models import DailyRevenue, Payment
+
+REVENUE_STATUSES = (Payment.Status.SUCCESS, Payment.Status.REFUNDED)
+TERMS_PER_YEAR = 3
+REFRESH_ATTEMPTS = 3
+
+
+def _day_start(day: datetime.date) -> datetime.datetime:
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def _buckets(dates: set[datetime.date]) -> list[DailyRevenue]:
+    touched = Q()
+    for day in dates:
+        touched |= Q(created_at__gte=_day_start(day), created_at__lt=_day_start(day + datetime.timedelta(days=1)))
+    payments = Payment.objects.filter(touched)
+    groups = ("category", "institution")
+    collected = payments.filter(status=Payment.Status.SUCCESS).values(*groups, day=TruncDate("created_at")).annotate(
+        total=Sum(F("amount") - F("refunded_amount")), count=Count("pk"),
+    ).order_by()
+    refunded = payments.filter(
+        Q(status=Payment.Status.REFUNDED) | Q(status=Payment.Status.SUCCESS, refunded_amount__gt=0),
+    ).values(*groups, day=TruncDate("created_at")).annotate(
+        total=Sum(Case(When(status=Payment.Status.REFUNDED, then=F("amount")), default=F("refunded_amount"))),
+        count=Count("pk"),
+    ).order_by()
+    return [
+        DailyRevenue(
+            date=row["day"], category=row["category"], institution_id=row["institution"],
+            status=status, amount=row["total"], payments=row["count"],
+        )
+        for status, rows in ((Payment.Status.SUCCESS, collected), (Payment.Status.REFUNDED, refunded))
+        for row in rows
+    ]
+
+
+def refresh_daily_revenue(dates: Iterable[datetime.date]) -> int:
+    """Recompute the rollup rows of the given (local) dates. Returns the rows written."""
+    dates = set(dates)
+    if not dates:
+        return 0
+    for attempt in range(REFRESH_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                buckets = _buckets(dates)
+                DailyRevenue.objects.filter(date__in=dates).delete()
+                DailyRevenue.objects.bulk_create(buckets)
+            break
+        except IntegrityError:  # A concurrent refresh of the same day committed first; recompute.
+            if attempt == REFRESH_ATTEMPTS - 1:
+                raise
+    invalidate_admin_metrics()
+    return len(buckets)
+
+
+def schedule_refresh(payments: Iterable[Payment]) -> None:
+    """Refresh the days of these payments after the current transaction commits."""
+    dates = {timezone.localdate(payment.created_at) for payment in payments if payment.created_at}
+    if dates:
+        transaction.on_commit(lambda: refresh_daily_revenue(dates))
+
+
+def _monthly_totals(start: datetime.date, end: datetime.date, **filters) -> dict[tuple[datetime.date, str], dict]:
+    rows = DailyRevenue.objects.filter(date__gte=start, date__lte=end, **filters).values(
+        "status", month=TruncMonth("date"),
+    ).annotate(amount=Sum("amount"), count=Sum("payments")).order_by()
+    return {(row["month"], row["status"]): row for row in rows}
+
+
+def _months(start: datetime.date, end: datetime.date) -> list[datetime.date]:
+    months, month = [], month_start(start)
+    while month <= end:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def _figures(totals: dict, months: list[datetime.date]) -> dict:
+    collected = sum((totals[(m, Payment.Status.SUCCESS)]["amount"] for m in months if (m, Payment.Status.SUCCESS) in totals), 0)
+    refunded = sum((totals[(m, Payment.Status.REFUNDED)]["amount"] for m in months if (m, Payment.Status.REFUNDED) in totals), 0)
+    payments = sum(totals[(m, Payment.Status.SUCCESS)]["count"] for m in months if (m, Payment.Status.SUCCESS) in totals)
+    return {"collected": collected, "refunded": refunded, "payments": payments}
+
+
+def monthly_revenue(start: datetime.date, end: datetime.date, **filters) -> list[dict]:
+    """Every month from ``start`` to ``end`` with its ``collected``, ``refunded`` and ``payments``.
+
+    ``filters`` are ``DailyRevenue`` lookups, e.g. ``institution_id=1`` or
+    ``category="TUITION"``. Months without payments are included as zeros.
+    """
+    totals = _monthly_totals(start, end, **filters)
+    return [{"month": month, **_figures(totals, [month])} for month in _months(start, end)]
+
+
+def academic_terms(year: AcademicYear, terms: int = TERMS_PER_YEAR) -> list[tuple[str, datetime.date, datetime.date]]:
+    """Split an academic year's months into ``terms`` consecutive spans: ``(label, start, end)``."""
+    months = _months(year.start_date, year.end_date)
+    size, extra = divmod(len(months), terms)
+    spans, first = [], 0
+    for n in range(terms):
+        last = first + size + (n < extra)
+        if last > first:
+            end = min(next_month(months[last - 1]) - datetime.timedelta(days=1), year.end_date)
+            spans.append((f"Term {n + 1}", max(months[first], year.start_date), end))
+        first = last
+    return spans
+
+
+def term_revenue(year: AcademicYear, **filters) -> list[dict]:
+    """Collected, refunded and payments per term of an academic year."""
+    totals = _monthly_totals(year.start_date, year.end_date, **filters)
+    return [
+        {"term": label, "start": start, "end": end, **_figures(totals, _months(start, end))}
+        for label, start, end in academic_terms(year)
+    ]
+
+
+def year_over_year(years: Iterable[AcademicYear] | None = None, **filters) -> list[dict]:
+    """Per academic year (oldest first): totals, the monthly series and the change in collections.
+
+    ``change`` is the percentage change in ``collected`` from the previous
+    year listed, or ``None`` for the first year or after a year with none.
+    """
+    years = sorted(years if years is not None else AcademicYear.objects.all(), key=lambda year: year.start_date)
+    if not years:
+        return []
+    totals = _monthly_totals(years[0].start_date, max(year.end_date for year in years), **filters)
+    result, previous = [], None
+    for year in years:
+        months = _months(year.start_date, year.end_date)
+        figures = _figures(totals, months)
+        change = None
+        if previous:
+            change = round(float((figures["collected"] - previous) / previous * 100), 1)
+        result.append({
+            "academic_year": year,
+            **figures,
+            "months": [_figures(totals, [month])["collected"] for month in months],
+            "change": change,
+        })
+        previous = figures["collected"]
+    return result
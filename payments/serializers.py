@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+from rest_framework import serializers
+
+from academics.models import StudentProfile
+from accounts.models import User
+from core.api import FieldSelectionMixin
+from core.models import AcademicYear
+
+from .models import DailyRevenue, Payment
+
+
+class PaymentSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Payment
+        fields = [
+            "id",
+            "payer",
+            "student",
+            "academic_year",
+            "category",
+            "amount",
+            "currency",
+            "status",
+            "refunded_amount",
+            "razorpay_order_id",
+            "razorpay_payment_id",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
+class PaymentCreateSerializer(serializers.Serializer):
+    category = serializers.ChoiceField(choices=Payment.Category.choices)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("1"))
+    currency = serializers.CharField(max_length=10, default="INR")
+    student = serializers.PrimaryKeyRelatedField(queryset=StudentProfile.objects.all(), required=False, allow_null=True)
+    # Which year's fees are being paid; defaults to the student's current year.
+    academic_year = serializers.PrimaryKeyRelatedField(queryset=AcademicYear.objects.all(), required=False, allow_null=True)
+
+    def validate_student(self, student):
+        """Parents pay for their own children and students for themselves."""
+        user = self.context["request"].user
+        if student is None or user.role in (User.Roles.ADMIN, User.Roles.STAFF) or user.is_superuser:
+            return student
+        if user.role == User.Roles.PARENT and student.parents.filter(user=user).exists():
+            return student
+        if student.user_id == user.pk:
+            return student
+        raise serializers.ValidationError("You cannot pay for this student.")
+
+
+class PaymentVerifySerializer(serializers.Serializer):
+    razorpay_payment_id = serializers.CharField(max_length=255)
+    razorpay_signature = serializers.CharField(max_length=255)
+
+
+class DailyRevenueSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    class Meta:
+        model = DailyRevenue
+        fields = ["id", "date", "category", "institution", "status", "amount", "payments", "updated_at"]
+
+
+class RevenueQuerySerializer(serializers.Serializer):
+    """Query parameters of the revenue report endpoints."""
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    academic_year = serializers.PrimaryKeyRelatedField(queryset=AcademicYear.objects.all(), required=False)
+    institution = serializers.IntegerField(required=False)
+    category = serializers.ChoiceField(choices=Payment.Category.choices, required=False)
+    status = serializers.ChoiceField(
+        choices=[Payment.Status.SUCCESS, Payment.Status.REFUNDED], required=False,
+        help_text="Rollup rows only; the reports always show both statuses.",
+    )
+
+    def rollup_filters(self) -> dict:
+        """The ``DailyRevenue`` lookups for ``institution`` and ``category``."""
+        data, filters = self.validated_data, {}
+        if "institution" in data:
+            filters["institution_id"] = data["institution"]
+        if "category" in data:
+            filters["category"] = data["category"]
+        return filters
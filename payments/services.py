@@ -1,52 +1,121 @@
+import datetime
 from decimal import Decimal
 from typing import Any
 
-import razorpay
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
+from .gateways import get_gateway
 from .models import Payment
 
+# Held in razorpay_order_id while one request creates the upstream order.
+ORDER_PENDING = "pending"
 
-def get_razorpay_client() -> razorpay.Client:
-    """Create a Razorpay client using configured credentials."""
-    return razorpay.Client(
-        auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-    )
+
+class OrderInProgress(Exception):
+    """Another request is creating the upstream order for this payment."""
+
+
+def create_payment(
+    payer, idempotency_key: str, *, category: str, amount: Decimal, student=None, currency: str = "INR",
+    academic_year=None,
+) -> tuple[Payment, bool]:
+    """Return the payer's payment for ``idempotency_key``, creating it if new.
+
+    ``academic_year`` is the year whose fees are paid; without it the
+    payment is for the student's current year. Returns ``(payment,
+    created)``. Reusing a key for a different amount, category, student or
+    year is rejected with ``ValidationError``.
+    """
+    request = {"category": category, "amount": Decimal(amount), "student": student, "currency": currency}
+    if academic_year is not None:
+        request["academic_year"] = academic_year
+    try:
+        with transaction.atomic():
+            payment, created = Payment.objects.get_or_create(
+                payer=payer, idempotency_key=idempotency_key, defaults=request,
+            )
+    except IntegrityError:  # Lost a race with a concurrent request using the same key.
+        payment, created = Payment.objects.get(payer=payer, idempotency_key=idempotency_key), False
+    if not created and (
+        (payment.category, payment.amount, payment.student_id, payment.currency)
+        != (category, request["amount"], getattr(student, "pk", student), currency)
+        or (academic_year is not None and payment.academic_year_id != getattr(academic_year, "pk", academic_year))
+    ):
+        raise ValidationError("This idempotency key was already used for a different payment.")
+    return payment, created
+
+
+def checkout_details(payment: Payment) -> dict[str, Any]:
+    """What Razorpay Checkout needs to open the payment form."""
+    return {
+        "key": get_gateway().key_id,
+        "order_id": payment.razorpay_order_id,
+        "amount": int(Decimal(payment.amount) * 100),
+        "currency": payment.currency,
+    }
 
 
 def create_razorpay_order(payment: Payment) -> dict[str, Any]:
-    """Create a Razorpay order for a Payment instance (amount in paise)."""
-    client = get_razorpay_client()
-    amount_paise = int(Decimal(payment.amount) * 100)
-    order = client.order.create(
-        {
-            "amount": amount_paise,
-            "currency": payment.currency,
-            "receipt": f"pay_{payment.pk}",
-            "payment_capture": 1,
-        }
+    """Create the upstream order for a payment once; return the checkout details.
+
+    The order is claimed with a conditional UPDATE before calling the
+    gateway, so a double-clicked checkout creates one order: the second
+    request gets the existing order, or ``OrderInProgress`` while the first
+    is still waiting on the gateway. A claim left behind by a crashed request
+    is taken over once it is older than twice the gateway timeout.
+    """
+    if payment.razorpay_order_id and payment.razorpay_order_id != ORDER_PENDING:
+        return checkout_details(payment)
+
+    now = timezone.now()
+    stale = now - datetime.timedelta(seconds=2 * settings.PAYMENT_GATEWAY_TIMEOUT)
+    claimed = Payment.objects.filter(pk=payment.pk, razorpay_order_id="").update(
+        razorpay_order_id=ORDER_PENDING, updated_at=now,
+    ) or Payment.objects.filter(pk=payment.pk, razorpay_order_id=ORDER_PENDING, updated_at__lt=stale).update(
+        updated_at=now,
     )
-    payment.razorpay_order_id = order.get("id", "")
-    payment.save(update_fields=["razorpay_order_id"])
-    return order
+    if not claimed:
+        payment.refresh_from_db(fields=["razorpay_order_id"])
+        if payment.razorpay_order_id == ORDER_PENDING:
+            raise OrderInProgress()
+        return checkout_details(payment)
+
+    try:
+        order = get_gateway().create_order(
+            int(Decimal(payment.amount) * 100), payment.currency,
+            receipt=f"pay_{payment.pk}", notes={"payment_id": str(payment.pk)},
+        )
+    except Exception:
+        Payment.objects.filter(pk=payment.pk, razorpay_order_id=ORDER_PENDING).update(razorpay_order_id="")
+        raise
+    payment.razorpay_order_id = order["id"]
+    payment.save(update_fields=["razorpay_order_id", "updated_at"])
+    return checkout_details(payment)
 
 
 def verify_razorpay_signature(
     razorpay_order_id: str, razorpay_payment_id: str, razorpay_signature: str
 ) -> bool:
     """Verify the Razorpay payment signature."""
-    client = get_razorpay_client()
-    try:
-        client.utility.verify_payment_signature(
-            {
-                "razorpay_order_id": razorpay_order_id,
-                "razorpay_payment_id": razorpay_payment_id,
-                "razorpay_signature": razorpay_signature,
-            }
-        )
-    except razorpay.errors.SignatureVerificationError:
-        return False
-    return True
+    return get_gateway().verify_payment_signature(razorpay_order_id, razorpay_payment_id, razorpay_signature)
 
 
+def verify_payment(payment: Payment, razorpay_payment_id: str, razorpay_signature: str) -> bool:
+    """Check the signature Checkout returned and mark a pending payment successful.
 
+    Returns ``False`` if the signature does not match; the payment is left as is.
+    """
+    if not verify_razorpay_signature(payment.razorpay_order_id, razorpay_payment_id, razorpay_signature):
+        return False
+    with transaction.atomic():
+        locked = Payment.objects.select_for_update().get(pk=payment.pk)
+        if locked.status == Payment.Status.PENDING:
+            locked.status = Payment.Status.SUCCESS
+            locked.razorpay_payment_id = razorpay_payment_id
+            locked.razorpay_signature = razorpay_signature
+            locked.save(update_fields=["status", "razorpay_payment_id", "razorpay_signature", "updated_at"])
+    payment.refresh_from_db()
+    return True
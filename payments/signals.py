@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .ledger import post_payments
+from .models import Payment
+from .revenue import REVENUE_STATUSES, schedule_refresh
+
+
+def post_payment_to_ledger(sender, instance, **kwargs):
+    if instance.status in (Payment.Status.SUCCESS, Payment.Status.REFUNDED):
+        post_payments([instance])
+
+
+# Payment fields the daily revenue rollup is built from.
+ROLLUP_FIELDS = ("status", "amount", "category", "refunded_amount")
+
+
+def remember_rollup_fields(sender, instance, update_fields=None, **kwargs):
+    """Note the stored rollup fields, so only a save that changes them refreshes the rollup.
+
+    New payments and saves limited to other fields (such as the order id
+    written during checkout) skip the lookup.
+    """
+    instance._rollup_previous = None
+    if instance._state.adding or (update_fields is not None and not set(update_fields) & set(ROLLUP_FIELDS)):
+        return
+    instance._rollup_previous = Payment.objects.filter(pk=instance.pk).values_list(*ROLLUP_FIELDS).first()
+
+
+def refresh_revenue_rollup(sender, instance, created=False, **kwargs):
+    if created:
+        if instance.status in REVENUE_STATUSES:
+            schedule_refresh([instance])
+        return
+    previous = getattr(instance, "_rollup_previous", None)
+    if previous is None or previous == tuple(getattr(instance, field) for field in ROLLUP_FIELDS):
+        return
+    if instance.status in REVENUE_STATUSES or previous[0] in REVENUE_STATUSES:
+        schedule_refresh([instance])
+
+
+def refresh_revenue_rollup_on_delete(sender, instance, **kwargs):
+    if instance.status in REVENUE_STATUSES:
+        schedule_refresh([instance])
+
+
+post_save.connect(post_payment_to_ledger, sender=Payment, dispatch_uid="fee-ledger-payment-save")
+pre_save.connect(remember_rollup_fields, sender=Payment, dispatch_uid="revenue-rollup-pre-save")
+post_save.connect(refresh_revenue_rollup, sender=Payment, dispatch_uid="revenue-rollup-save")
+post_delete.connect(refresh_revenue_rollup_on_delete, sender=Payment, dispatch_uid="revenue-rollup-delete")
@@ -1,3 +1,619 @@
-from django.test import TestCase
+import csv
+import datetime
+import json
+import sys
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from academics.models import ClassRoom, ParentProfile, StudentProfile
+from academics.tests import make_classroom, make_student
+from accounts.models import User
+from core import benchmark
+
+import openpyxl
+
+from . import webhooks
+from .gateways import GatewayError, StubGateway, get_gateway
+from .ledger import assess_fees
+from core.dashboard import compute_admin_metrics
+from core.models import AcademicYear, Institution
+
+from .models import DailyRevenue, FeeSchedule, LedgerEntry, Payment, StudentFeeAccount, WebhookEvent
+from .revenue import academic_terms, monthly_revenue, refresh_daily_revenue, year_over_year
+from .services import ORDER_PENDING
+
+
+@override_settings(PAYMENT_GATEWAY="payments.gateways.StubGateway")
+class PaymentAPITests(TestCase):
+    def setUp(self):
+        self.student = make_student(make_classroom(), 1)
+        self.parent = User.objects.create_user(username="parent", password="pw", role=User.Roles.PARENT)
+        ParentProfile.objects.create(user=self.parent).students.add(self.student)
+        self.client.force_login(self.parent)
+        self.url = reverse("payment-list")
+        self.body = {"category": Payment.Category.TUITION, "amount": "1500.00", "student": self.student.pk}
+
+    def checkout(self, key="key-1", **body):
+        return self.client.post(self.url, {**self.body, **body}, HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replayed_checkout_returns_the_same_payment_and_order(self):
+        orders = len(get_gateway().orders)
+        first = self.checkout()
+        second = self.checkout()
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first.json()["checkout"]["amount"], 150000)
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertEqual(len(get_gateway().orders) - orders, 1)
+
+    def test_key_is_required_and_cannot_be_reused_for_another_payment(self):
+        self.assertEqual(self.client.post(self.url, self.body).status_code, 400)
+        self.checkout()
+        response = self.checkout(amount="2000.00")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("idempotency_key", response.json())
+
+    def test_parent_cannot_pay_for_another_student(self):
+        other = make_student(self.student.classroom, 2)
+        self.assertEqual(self.checkout(student=other.pk).status_code, 400)
+
+    def test_order_being_created_elsewhere_is_a_conflict(self):
+        Payment.objects.create(
+            payer=self.parent, student=self.student, category=Payment.Category.TUITION,
+            amount="1500.00", idempotency_key="key-1", razorpay_order_id=ORDER_PENDING,
+        )
+        self.assertEqual(self.checkout().status_code, 409)
+
+    def test_gateway_failure_releases_the_order_for_a_retry(self):
+        with mock.patch.object(StubGateway, "create_order", side_effect=GatewayError("down")):
+            self.assertEqual(self.checkout().status_code, 502)
+        self.assertEqual(Payment.objects.get().razorpay_order_id, "")
+        self.assertEqual(self.checkout().status_code, 200)
+        self.assertTrue(Payment.objects.get().razorpay_order_id.startswith("order_stub"))
+
+    def test_verify_marks_payment_successful(self):
+        payment_id = self.checkout().json()["payment"]["id"]
+        payment = Payment.objects.get(pk=payment_id)
+        verify_url = reverse("payment-verify", args=[payment_id])
+
+        response = self.client.post(verify_url, {"razorpay_payment_id": "pay_1", "razorpay_signature": "forged"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Payment.objects.get().status, Payment.Status.PENDING)
+
+        signature = get_gateway().sign(payment.razorpay_order_id, "pay_1")
+        response = self.client.post(verify_url, {"razorpay_payment_id": "pay_1", "razorpay_signature": signature})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], Payment.Status.SUCCESS)
+        self.assertEqual(Payment.objects.get().razorpay_payment_id, "pay_1")
+
+    def test_users_list_only_their_own_payments(self):
+        self.checkout()
+        other = User.objects.create_user(username="other", role=User.Roles.PARENT)
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url).json()["results"], [])
+        admin = User.objects.create_user(username="admin", role=User.Roles.ADMIN)
+        self.client.force_login(admin)
+        self.assertEqual(len(self.client.get(self.url).json()["results"]), 1)
+        self.assertEqual(self.client.get(self.url, {"student": "abc"}).status_code, 400)
+
+
+@override_settings(PAYMENT_GATEWAY="payments.gateways.StubGateway")
+class RazorpayWebhookTests(TestCase):
+    def setUp(self):
+        self.payer = User.objects.create_user(username="payer", role=User.Roles.PARENT)
+        self.payments = Payment.objects.bulk_create(
+            Payment(
+                payer=self.payer, category=Payment.Category.TUITION, amount="1500.00",
+                razorpay_order_id=f"order_{n}",
+            )
+            for n in range(3)
+        )
+        self.url = reverse("payments:razorpay_webhook")
+        self.deliveries = 0
+
+    def deliver(self, event, order_id="", payment_id="", signature=None):
+        self.deliveries += 1
+        payload = {"event": event, "payload": {}, "created_at": self.deliveries}
+        if event.startswith("refund."):
+            payload["payload"]["refund"] = {"entity": {"id": f"rfnd_{self.deliveries}", "payment_id": payment_id}}
+        else:
+            payload["payload"]["payment"] = {"entity": {"id": payment_id, "order_id": order_id}}
+        body = json.dumps(payload).encode()
+        return self.client.post(
+            self.url, body, content_type="application/json",
+            HTTP_X_RAZORPAY_SIGNATURE=signature or get_gateway().sign_webhook(body),
+            HTTP_X_RAZORPAY_EVENT_ID=f"evt_{self.deliveries}",
+        )
+
+    def run_worker(self):
+        call_command("run_payment_webhooks", once=True, stdout=StringIO())
+
+    def test_unsigned_webhook_is_rejected(self):
+        self.assertEqual(self.deliver("payment.captured", "order_0", "pay_0", signature="forged").status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_delivery_is_stored_and_repeats_dropped(self):
+        self.assertEqual(self.deliver("payment.captured", "order_0", "pay_0").status_code, 200)
+        self.deliveries -= 1
+        self.assertEqual(self.deliver("payment.captured", "order_0", "pay_0").status_code, 200)
+        event = WebhookEvent.objects.get()
+        self.assertEqual((event.razorpay_order_id, event.razorpay_payment_id), ("order_0", "pay_0"))
+        self.assertEqual(event.status, WebhookEvent.Status.PENDING)
+        self.assertEqual(Payment.objects.get(pk=self.payments[0].pk).status, Payment.Status.PENDING)
+
+    def test_worker_applies_a_batch_with_bulk_updates(self):
+        self.deliver("payment.captured", "order_0", "pay_0")
+        self.deliver("payment.failed", "order_1", "pay_1a")
+        self.deliver("payment.captured", "order_1", "pay_1b")
+        self.deliver("payment.captured", "order_missing", "pay_x")
+        self.deliver("payment.authorized", "order_2", "pay_2")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.run_worker()
+        statements = [query["sql"] for query in ctx.captured_queries]
+        self.assertEqual(sum(sql.startswith('SELECT "payments_payment"') for sql in statements), 1)
+        self.assertEqual(sum(sql.startswith('UPDATE "payments_payment"') for sql in statements), 1)
+
+        statuses = dict(Payment.objects.values_list("razorpay_order_id", "status"))
+        self.assertEqual(statuses, {
+            "order_0": Payment.Status.SUCCESS,
+            "order_1": Payment.Status.SUCCESS,
+            "order_2": Payment.Status.PENDING,
+        })
+        self.assertEqual(Payment.objects.get(razorpay_order_id="order_1").razorpay_payment_id, "pay_1b")
+        self.assertEqual(
+            list(WebhookEvent.objects.values_list("status", flat=True)),
+            ["APPLIED", "APPLIED", "APPLIED", "IGNORED", "IGNORED"],
+        )
+
+    def test_late_events_do_not_move_status_backwards(self):
+        self.deliver("payment.captured", "order_0", "pay_0")
+        self.deliver("refund.processed", payment_id="pay_0")
+        self.run_worker()
+        self.deliver("payment.captured", "order_0", "pay_0")
+        self.deliver("payment.failed", "order_0", "pay_0")
+        self.run_worker()
+        self.assertEqual(Payment.objects.get(pk=self.payments[0].pk).status, Payment.Status.REFUNDED)
+        self.assertEqual(WebhookEvent.objects.filter(status=WebhookEvent.Status.APPLIED).count(), 2)
+
+    def test_pending_payments_are_reconciled_in_one_batch(self):
+        gateway = get_gateway()
+        gateway.payments.clear()
+        gateway.pay("order_0")
+        gateway.pay("order_1", status="failed")
+        gateway.pay("order_elsewhere")
+
+        with CaptureQueriesContext(connection) as ctx:
+            call_command("reconcile_payments", older_than=0, stdout=StringIO())
+        statements = [query["sql"] for query in ctx.captured_queries]
+        self.assertEqual(sum(sql.startswith('UPDATE "payments_payment"') for sql in statements), 1)
+        statuses = dict(Payment.objects.values_list("razorpay_order_id", "status"))
+        self.assertEqual(statuses, {
+            "order_0": Payment.Status.SUCCESS,
+            "order_1": Payment.Status.FAILED,
+            "order_2": Payment.Status.PENDING,
+        })
+        self.assertEqual(Payment.objects.get(razorpay_order_id="order_0").razorpay_payment_id, gateway.payments[0]["id"])
+
+        self.assertEqual(webhooks.reconcile_pending(datetime.timedelta(0)), (1, 0))
+        self.assertEqual(WebhookEvent.objects.filter(status=WebhookEvent.Status.APPLIED).count(), 2)
+
+    def test_batch_is_claimed_with_one_update(self):
+        for n in range(3):
+            self.deliver("payment.captured", f"order_{n}", f"pay_{n}")
+        with CaptureQueriesContext(connection) as ctx:
+            events = webhooks.claim(2)
+        self.assertEqual([event.event_id for event in events], ["evt_1", "evt_2"])
+        self.assertEqual(len({event.claim_token for event in events}), 1)
+        self.assertEqual(sum(query["sql"].startswith("UPDATE") for query in ctx.captured_queries), 1)
+        self.assertEqual([event.event_id for event in webhooks.claim(10)], ["evt_3"])
+
+    @override_settings(PAYMENT_WEBHOOK_CLAIM_TIMEOUT=60)
+    def test_events_abandoned_by_crashed_worker_are_reclaimed(self):
+        self.deliver("payment.captured", "order_0", "pay_0")
+        webhooks.claim(10)  # The worker dies before applying the batch.
+        self.assertEqual(webhooks.claim(10), [])
+
+        WebhookEvent.objects.update(claimed_at=timezone.now() - datetime.timedelta(minutes=5))
+        self.run_worker()
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.Status.APPLIED)
+        self.assertEqual(Payment.objects.get(pk=self.payments[0].pk).status, Payment.Status.SUCCESS)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class FeeLedgerTests(TestCase):
+    def setUp(self):
+        self.classroom = make_classroom()
+        self.students = [make_student(self.classroom, n) for n in range(3)]
+        self.schedule = FeeSchedule.objects.create(
+            classroom=self.classroom, category=Payment.Category.TUITION, amount=Decimal("3000.00"),
+        )
+        self.payer = User.objects.create_user(username="payer", role=User.Roles.PARENT)
+
+    def balances(self):
+        return dict(StudentFeeAccount.objects.values_list("student_id", "outstanding"))
+
+    def pay(self, student, amount, **fields):
+        fields = {"category": Payment.Category.TUITION, **fields}
+        return Payment.objects.create(payer=self.payer, student=student, amount=amount, **fields)
+
+    def test_assessment_charges_only_the_difference(self):
+        self.assertEqual(self.schedule.academic_year, self.classroom.academic_year)
+        self.assertEqual(assess_fees([self.schedule]), 3)
+        self.assertEqual(assess_fees([self.schedule]), 0)
+
+        self.schedule.amount = Decimal("3500.00")
+        self.schedule.save()
+        late_joiner = make_student(self.classroom, 3)
+        self.assertEqual(assess_fees([self.schedule]), 4)
+        self.assertEqual(set(self.balances().values()), {Decimal("3500.00")})
+        self.assertEqual(LedgerEntry.objects.filter(account__student=late_joiner).count(), 1)
+
+    def test_student_moved_to_another_division_is_not_charged_twice(self):
+        assess_fees([self.schedule])
+        division_b = make_classroom(division="B")
+        schedule_b = FeeSchedule.objects.create(
+            classroom=division_b, category=Payment.Category.TUITION, amount=Decimal("3200.00"),
+        )
+        moved = self.students[0]
+        moved.classroom = division_b
+        moved.save()
+
+        self.assertEqual(assess_fees([schedule_b]), 1)
+        self.assertEqual(self.balances()[moved.pk], Decimal("3200.00"))
+        self.assertEqual(assess_fees([schedule_b, self.schedule]), 0)
+
+    def test_late_payment_of_last_years_dues_clears_last_year(self):
+        last_year = AcademicYear.objects.create(
+            name="2024-25", start_date=datetime.date(2024, 6, 1), end_date=datetime.date(2025, 3, 31),
+        )
+        old_class = ClassRoom.objects.create(
+            institution=self.classroom.institution, academic_year=last_year, standard="9", division="A",
+        )
+        student = self.students[0]
+        StudentProfile.objects.filter(pk=student.pk).update(classroom=old_class)
+        old_schedule = FeeSchedule.objects.create(classroom=old_class, category=Payment.Category.TUITION, amount=Decimal("2000.00"))
+        assess_fees([old_schedule])
+        StudentProfile.objects.filter(pk=student.pk).update(classroom=self.classroom)  # Promoted.
+        assess_fees([self.schedule])
+
+        payment = self.pay(student, Decimal("2000.00"), status=Payment.Status.SUCCESS, academic_year=last_year)
+        self.assertEqual(payment.academic_year, last_year)
+        outstanding = dict(StudentFeeAccount.objects.filter(student=student).values_list("academic_year", "outstanding"))
+        self.assertEqual(outstanding, {last_year.pk: Decimal("0.00"), self.classroom.academic_year_id: Decimal("3000.00")})
+        self.assertEqual(StudentFeeAccount.objects.get(student=student, academic_year=last_year).classroom, old_class)
+
+        current = self.pay(student, Decimal("500.00"), status=Payment.Status.SUCCESS)
+        self.assertEqual(current.academic_year_id, self.classroom.academic_year_id)
+        this_year = StudentFeeAccount.objects.get(student=student, academic_year=self.classroom.academic_year)
+        self.assertEqual(this_year.outstanding, Decimal("2500.00"))
+
+    def test_schedule_year_follows_its_classroom(self):
+        other_year = AcademicYear.objects.create(
+            name="2024-25", start_date=datetime.date(2024, 6, 1), end_date=datetime.date(2025, 3, 31),
+        )
+        self.schedule.academic_year = other_year
+        self.schedule.save()
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.academic_year, self.classroom.academic_year)
+
+    def test_payments_update_the_balance_once(self):
+        assess_fees([self.schedule])
+        student = self.students[0]
+        payment = self.pay(student, "1000.00")
+        self.assertEqual(self.balances()[student.pk], Decimal("3000.00"))
+
+        payment.status = Payment.Status.SUCCESS
+        payment.save()
+        payment.save()
+        self.pay(student, "50.00", category=Payment.Category.DONATION, status=Payment.Status.SUCCESS)
+        account = StudentFeeAccount.objects.get(student=student)
+        self.assertEqual((account.paid, account.outstanding), (Decimal("1000.00"), Decimal("2000.00")))
+
+        payment.status = Payment.Status.REFUNDED
+        payment.save()
+        entries = list(account.entries.values_list("kind", "amount", "balance_after"))
+        self.assertEqual(entries, [
+            ("CHARGE", Decimal("3000.00"), Decimal("3000.00")),
+            ("PAYMENT", Decimal("-1000.00"), Decimal("2000.00")),
+            ("REFUND", Decimal("1000.00"), Decimal("3000.00")),
+        ])
+
+    @override_settings(PAYMENT_GATEWAY="payments.gateways.StubGateway")
+    def test_webhook_captures_are_posted_to_the_ledger_and_rollup(self):
+        assess_fees([self.schedule])
+        self.pay(self.students[1], "3000.00", razorpay_order_id="order_1")
+        body = json.dumps({
+            "event": "payment.captured",
+            "payload": {"payment": {"entity": {"id": "pay_1", "order_id": "order_1"}}},
+        }).encode()
+        self.client.post(
+            reverse("payments:razorpay_webhook"), body, content_type="application/json",
+            HTTP_X_RAZORPAY_SIGNATURE=get_gateway().sign_webhook(body), HTTP_X_RAZORPAY_EVENT_ID="evt_1",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("run_payment_webhooks", once=True, stdout=StringIO())
+        self.assertEqual(self.balances()[self.students[1].pk], Decimal("0.00"))
+        self.assertEqual(DailyRevenue.objects.get().amount, Decimal("3000.00"))
+
+    @override_settings(PAYMENT_GATEWAY="payments.gateways.StubGateway")
+    def test_partial_refund_reverses_only_the_refunded_amount(self):
+        assess_fees([self.schedule])
+        payment = self.pay(self.students[0], "3000.00", status=Payment.Status.SUCCESS, razorpay_payment_id="pay_0")
+
+        def refund(paise, event_id):
+            body = json.dumps({
+                "event": "refund.processed",
+                "payload": {"refund": {"entity": {"id": event_id, "payment_id": "pay_0", "amount": paise}}},
+            }).encode()
+            self.client.post(
+                reverse("payments:razorpay_webhook"), body, content_type="application/json",
+                HTTP_X_RAZORPAY_SIGNATURE=get_gateway().sign_webhook(body), HTTP_X_RAZORPAY_EVENT_ID=event_id,
+            )
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("run_payment_webhooks", once=True, stdout=StringIO())
+            payment.refresh_from_db()
+
+        refund(50000, "evt_1")
+        self.assertEqual((payment.status, payment.refunded_amount), (Payment.Status.SUCCESS, Decimal("500.00")))
+        self.assertEqual(self.balances()[self.students[0].pk], Decimal("500.00"))
+        self.assertEqual(
+            dict(DailyRevenue.objects.values_list("status", "amount")),
+            {"SUCCESS": Decimal("2500.00"), "REFUNDED": Decimal("500.00")},
+        )
+
+        refund(250000, "evt_2")
+        self.assertEqual((payment.status, payment.refunded_amount), (Payment.Status.REFUNDED, Decimal("3000.00")))
+        self.assertEqual(self.balances()[self.students[0].pk], Decimal("3000.00"))
+        self.assertEqual(list(payment.ledger_entries.values_list("kind", "amount")), [
+            ("PAYMENT", Decimal("-3000.00")), ("REFUND", Decimal("500.00")), ("REFUND", Decimal("2500.00")),
+        ])
+        self.assertEqual(dict(DailyRevenue.objects.values_list("status", "amount")), {"REFUNDED": Decimal("3000.00")})
+
+    def test_defaulters_report_lists_balances_owed(self):
+        assess_fees([self.schedule])
+        self.pay(self.students[0], "3000.00", status=Payment.Status.SUCCESS)
+        self.pay(self.students[1], "2500.00", status=Payment.Status.SUCCESS)
+        admin = User.objects.create_user(username="admin", role=User.Roles.ADMIN)
+        self.client.force_login(admin)
+        url = reverse("payments:defaulters_report")
+
+        response = self.client.get(url)
+        self.assertEqual(
+            [account.student for account in response.context["accounts"]], [self.students[2], self.students[1]],
+        )
+        self.assertEqual(response.context["total_outstanding"], Decimal("3500.00"))
+        response = self.client.get(url, {"min": "1000"})
+        self.assertEqual([account.student for account in response.context["accounts"]], [self.students[2]])
+
+    def test_assess_fees_command_backfills_payments(self):
+        self.pay(self.students[0], "1200.00", status=Payment.Status.SUCCESS)
+        LedgerEntry.objects.all().delete()
+        StudentFeeAccount.objects.all().delete()
+        call_command("assess_fees", stdout=StringIO())
+        self.assertEqual(self.balances()[self.students[0].pk], Decimal("1800.00"))
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class PaymentExportTests(TestCase):
+    def setUp(self):
+        self.student = make_student(make_classroom(), 1)
+        self.payer = User.objects.create_user(username="payer", first_name="Asha", last_name="K", role=User.Roles.PARENT)
+        Payment.objects.bulk_create(
+            Payment(
+                payer=self.payer, student=self.student if n % 2 else None, amount=Decimal(100 + n),
+                category=[Payment.Category.TUITION, Payment.Category.DONATION][n % 2],
+                status=[Payment.Status.SUCCESS, Payment.Status.PENDING, Payment.Status.FAILED][n % 3],
+            )
+            for n in range(30)
+        )
+        Payment.objects.filter(pk=Payment.objects.order_by("pk").first().pk).update(
+            created_at=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+        )
+        self.client.force_login(User.objects.create_user(username="committee", role=User.Roles.COMMITTEE))
+        self.url = reverse("payments:payment_export")
+
+    def export_csv(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params or {})
+            content = b"".join(response.streaming_content).decode()
+        return response, list(csv.reader(StringIO(content))), len(ctx.captured_queries)
+
+    def test_csv_streams_filtered_rows_with_joined_fields(self):
+        response, rows, queries = self.export_csv({"status": Payment.Status.SUCCESS, "category": Payment.Category.DONATION})
+        self.assertTrue(response.streaming)
+        self.assertEqual(rows[0][:3], ["Payment ID", "Date", "Payer"])
+        self.assertEqual(len(rows), 1 + 5)
+        self.assertEqual({(row[3], row[4]) for row in rows[1:]}, {("Asha K", self.student.admission_number)})
+
+        Payment.objects.bulk_create(
+            Payment(payer=self.payer, student=self.student, category=Payment.Category.DONATION,
+                    amount=Decimal(1), status=Payment.Status.SUCCESS)
+            for _n in range(20)
+        )
+        _response, more_rows, more_queries = self.export_csv({"status": Payment.Status.SUCCESS, "category": Payment.Category.DONATION})
+        self.assertEqual(len(more_rows), 1 + 25)
+        self.assertEqual(more_queries, queries)
+
+    def test_date_filter(self):
+        _response, rows, _queries = self.export_csv({"date_to": "2024-12-31"})
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[1][1].startswith("2024-01-01"))
+
+    def test_invalid_filter_is_rejected_not_ignored(self):
+        response = self.client.get(self.url, {"date_from": "bad"})
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_login(User.objects.create_user(username="admin", role=User.Roles.ADMIN))
+        response = self.client.get(reverse("payments:payment_list"), {"date_from": "bad"})
+        self.assertEqual(len(response.context["payments"]), 0)
+
+    def test_formula_cells_are_neutralised(self):
+        self.payer.first_name = "=HYPERLINK(\"http://x\")"
+        self.payer.save()
+        Payment.objects.update(razorpay_order_id="@SUM(1)")
+        _response, rows, _queries = self.export_csv()
+        self.assertEqual(rows[1][3], "'=HYPERLINK(\"http://x\") K")
+        self.assertEqual(rows[1][9], "'@SUM(1)")
+        self.assertEqual(rows[1][6], "100.00")
+
+    def test_xlsx_export(self):
+        response = self.client.get(self.url, {"format": "xlsx", "status": Payment.Status.PENDING})
+        self.assertEqual(response["Content-Type"], "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        sheet = openpyxl.load_workbook(BytesIO(b"".join(response.streaming_content))).active
+        self.assertEqual(sheet.max_row, 1 + 10)
+
+    def test_list_joins_payer_and_student(self):
+        admin = User.objects.create_user(username="admin", role=User.Roles.ADMIN)
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("payments:payment_list"), {"status": Payment.Status.FAILED})
+        self.assertEqual(len(response.context["payments"]), 10)
+        self.assertLessEqual(len(ctx.captured_queries), 5)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class RevenueRollupTests(TestCase):
+    def setUp(self):
+        self.student = make_student(make_classroom(), 1)
+        self.year = self.student.classroom.academic_year
+        self.institution = self.student.classroom.institution
+        self.payer = User.objects.create_user(username="payer", role=User.Roles.PARENT)
+
+    def pay(self, amount, status=Payment.Status.SUCCESS, **fields):
+        fields = {"student": self.student, "category": Payment.Category.TUITION, **fields}
+        with self.captureOnCommitCallbacks(execute=True):
+            return Payment.objects.create(payer=self.payer, amount=Decimal(amount), status=status, **fields)
+
+    def buckets(self):
+        return set(DailyRevenue.objects.values_list("category", "institution_id", "status", "amount", "payments"))
+
+    def backdate(self, payment, day):
+        Payment.objects.filter(pk=payment.pk).update(
+            created_at=datetime.datetime.combine(day, datetime.time(10), tzinfo=datetime.timezone.utc),
+        )
+
+    def test_rollup_follows_payment_status(self):
+        pending = self.pay("700.00", status=Payment.Status.PENDING)
+        self.pay("300.00")
+        donation = self.pay("50.00", student=None, category=Payment.Category.DONATION)
+        self.assertEqual(self.buckets(), {
+            ("TUITION", self.institution.pk, "SUCCESS", Decimal("300.00"), 1),
+            ("DONATION", None, "SUCCESS", Decimal("50.00"), 1),
+        })
+
+        pending.status = Payment.Status.SUCCESS
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.save()
+        pending.status = Payment.Status.REFUNDED
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.save()
+        self.assertIn(("TUITION", self.institution.pk, "REFUNDED", Decimal("700.00"), 1), self.buckets())
+        self.assertIn(("TUITION", self.institution.pk, "SUCCESS", Decimal("300.00"), 1), self.buckets())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            donation.delete()
+        self.assertEqual(len(self.buckets()), 2)
+        self.assertEqual(compute_admin_metrics()["total_revenue"], Decimal("300.00"))
+
+    def test_institution_is_kept_when_the_student_moves(self):
+        payment = self.pay("300.00")
+        self.assertEqual(payment.institution_id, self.institution.pk)
+        other = Institution.objects.create(code="AHS", name="Adabiyya High School")
+        ClassRoom.objects.filter(pk=self.student.classroom_id).update(institution=other)
+
+        refresh_daily_revenue([timezone.localdate(payment.created_at)])
+        self.assertEqual(self.buckets(), {("TUITION", self.institution.pk, "SUCCESS", Decimal("300.00"), 1)})
+
+    def test_only_saves_that_change_the_rollup_refresh_it(self):
+        payment = self.pay("300.00")
+        with mock.patch("payments.signals.schedule_refresh") as refresh:
+            with CaptureQueriesContext(connection) as ctx:
+                payment.razorpay_order_id = "order_1"
+                payment.save(update_fields=["razorpay_order_id", "updated_at"])
+            self.assertFalse(any(query["sql"].startswith('SELECT "payments_payment"."status"') for query in ctx.captured_queries))
+            payment.save()
+            refresh.assert_not_called()
+
+            payment.status = Payment.Status.REFUNDED
+            payment.save()
+            refresh.assert_called_once()
+
+    def test_monthly_term_and_year_over_year_reports(self):
+        previous = AcademicYear.objects.create(
+            name="2024-25", start_date=datetime.date(2024, 6, 1), end_date=datetime.date(2025, 3, 31),
+        )
+        for amount, day in [("100.00", datetime.date(2024, 7, 5)), ("1000.00", datetime.date(2025, 6, 10)),
+                            ("500.00", datetime.date(2025, 6, 20)), ("250.00", datetime.date(2026, 1, 15))]:
+            self.backdate(self.pay(amount), day)
+        call_command("rebuild_revenue_rollup", stdout=StringIO())
+
+        months = monthly_revenue(self.year.start_date, self.year.end_date)
+        self.assertEqual(len(months), 10)
+        self.assertEqual((months[0]["collected"], months[0]["payments"]), (Decimal("1500.00"), 2))
+        self.assertEqual(months[1]["collected"], 0)
+
+        self.assertEqual(
+            [(label, start, end) for label, start, end in academic_terms(self.year)],
+            [
+                ("Term 1", datetime.date(2025, 6, 1), datetime.date(2025, 9, 30)),
+                ("Term 2", datetime.date(2025, 10, 1), datetime.date(2025, 12, 31)),
+                ("Term 3", datetime.date(2026, 1, 1), datetime.date(2026, 3, 31)),
+            ],
+        )
+        yoy = year_over_year()
+        self.assertEqual([row["academic_year"] for row in yoy], [previous, self.year])
+        self.assertEqual([row["collected"] for row in yoy], [Decimal("100.00"), Decimal("1750.00")])
+        self.assertEqual(yoy[1]["change"], 1650.0)
+        self.assertEqual(year_over_year(institution_id=self.institution.pk + 1)[1]["collected"], 0)
+
+    def test_api_and_committee_dashboard(self):
+        self.backdate(self.pay("1000.00"), datetime.date(2025, 11, 2))
+        call_command("rebuild_revenue_rollup", stdout=StringIO())
+        self.client.force_login(User.objects.create_user(username="member", role=User.Roles.COMMITTEE))
+
+        response = self.client.get(reverse("revenue-terms"))
+        self.assertEqual(
+            [(term["term"], term["collected"]) for term in response.json()["terms"]],
+            [("Term 1", "0.00"), ("Term 2", "1000.00"), ("Term 3", "0.00")],
+        )
+        response = self.client.get(reverse("revenue-monthly"), {"date_from": "2025-10-01", "date_to": "2025-11-30"})
+        self.assertEqual(response.json()["months"][1], {"month": "2025-11", "collected": "1000.00", "refunded": "0.00", "payments": 1})
+        self.assertEqual(self.client.get(reverse("revenue-year-over-year")).json()["years"][0]["collected"], "1000.00")
+
+        response = self.client.get(reverse("core:committee_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["current"]["collected"], Decimal("1000.00"))
+        rows = self.client.get(reverse("revenue-list"), {"date_from": "2025-11-01", "status": "SUCCESS"}).json()
+        self.assertEqual([row["amount"] for row in rows["results"]], ["1000.00"])
+        for params in ({"date_from": "abc"}, {"institution": "x"}, {"status": "PENDING"}):
+            self.assertEqual(self.client.get(reverse("revenue-list"), params).status_code, 400)
+
+        self.client.force_login(self.payer)
+        self.assertEqual(self.client.get(reverse("revenue-monthly")).status_code, 403)
+
+
+@tag("benchmark")
+@override_settings(PAYMENT_GATEWAY="payments.gateways.StubGateway", PAYMENT_STUB_LATENCY_MS=5)
+class CheckoutBenchmarkTests(TestCase):
+    """Double-submitted checkouts against the stub gateway: latency and duplicate orders."""
+
+    def test_double_submits_create_one_order_each(self):
+        self.client.force_login(User.objects.create_user(username="donor", role=User.Roles.PARENT))
+        result = benchmark.measure_checkout(self.client)
+        sys.stderr.write(
+            f"\n\nCheckout: median {result['median_ms']:.1f} ms, max {result['max_ms']:.1f} ms, "
+            f"{result['orders']} orders, duplicate rate {result['duplicate_rate']:.0%}\n"
+        )
+        self.assertEqual(result["duplicate_rate"], 0)
+        self.assertLessEqual(result["median_ms"], 300 * benchmark.BENCHMARK_LATENCY_FACTOR)
@@ -8,6 +8,9 @@ app_name = "payments"
 
 urlpatterns = [
     path("list/", views.PaymentListView.as_view(), name="payment_list"),
+    path("export/", views.PaymentExportView.as_view(), name="payment_export"),
+    path("defaulters/", views.DefaultersReportView.as_view(), name="defaulters_report"),
+    path("webhook/razorpay/", views.RazorpayWebhookView.as_view(), name="razorpay_webhook"),
 ]
 
 
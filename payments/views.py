@@ -1,9 +1,24 @@
+from decimal import Decimal, InvalidOperation
+
+from django.contrib import messages
+from django.db.models import Sum
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import ListView
 from django.utils.translation import gettext_lazy as _
 
+from academics.models import ClassRoom
 from accounts.models import User
+from core.models import AcademicYear
 from core.views import RoleRequiredMixin
+from .exports import build_xlsx, stream_csv
+from .forms import PaymentFilterForm
+from .ledger import defaulters
 from .models import Payment
+from .webhooks import InvalidWebhook, record_event
 
 class PaymentListView(RoleRequiredMixin, ListView):
     model = Payment
@@ -12,8 +27,91 @@ class PaymentListView(RoleRequiredMixin, ListView):
     allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
     paginate_by = 20
 
+    def get_queryset(self):
+        self.filter_form = PaymentFilterForm(self.request.GET or None)
+        payments = self.filter_form.filter(Payment.objects.select_related('payer', 'student'))
+        if self.filter_form.errors:
+            messages.error(self.request, _("Invalid filter; check the dates and try again."))
+        return payments
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['page_title'] = _("Payments")
         context['page_icon'] = "bi-credit-card"
+        context['filter_form'] = self.filter_form
+        context['filter_query'] = self.request.GET.copy()
+        context['filter_query'].pop('page', None)
+        return context
+
+
+class PaymentExportView(RoleRequiredMixin, View):
+    """The filtered payment list as ``?format=csv`` (default) or ``xlsx``, streamed."""
+    allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF, User.Roles.COMMITTEE]
+
+    def get(self, request):
+        form = PaymentFilterForm(request.GET or None)
+        if form.errors:
+            return HttpResponseBadRequest(" ".join(f"{field}: {' '.join(errors)}" for field, errors in form.errors.items()))
+        payments = form.filter(Payment.objects.all())
+        filename = f"payments-{timezone.localdate():%Y%m%d}"
+        if request.GET.get('format') == 'xlsx':
+            return FileResponse(
+                build_xlsx(payments), as_attachment=True, filename=f"{filename}.xlsx",
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            )
+        response = StreamingHttpResponse(stream_csv(payments), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
+
+
+class DefaultersReportView(RoleRequiredMixin, ListView):
+    """Students with fees outstanding for a year, read from the ledger balances."""
+    template_name = "payments/defaulters_report.html"
+    context_object_name = 'accounts'
+    allowed_roles = [User.Roles.ADMIN, User.Roles.STAFF]
+    paginate_by = 50
+
+    def get_queryset(self):
+        years = AcademicYear.objects.order_by('-is_active', '-start_date')
+        year_id = self.request.GET.get('academic_year')
+        self.academic_year = (years.filter(pk=year_id).first() if year_id and year_id.isdigit() else None) or years.first()
+        classroom_id = self.request.GET.get('classroom')
+        self.classroom = (
+            ClassRoom.objects.filter(pk=classroom_id).first() if classroom_id and classroom_id.isdigit() else None
+        )
+        try:
+            self.min_outstanding = max(Decimal(self.request.GET.get('min') or '0.01'), Decimal('0.01'))
+        except InvalidOperation:
+            self.min_outstanding = Decimal('0.01')
+        return defaulters(self.academic_year, self.min_outstanding, classroom=self.classroom)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update({
+            'total_outstanding': self.object_list.aggregate(total=Sum('outstanding'))['total'] or 0,
+            'academic_year': self.academic_year,
+            'academic_years': AcademicYear.objects.all(),
+            'classrooms': ClassRoom.objects.filter(academic_year=self.academic_year).select_related('academic_year'),
+            'selected_classroom': self.classroom.pk if self.classroom else None,
+            'min_outstanding': self.min_outstanding,
+            'page_title': _("Fee Defaulters"),
+        })
         return context
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class RazorpayWebhookView(View):
+    """Receives Razorpay webhooks. Events are stored here and applied by
+    ``run_payment_webhooks``, so the response never waits on payment updates.
+    """
+
+    def post(self, request):
+        try:
+            record_event(
+                request.body,
+                request.headers.get('X-Razorpay-Signature', ''),
+                request.headers.get('X-Razorpay-Event-Id', ''),
+            )
+        except InvalidWebhook as e:
+            return HttpResponseBadRequest(str(e))
+        return HttpResponse(status=200)
@@ -0,0 +1,216 @@
+"""Razorpay webhooks: store events on receipt, apply them to payments in batches.
+
+``record_event`` checks the signature and inserts the raw event, nothing
+else, so the webhook answers within Razorpay's timeout even on fee deadline
+days. ``python manage.py run_payment_webhooks`` then applies pending events:
+
+* a batch is claimed in arrival order with one UPDATE that stamps it with
+  a per-batch token, so several workers can run; events left PROCESSING
+  by a worker that died are claimed again after
+  ``PAYMENT_WEBHOOK_CLAIM_TIMEOUT``;
+* the batch's payments are loaded in one query, matched on the indexed
+  ``razorpay_order_id`` or ``razorpay_payment_id``;
+* statuses only move forward (PENDING, FAILED, SUCCESS, REFUNDED), so an
+  event delivered late or twice cannot undo a newer one;
+* a refund adds its ``amount`` to the payment's ``refunded_amount``; the
+  payment becomes REFUNDED only once the whole amount is refunded, and the
+  ledger and revenue rollup reverse only what was refunded;
+* changed payments are written with one ``bulk_update``, posted to the fee
+  ledger in the same transaction, and the events marked APPLIED or IGNORED
+  with another ``bulk_update``; their days of the revenue rollup are
+  refreshed after commit.
+
+``reconcile_pending`` (``python manage.py reconcile_payments``) catches up
+on lost webhooks: it lists Razorpay's payments since the oldest PENDING
+order in one paged call, stores the captured and failed ones as events and
+applies them the same way.
+"""
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.dashboard import invalidate_admin_metrics
+
+from .gateways import get_gateway
+from .ledger import post_payments
+from .revenue import schedule_refresh
+from .models import Payment, WebhookEvent
+
+# Webhook event recorded for a Razorpay payment found by reconciliation.
+RECONCILE_EVENTS = {"captured": "payment.captured", "failed": "payment.failed"}
+# Payment status each event moves to; other events are stored and ignored.
+EVENT_STATUS = {
+    "payment.captured": Payment.Status.SUCCESS,
+    "order.paid": Payment.Status.SUCCESS,
+    "payment.failed": Payment.Status.FAILED,
+    "refund.processed": Payment.Status.REFUNDED,
+}
+STATUS_RANK = {
+    Payment.Status.PENDING: 0,
+    Payment.Status.FAILED: 1,
+    Payment.Status.SUCCESS: 2,
+    Payment.Status.REFUNDED: 3,
+}
+
+
+class InvalidWebhook(Exception):
+    """The body is not signed with the webhook secret or is not an event."""
+
+
+def _entity(payload: dict, name: str) -> dict:
+    return (payload.get("payload", {}).get(name) or {}).get("entity") or {}
+
+
+def event_ids(payload: dict) -> tuple[str, str]:
+    """The ``(razorpay_order_id, razorpay_payment_id)`` an event refers to."""
+    payment, refund, order = _entity(payload, "payment"), _entity(payload, "refund"), _entity(payload, "order")
+    order_id = payment.get("order_id") or order.get("id") or ""
+    payment_id = payment.get("id") or refund.get("payment_id") or ""
+    return order_id or "", payment_id or ""
+
+
+def record_event(body: bytes, signature: str, event_id: str) -> bool:
+    """Verify and store one delivery. Returns ``False`` for a repeated delivery."""
+    if not get_gateway().verify_webhook_signature(body, signature):
+        raise InvalidWebhook("Invalid signature.")
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise InvalidWebhook("Body is not JSON.") from e
+    if not isinstance(payload, dict) or not payload.get("event"):
+        raise InvalidWebhook("Body is not a Razorpay event.")
+    order_id, payment_id = event_ids(payload)
+    try:
+        with transaction.atomic():
+            WebhookEvent.objects.create(
+                event_id=event_id or f"{payload['event']}:{payment_id or order_id}:{payload.get('created_at', '')}",
+                event=payload["event"],
+                payload=payload,
+                razorpay_order_id=order_id[:255],
+                razorpay_payment_id=payment_id[:255],
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def claim(limit: int) -> list[WebhookEvent]:
+    """Move up to ``limit`` pending events to PROCESSING, oldest first, and return them.
+
+    The batch is claimed with a single conditional UPDATE that writes a fresh
+    token, then read back by that token. Events a crashed worker left in
+    PROCESSING for longer than PAYMENT_WEBHOOK_CLAIM_TIMEOUT are claimable
+    again; applying an event twice is harmless since statuses only move
+    forward and ledger postings are unique per payment.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    claimable = Q(status=WebhookEvent.Status.PENDING) | Q(
+        status=WebhookEvent.Status.PROCESSING,
+        claimed_at__lt=now - datetime.timedelta(seconds=settings.PAYMENT_WEBHOOK_CLAIM_TIMEOUT),
+    )
+    batch = WebhookEvent.objects.filter(claimable).order_by("pk").values("pk")[:limit]
+    WebhookEvent.objects.filter(claimable, pk__in=batch).update(
+        status=WebhookEvent.Status.PROCESSING, claim_token=token, claimed_at=now,
+    )
+    return list(WebhookEvent.objects.filter(claim_token=token).order_by("pk"))
+
+
+def _refund_amount(event: WebhookEvent, payment: Payment) -> Decimal:
+    """Rupees refunded by a refund event; the whole payment if Razorpay sent no amount."""
+    paise = _entity(event.payload, "refund").get("amount")
+    return Decimal(paise) / 100 if paise else Decimal(payment.amount)
+
+
+def apply(events: list[WebhookEvent]) -> list[Payment]:
+    """Apply claimed events to their payments. Returns the payments that changed."""
+    if not events:
+        return []
+    order_ids = {event.razorpay_order_id for event in events if event.razorpay_order_id}
+    payment_ids = {event.razorpay_payment_id for event in events if event.razorpay_payment_id}
+    now = timezone.now()
+    changed = {}
+    with transaction.atomic():
+        payments = list(Payment.objects.select_for_update().filter(
+            Q(razorpay_order_id__in=order_ids) | Q(razorpay_payment_id__in=payment_ids)
+        ).order_by())
+        by_order = {payment.razorpay_order_id: payment for payment in payments if payment.razorpay_order_id}
+        by_payment = {payment.razorpay_payment_id: payment for payment in payments if payment.razorpay_payment_id}
+        for event in events:
+            event.processed_at = now
+            status = EVENT_STATUS.get(event.event)
+            payment = by_order.get(event.razorpay_order_id) or by_payment.get(event.razorpay_payment_id)
+            if status is None:
+                event.status, event.note = WebhookEvent.Status.IGNORED, "Event type not handled."
+            elif payment is None:
+                event.status, event.note = WebhookEvent.Status.IGNORED, "No matching payment."
+            elif STATUS_RANK[status] <= STATUS_RANK[payment.status]:
+                event.status, event.note = WebhookEvent.Status.IGNORED, f"Payment already {payment.status}."
+            elif status == Payment.Status.REFUNDED and _refund_amount(event, payment) < payment.amount - payment.refunded_amount:
+                refund = _refund_amount(event, payment)
+                payment.refunded_amount += refund
+                payment.updated_at = now
+                changed[payment.pk] = payment
+                event.status, event.note = WebhookEvent.Status.APPLIED, f"Partial refund of {refund}."
+            else:
+                if status == Payment.Status.REFUNDED:
+                    payment.refunded_amount = payment.amount
+                payment.status = status
+                if event.razorpay_payment_id and status != Payment.Status.FAILED:
+                    payment.razorpay_payment_id = event.razorpay_payment_id
+                    by_payment[payment.razorpay_payment_id] = payment
+                payment.updated_at = now
+                changed[payment.pk] = payment
+                event.status, event.note = WebhookEvent.Status.APPLIED, ""
+        Payment.objects.bulk_update(changed.values(), ["status", "razorpay_payment_id", "refunded_amount", "updated_at"])
+        post_payments(changed.values())
+        schedule_refresh(changed.values())
+        WebhookEvent.objects.bulk_update(events, ["status", "note", "processed_at"])
+    if changed:
+        invalidate_admin_metrics()
+    return list(changed.values())
+
+
+def process_once(batch_size: int | None = None) -> tuple[int, int]:
+    """Apply one batch of pending events. Returns ``(events, payments changed)``."""
+    events = claim(batch_size or settings.PAYMENT_WEBHOOK_BATCH_SIZE)
+    return len(events), len(apply(events))
+
+
+def reconcile_pending(older_than: datetime.timedelta, limit: int | None = None) -> tuple[int, int]:
+    """Check PENDING payments older than ``older_than`` against Razorpay in one batch.
+
+    Returns ``(payments checked, payments changed)``. Each payment found
+    upstream is stored as a ``reconcile:`` event, already claimed, and the
+    batch applied with ``apply``; reconciling again adds nothing new.
+    """
+    pending = Payment.objects.filter(
+        status=Payment.Status.PENDING, created_at__lt=timezone.now() - older_than,
+    ).exclude(razorpay_order_id="").order_by("created_at").values_list("razorpay_order_id", "created_at")
+    pending = dict(pending[:limit] if limit else pending)
+    if not pending:
+        return 0, 0
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    events = []
+    for entity in get_gateway().fetch_payments(min(pending.values())):
+        event = RECONCILE_EVENTS.get(entity.get("status"))
+        if event and entity.get("order_id") in pending:
+            events.append(WebhookEvent(
+                event_id=f"reconcile:{entity['id']}:{entity['status']}"[:64],
+                event=event,
+                payload={"event": event, "payload": {"payment": {"entity": entity}}},
+                razorpay_order_id=entity["order_id"][:255],
+                razorpay_payment_id=entity["id"][:255],
+                status=WebhookEvent.Status.PROCESSING,
+                claim_token=token,
+                claimed_at=now,
+            ))
+    WebhookEvent.objects.bulk_create(events, ignore_conflicts=True)
+    return len(pending), len(apply(list(WebhookEvent.objects.filter(claim_token=token).order_by("pk"))))